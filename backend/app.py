@@ -1,36 +1,73 @@
 import json
 import os
-from flask import Flask, request, jsonify, make_response  # type: ignore
-from sqlalchemy import extract, func  # type: ignore
+from flask import Flask, Response, request, jsonify, make_response, stream_with_context  # type: ignore
 from datetime import datetime, timedelta
 from sqlalchemy.exc import SQLAlchemyError  # type: ignore
 from flask_jwt_extended import JWTManager, jwt_required, create_access_token, get_jwt  # type: ignore
 from flask_restful import Resource, Api, reqparse  # type: ignore
 from config import Config
-from werkzeug.security import generate_password_hash, check_password_hash  # type: ignore
 from werkzeug.exceptions import HTTPException  # type: ignore
-from flask_bcrypt import Bcrypt  # type: ignore
 from flask_mail import Mail  # type: ignore
 from flask_cors import CORS  # type: ignore
 import jwt  # type: ignore
 import random
 import string
 from flask_migrate import Migrate  # type: ignore
-from models import Answer, db, User, PasswordReset, Feedback, Submission, Assessment, Invitation, Question
+from models import (
+    ASSESSMENT_KINDS, Answer, db, User, PasswordReset, Feedback, Submission, Assessment,
+    Invitation, Question, Notification
+)
+from pagination import InvalidCursor, keyset_paginate, wants_cursor
+from bulk_invitations import create_bulk_invitations, parse_expiry_date
+from mailer import enqueue_email, feedback_email, invitation_email
+from grading import grade_submission, regrade_assessment
+from code_runner import validate_test_cases
+from cache import content_cache, etag_response, init_cache, not_modified
+from revocation import RevocationStore
+from passwords import PasswordHasher, PasswordHasherBusy
+from notifications import init_notifications, notify
+from export import FORMATS as EXPORT_FORMATS, export_response
+from candidate_import import ImportFileError, import_candidates, read_rows
+from composition import InvalidBreakdown, breakdowns, cache_key
+from performance import InvalidStatisticsRange
+from listings import (
+    DEFAULT_BREAKDOWNS, assessments_payload, breakdown_rows, composition_payload, interviewee_status_payload,
+    invitations_payload, questions_payload, statistics_payload
+)
+from database import configure_engine, engine_options
+from metrics import init_metrics, metrics_text
+from slow_queries import init_slow_query_log, slow_query_log
+from replicas import LAST_WRITE_HEADER, init_replicas, read_replica, replica_binds, use_primary
+from autosave import AnswerWindowClosed, finish_submission, save_answers, saved_answers, start_submission, submission_deadline
 
 # Flask app setup using Config class
 app = Flask(__name__)
 app.config.from_object(Config)
-bcrypt = Bcrypt(app)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+app.config['SQLALCHEMY_BINDS'] = replica_binds(app.config)
 jwt = JWTManager(app)
 mail = Mail(app)
-CORS(app, resources={r"/*": {"origins": "*"}})
+CORS(app, resources={r"/*": {"origins": "*"}}, expose_headers=[LAST_WRITE_HEADER])
 migrate = Migrate(app, db)
 db.init_app(app)
 api = Api(app)
+init_cache(app)
+init_notifications(app)
+passwords = PasswordHasher.from_config(app.config)
+with app.app_context():
+    configure_engine(db.engine, app.config)
+    replicas = init_replicas(app, db)
+    replica_engines = list(replicas.engines.values()) if replicas else []
+    if app.config['METRICS_ENABLED']:
+        init_metrics(app, db.engine, replica_engines)
+    if app.config['SLOW_QUERY_LOG_ENABLED']:
+        init_slow_query_log(app, db.engine, replica_engines)
 
 # Secret key for JWT
 app.config["JWT_SECRET_KEY"] = "9c87d026e48582dd69dff29dc9ebfbe90a758cc2"
+# Let Flask-RESTful pass errors on to the app's handlers, so JWT errors (missing, expired or revoked
+# tokens) get Flask-JWT-Extended's 401/422 responses instead of a generic 500
+app.config['PROPAGATE_EXCEPTIONS'] = True
 
 # General Error Handlers
 @app.errorhandler(SQLAlchemyError)
@@ -90,7 +127,7 @@ class Signup(Resource):
                 return make_response(jsonify({"message": "Username or email already exists"}), 409)
 
             # Create and save the user
-            hashed_password = generate_password_hash(data['password'], method='pbkdf2:sha256')
+            hashed_password = passwords.hash(data['password'])
             new_user = User(
                 first_name=data['first_name'],
                 last_name=data['last_name'],
@@ -106,6 +143,8 @@ class Signup(Resource):
             db.session.commit()
             return make_response(jsonify({"message": "User registered successfully"}), 201)
 
+        except PasswordHasherBusy as e:
+            return make_response(jsonify({"message": e.description}), e.code)
         except SQLAlchemyError as e:
             db.session.rollback()
             return handle_db_exception(e)
@@ -119,13 +158,13 @@ class Signup(Resource):
 
 api.add_resource(Signup, '/signup')
 
-# Blocklist for Token Revocation
-blocklist = set()
+# Revoked tokens, shared across workers with a local fast path
+revocations = RevocationStore.from_config(app.config)
 
 @jwt.token_in_blocklist_loader
 def check_if_token_in_blocklist(jwt_header, jwt_payload):
     jti = jwt_payload.get("jti")
-    return jti in blocklist
+    return revocations.is_revoked(jti)
 
 # Login Resource
 class Login(Resource):
@@ -139,7 +178,12 @@ class Login(Resource):
                 return make_response(jsonify({"message": "Username and password are required"}), 400)
 
             user = User.query.filter_by(username=username).first()
-            if user and check_password_hash(user.password_hash, password):
+            # Unknown users are verified against a dummy hash so timing does not reveal them
+            if passwords.verify(password, user.password_hash if user else None):
+                if passwords.needs_rehash(user.password_hash):
+                    # Upgrade hashes made with an older scheme or cost while the password is at hand
+                    user.password_hash = passwords.hash(password)
+                    db.session.commit()
                 access_token = create_access_token(identity=user.id, expires_delta=timedelta(hours=2))
                 return make_response(jsonify({
                     "token": access_token,
@@ -149,7 +193,10 @@ class Login(Resource):
 
             return make_response(jsonify({"message": "Invalid credentials"}), 401)
 
+        except PasswordHasherBusy as e:
+            return make_response(jsonify({"message": e.description}), e.code)
         except SQLAlchemyError as e:
+            db.session.rollback()
             return handle_db_exception(e)
         except Exception as e:
             return handle_general_exception(e)
@@ -161,9 +208,11 @@ class Logout(Resource):
     @jwt_required()
     def post(self):
         try:
-            jti = get_jwt().get("jti")
+            token = get_jwt()
+            jti = token.get("jti")
             if jti:
-                blocklist.add(jti)
+                revocations.revoke(jti, datetime.utcfromtimestamp(token["exp"]))
+                db.session.commit()
                 return make_response(jsonify({"message": "Logged out successfully"}), 200)
             else:
                 return make_response(jsonify({"message": "JWT ID (jti) not found in token"}), 400)
@@ -184,7 +233,7 @@ class ForgotPassword(Resource):
             if user:
                 token = ''.join(random.choices(string.ascii_letters + string.digits, k=20))
                 expiration_time = datetime.utcnow() + timedelta(hours=1)
-                reset_token = PasswordReset(user_id=user.id, token=token, expiration=expiration_time)
+                reset_token = PasswordReset(user_id=user.id, token=token, expires_at=expiration_time)
                 db.session.add(reset_token)
                 db.session.commit()
                 return make_response(jsonify({'message': 'Password reset token sent', 'token': token}), 200)
@@ -199,8 +248,8 @@ class ForgotPassword(Resource):
 
 api.add_resource(ForgotPassword, '/forgot-password')
 
-# Password Reset Resource
-class PasswordReset(Resource):
+# Password Reset Resource; also redeems the invite codes sent to imported candidates
+class ResetPassword(Resource):
     def post(self, token):
         parser = reqparse.RequestParser()
         parser.add_argument('new_pass', required=True, help="New password is required.")
@@ -208,22 +257,24 @@ class PasswordReset(Resource):
 
         try:
             reset_token = PasswordReset.query.filter_by(token=token).first()
-            if reset_token and reset_token.expiration > datetime.utcnow():
+            if reset_token and reset_token.expires_at > datetime.utcnow():
                 user = User.query.filter_by(id=reset_token.user_id).first()
-                user.password_hash = generate_password_hash(data['new_pass'], method='pbkdf2:sha256')
+                user.password_hash = passwords.hash(data['new_pass'])
                 db.session.delete(reset_token)
                 db.session.commit()
                 return make_response(jsonify({'message': 'Password reset successfully'}), 200)
 
             return make_response(jsonify({'message': 'Token is invalid or has expired'}), 400)
 
+        except PasswordHasherBusy as e:
+            return make_response(jsonify({"message": e.description}), e.code)
         except SQLAlchemyError as e:
             db.session.rollback()
             return handle_db_exception(e)
         except Exception as e:
             return handle_general_exception(e)
 
-api.add_resource(PasswordReset, '/reset-password/<string:token>')
+api.add_resource(ResetPassword, '/reset-password/<string:token>')
 
 ## Data Parsers for Validation
 assessment_parser = reqparse.RequestParser()
@@ -232,17 +283,20 @@ assessment_parser.add_argument('recruiter_id', required=True, type=int, help="Re
 assessment_parser.add_argument('time_limit', required=True, type=int, help="Time limit is required")
 assessment_parser.add_argument('description', required=False)
 assessment_parser.add_argument('is_published', required=False, type=bool)
+assessment_parser.add_argument('kind', required=False, default='real', choices=ASSESSMENT_KINDS)
 
 # Assessment Routes with JWT and Pagination
 class AssessmentList(Resource):
     @jwt_required()
+    @read_replica
     def get(self):
         try:
-            page = request.args.get('page', 1, type=int)
-            per_page = request.args.get('per_page', 10, type=int)
-            assessments = Assessment.query.paginate(page=page, per_page=per_page)
             # Return paginated assessments with HTTP 200 (OK)
-            return make_response(jsonify([assessment.to_dict() for assessment in assessments.items]), 200)
+            return make_response(jsonify(assessments_payload(db.session, request.args)), 200)
+        except InvalidCursor as e:
+            return make_response(jsonify({"message": e.description}), 400)
+        except HTTPException:
+            raise
         except Exception as e:
             # Return Internal Server Error 500
             return handle_general_exception(e)
@@ -251,12 +305,15 @@ class AssessmentList(Resource):
     def post(self):
         try:
             args = request.get_json()
+            if args.get('kind', 'real') not in ASSESSMENT_KINDS:
+                return make_response(jsonify({"message": f"Kind must be one of {', '.join(ASSESSMENT_KINDS)}"}), 400)
             new_assessment = Assessment(
                 title=args['title'],
                 description=args.get('description', ""),
                 recruiter_id=args['recruiter_id'],
                 time_limit=args['time_limit'],
-                is_published=args.get('is_published', False)
+                is_published=args.get('is_published', False),
+                kind=args.get('kind', 'real')
             )
             db.session.add(new_assessment)
             db.session.commit()
@@ -271,10 +328,16 @@ class AssessmentDetail(Resource):
     @jwt_required()
     def get(self, id):
         try:
+            cache = content_cache()
+            version = cache.assessment_version(id)
             # Return 404 (Not Found) if no assessment exists
-            assessment = Assessment.query.get_or_404(id)
-            # Return assessment with HTTP 200 (OK)
-            return make_response(jsonify(assessment.to_dict()), 200)
+            if version is None:
+                return make_response(jsonify({"message": "Assessment not found"}), 404)
+            etag = cache.etag("assessment", id, version)
+            if request.if_none_match.contains(etag):
+                return not_modified(etag)
+            # Return assessment with HTTP 200 (OK), serialized once per version
+            return etag_response(cache.get_or_build(etag, lambda: Assessment.query.get_or_404(id).to_dict()), etag)
         except Exception as e:
             # Return 500 (Internal Server Error)
             return handle_general_exception(e)
@@ -286,9 +349,14 @@ class AssessmentDetail(Resource):
             assessment.title = args.get('title', assessment.title)
             assessment.description = args.get('description', assessment.description)
             assessment.is_published = args.get('is_published', assessment.is_published)
+            if args.get('kind', assessment.kind) not in ASSESSMENT_KINDS:
+                return make_response(jsonify({"message": f"Kind must be one of {', '.join(ASSESSMENT_KINDS)}"}), 400)
+            assessment.kind = args.get('kind', assessment.kind)
+            content_cache().bump(id)
             db.session.commit()
+            content_cache().published(id)
             # Return updated assessment with HTTP 200 (OK)
-            return jsonify(assessment.to_dict()), 200
+            return make_response(jsonify(assessment.to_dict()), 200)
         except SQLAlchemyError as e:
             db.session.rollback()
             # Return 500 (Internal Server Error)
@@ -297,16 +365,52 @@ class AssessmentDetail(Resource):
     def delete(self, id):
         try:
             assessment = Assessment.query.get_or_404(id)
+            content_cache().bump(id)
             db.session.delete(assessment)
             db.session.commit()
+            content_cache().published(id)
             # Successfully deleted with HTTP 204 (No Content)
             return make_response(jsonify({"message": "Assessment deleted"}), 204)
         except SQLAlchemyError as e:
             db.session.rollback()
             # Return 500 (Internal Server Error)
             return handle_db_exception(e)
+class AssessmentRegrade(Resource):
+    @jwt_required()
+    def post(self, id):
+        """Regrade all submissions of an assessment against its current answer key."""
+        user = User.query.get(get_jwt()["sub"])
+        if not user or user.role != "recruiter":
+            return make_response(jsonify({"message": "Only recruiters can regrade assessments."}), 403)
+        assessment = Assessment.query.get_or_404(id)
+        if assessment.recruiter_id != user.id:
+            return make_response(jsonify({"message": "Only the assessment's recruiter can regrade it."}), 403)
+        try:
+            regraded = regrade_assessment(id)
+            return make_response(jsonify({
+                "message": "Assessment regraded successfully.",
+                "data": {"assessment_id": id, "regraded": regraded}
+            }), 200)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            return handle_db_exception(e)
+
+class AssessmentExport(Resource):
+    @jwt_required()
+    def get(self, id):
+        """Download every submission of an assessment with its answers, feedback and candidate as CSV or NDJSON."""
+        export_format = request.args.get('format', 'csv').lower()
+        if export_format not in EXPORT_FORMATS:
+            return make_response(jsonify({"message": f"Unsupported format '{export_format}'; use csv or ndjson."}), 400)
+        assessment = Assessment.query.get_or_404(id)
+        if assessment.recruiter_id != get_jwt()["sub"]:
+            return make_response(jsonify({"message": "Only the assessment's recruiter can export its results."}), 403)
+        return export_response(id, export_format)
+
 api.add_resource(AssessmentList, '/assessments')
 api.add_resource(AssessmentDetail, '/assessments/<int:id>')
+api.add_resource(AssessmentRegrade, '/assessments/<int:id>/regrade')
+api.add_resource(AssessmentExport, '/assessments/<int:id>/export')
 
 # Data Parser for Single or Bulk Invitations
 invitation_parser = reqparse.RequestParser()
@@ -321,13 +425,10 @@ class InvitationList(Resource):
     @jwt_required()
     def get(self):
         """Get invitations for a recruiter with pagination."""
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
-        invitations = Invitation.query.paginate(page=page, per_page=per_page)
-        return make_response(jsonify({
-            "message": "Invitations retrieved successfully.",
-            "data": [invitation.to_dict() for invitation in invitations.items]
-        }), 200)
+        try:
+            return make_response(jsonify(invitations_payload(db.session, request.args)), 200)
+        except InvalidCursor as e:
+            return make_response(jsonify({"message": e.description}), 400)
     @jwt_required()
     def post(self):
         """Create single or bulk invitations."""
@@ -339,6 +440,14 @@ class InvitationList(Resource):
         expiry_date = args.get('expiry_date')
         invitations = []
         if interviewee_id:
+            assessment = Assessment.query.get_or_404(assessment_id)
+            interviewee = User.query.get_or_404(interviewee_id)
+            if Invitation.query.filter_by(assessment_id=assessment_id, interviewee_id=interviewee_id).first():
+                return make_response(jsonify({"message": "Interviewee is already invited to this assessment."}), 409)
+            try:
+                expiry_date = parse_expiry_date(expiry_date)
+            except ValueError as e:
+                return make_response(jsonify({"message": "Invalid invitation data.", "error": str(e)}), 400)
             new_invitation = Invitation(
                 assessment_id=assessment_id,
                 interviewee_id=interviewee_id,
@@ -347,16 +456,26 @@ class InvitationList(Resource):
             )
             db.session.add(new_invitation)
             invitations.append(new_invitation)
+            # Delivered by the outbox worker, not in the request thread
+            enqueue_email(*invitation_email(interviewee.email, assessment.title, expiry_date))
+            notify(interviewee_id, f"You have been invited to take the assessment '{assessment.title}'.")
         elif interviewee_ids:
-            for id in interviewee_ids:
-                new_invitation = Invitation(
-                    assessment_id=assessment_id,
-                    interviewee_id=id,
-                    status=status,
-                    expiry_date=expiry_date
+            assessment = Assessment.query.get_or_404(assessment_id)
+            # Bulk path: validated, deduplicated, batched inserts with a compact summary
+            try:
+                summary = create_bulk_invitations(
+                    assessment, interviewee_ids, status=status, expiry_date=expiry_date,
+                    batch_size=app.config['INVITATION_BATCH_SIZE']
                 )
-                db.session.add(new_invitation)
-                invitations.append(new_invitation)
+            except ValueError as e:
+                return make_response(jsonify({"message": "Invalid invitation data.", "error": str(e)}), 400)
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                return handle_db_exception(e)
+            return make_response(jsonify({
+                "message": "Invitations created successfully.",
+                "data": summary
+            }), 201)
         db.session.commit()
         return make_response(jsonify({
             "message": "Invitations created successfully.",
@@ -370,48 +489,90 @@ question_parser.add_argument('type', required=True, help="Type is required")
 question_parser.add_argument('text', required=True, help="Text is required")
 question_parser.add_argument('choices', required=False, type=dict)
 question_parser.add_argument('correct_answer', required=False)
+question_parser.add_argument('test_cases', required=False, type=dict, location='json')
 
 # Question Routes with JWT
 class QuestionList(Resource):
     @jwt_required()
+    @read_replica
     def get(self, assessment_id):
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
-        questions = Question.query.filter_by(assessment_id=assessment_id).paginate(page=page, per_page=per_page)
-        return make_response(jsonify([question.to_dict() for question in questions.items]), 200)
+        cache = content_cache()
+        version = cache.assessment_version(assessment_id)
+        try:
+            def build():
+                # The version may have come from the shared cache, set from the primary; a replica that
+                # is behind would store its older questions under that version for CACHE_PAYLOAD_TTL
+                with use_primary(db.session) as session:
+                    return questions_payload(session, request.args, assessment_id)
+            if version is None:
+                return make_response(jsonify(build()), 200)
+            # Each page/cursor of each assessment version is serialized once
+            etag = cache.etag("questions", assessment_id, version, request.args)
+            if request.if_none_match.contains(etag):
+                return not_modified(etag)
+            return etag_response(cache.get_or_build(etag, build), etag)
+        except InvalidCursor as e:
+            return make_response(jsonify({"message": e.description}), 400)
     @jwt_required()
     def post(self, assessment_id):
         args = question_parser.parse_args()
+        if args.get('test_cases') is not None:
+            try:
+                validate_test_cases(args['test_cases'])
+            except ValueError as e:
+                return make_response(jsonify({"message": str(e)}), 400)
         new_question = Question(
             assessment_id=assessment_id,
             type=args['type'],
             text=args['text'],
             choices=json.dumps(args.get('choices')),
-            correct_answer=args.get('correct_answer')
+            correct_answer=args.get('correct_answer'),
+            test_cases=args.get('test_cases')
         )
         db.session.add(new_question)
+        content_cache().bump(assessment_id)
         db.session.commit()
+        content_cache().published(assessment_id)
         return make_response(jsonify(new_question.to_dict()), 201)
 api.add_resource(QuestionList, '/questions/<int:assessment_id>')
 
 class IntervieweeList(Resource):
     @jwt_required()
+    @read_replica
     def get(self):
         """Fetch all interviewees."""
         try:
+            if wants_cursor(request.args):
+                interviewees, pagination = keyset_paginate(User.query.filter_by(role='interviewee'), User, request.args)
+                average_scores = User.average_scores(interviewee.id for interviewee in interviewees)
+                return make_response(jsonify({
+                    "message": "Interviewees retrieved successfully.",
+                    "data": [
+                        interviewee.to_dict(average_score=average_scores.get(interviewee.id, 0))
+                        for interviewee in interviewees
+                    ],
+                    "pagination": pagination
+                }), 200)
             page = request.args.get('page', 1, type=int)
             per_page = request.args.get('per_page', 10, type=int)
             # Fetch interviewees from the database
             interviewees = User.query.filter_by(role='interviewee').paginate(page=page, per_page=per_page)
+            # One grouped query for the whole page instead of one per interviewee
+            average_scores = User.average_scores(interviewee.id for interviewee in interviewees.items)
             return make_response(jsonify({
                 "message": "Interviewees retrieved successfully.",
-                "data": [interviewee.to_dict() for interviewee in interviewees.items],
+                "data": [
+                    interviewee.to_dict(average_score=average_scores.get(interviewee.id, 0))
+                    for interviewee in interviewees.items
+                ],
                 "pagination": {
                     "page": page,
                     "per_page": per_page,
                     "total": interviewees.total
                 }
             }), 200)
+        except InvalidCursor as e:
+            return make_response(jsonify({"message": e.description}), 400)
         except Exception as e:
             return make_response(jsonify({
                 "message": "Failed to fetch interviewees.",
@@ -419,15 +580,50 @@ class IntervieweeList(Resource):
             }), 500)
 api.add_resource(IntervieweeList, '/recruiter/interviewees')
 
+class IntervieweeImport(Resource):
+    @jwt_required()
+    def post(self):
+        """
+        Create interviewees from an uploaded CSV or XLSX file (multipart field 'file'). Progress is
+        streamed back as newline-delimited JSON: an 'error' line per rejected row, a 'progress' line
+        per batch and a final 'done' line with the totals.
+        """
+        user = User.query.get(get_jwt()["sub"])
+        if not user or user.role != "recruiter":
+            return make_response(jsonify({"message": "Only recruiters can import candidates."}), 403)
+        upload = request.files.get('file')
+        if upload is None or not upload.filename:
+            return make_response(jsonify({"message": "A CSV or XLSX file is required in the 'file' field."}), 400)
+        try:
+            rows = read_rows(upload.stream, upload.filename)
+        except ImportFileError as e:
+            return make_response(jsonify({"message": str(e)}), 400)
+        batch_size = min(max(request.args.get('batch_size', 1000, type=int), 1), 5000)
+        events = import_candidates(rows, passwords, batch_size=batch_size, invite_hours=app.config['IMPORT_INVITE_HOURS'])
+
+        def lines():
+            try:
+                for event in events:
+                    yield json.dumps(event) + "\n"
+            except (ImportFileError, SQLAlchemyError) as e:
+                db.session.rollback()
+                yield json.dumps({"event": "failed", "message": str(e)}) + "\n"
+        return Response(stream_with_context(lines()), mimetype='application/x-ndjson')
+api.add_resource(IntervieweeImport, '/recruiter/interviewees/import')
+
 class AssessmentInterviewees(Resource):
     @jwt_required()
     def get(self, assessment_id):
         """Fetch interviewees invited to a specific assessment."""
         try:
             # Fetch accepted invitations for the assessment
-            invitations = Invitation.query.filter_by(assessment_id=assessment_id, status='accepted').all()
-            # Extract interviewee details
-            interviewees = [invitation.interviewee.to_dict() for invitation in invitations]
+            invitations = Invitation.with_interviewee().filter_by(assessment_id=assessment_id, status='accepted').all()
+            # Extract interviewee details, with averages fetched in one query for all of them
+            average_scores = User.average_scores(invitation.interviewee_id for invitation in invitations)
+            interviewees = [
+                invitation.interviewee.to_dict(average_score=average_scores.get(invitation.interviewee_id, 0))
+                for invitation in invitations
+            ]
             return make_response(jsonify({
                 "message": f"Interviewees for assessment {assessment_id} retrieved successfully.",
                 "data": interviewees
@@ -470,6 +666,9 @@ class FeedbackResource(Resource):
             score=data.get("score")
         )
         db.session.add(feedback)
+        submission = Submission.query.get_or_404(submission_id)
+        enqueue_email(*feedback_email(submission.interviewee.email, submission.assessment.title))
+        notify(submission.interviewee_id, f"A recruiter has left feedback on your submission for '{submission.assessment.title}'.")
         try:
             db.session.commit()
             return make_response(jsonify({
@@ -485,9 +684,22 @@ class IntervieweeAssessments(Resource):
     @jwt_required()
     def get(self):
         interviewee_id = get_jwt()["sub"]
+        if wants_cursor(request.args):
+            try:
+                invitations, pagination = keyset_paginate(
+                    Invitation.with_assessment().filter_by(interviewee_id=interviewee_id, status="accepted"),
+                    Invitation, request.args
+                )
+            except InvalidCursor as e:
+                return make_response(jsonify({"message": e.description}), 400)
+            return make_response(jsonify({
+                "message": "Assessments retrieved successfully.",
+                "data": [invitation.assessment.to_dict() for invitation in invitations],
+                "pagination": pagination
+            }), 200)
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
-        invitations = Invitation.query.filter_by(interviewee_id=interviewee_id, status="accepted").paginate(page=page, per_page=per_page)
+        invitations = Invitation.with_assessment().filter_by(interviewee_id=interviewee_id, status="accepted").paginate(page=page, per_page=per_page)
         assessments = [invitation.assessment.to_dict() for invitation in invitations.items]
         return make_response(jsonify({
             "message": "Assessments retrieved successfully.",
@@ -501,7 +713,10 @@ class AcceptInvitation(Resource):
         """Accept an invitation."""
         invitation = Invitation.query.filter_by(id=invitation_id, status="pending").first_or_404()
         if invitation.expiry_date and invitation.expiry_date < datetime.utcnow():
-            return jsonify({"message": "This invitation has expired."}), 400
+            # The expiry scheduler may not have reached it yet
+            invitation.status = "expired"
+            db.session.commit()
+            return make_response(jsonify({"message": "This invitation has expired."}), 400)
         invitation.status = "accepted"
         db.session.commit()
         return make_response(jsonify({"message": "Invitation accepted successfully."}), 200)
@@ -523,10 +738,87 @@ class TrialAssessment(Resource):
         }), 200)
 api.add_resource(TrialAssessment, '/interviewee/trial-assessment')
 
+class StartAssessment(Resource):
+    @jwt_required()
+    def post(self, assessment_id):
+        """Start, or resume after a crash, an in-progress submission that answers are autosaved into."""
+        interviewee_id = get_jwt()["sub"]
+        assessment = Assessment.query.get_or_404(assessment_id)
+        try:
+            submission, created = start_submission(assessment_id, interviewee_id)
+            db.session.commit()
+            deadline = submission_deadline(submission, assessment.time_limit)
+            return make_response(jsonify({
+                "message": "Assessment started successfully." if created else "Assessment resumed.",
+                "data": {
+                    "submission": submission.to_dict(),
+                    "deadline": deadline.isoformat() if deadline else None,
+                    "answers": saved_answers(submission.id)
+                }
+            }), 201 if created else 200)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            return make_response(jsonify({"message": "Database error occurred.", "error": str(e)}), 500)
+api.add_resource(StartAssessment, '/interviewee/assessments/<int:assessment_id>/start')
+
+class SubmissionAnswers(Resource):
+    @jwt_required()
+    def patch(self, submission_id):
+        """Autosave a small batch of answers; each is upserted per (submission, question)."""
+        submission = Submission.query.get_or_404(submission_id)
+        if submission.interviewee_id != get_jwt()["sub"]:
+            return make_response(jsonify({"message": "You are not authorized to edit this submission."}), 403)
+        data = request.get_json(silent=True) or {}
+        try:
+            saved = save_answers(submission, data.get("answers", []), app.config['SUBMISSION_GRACE_SECONDS'])
+            db.session.commit()
+            return make_response(jsonify({"message": "Answers saved.", "data": {"saved": saved}}), 200)
+        except ValueError as e:
+            return make_response(jsonify({"message": str(e)}), 400)
+        except AnswerWindowClosed as e:
+            return make_response(jsonify({"message": str(e)}), 409)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            return make_response(jsonify({"message": "Database error occurred.", "error": str(e)}), 500)
+api.add_resource(SubmissionAnswers, '/interviewee/submissions/<int:submission_id>/answers')
+
+class FinishSubmission(Resource):
+    @jwt_required()
+    def post(self, submission_id):
+        """Submit an in-progress submission; its answers were already autosaved, so this only flips the status."""
+        submission = Submission.query.get_or_404(submission_id)
+        if submission.interviewee_id != get_jwt()["sub"]:
+            return make_response(jsonify({"message": "You are not authorized to submit this submission."}), 403)
+        if submission.status != 'in_progress':
+            return make_response(jsonify({"message": "This submission has already been submitted."}), 409)
+        data = request.get_json(silent=True) or {}
+        try:
+            # Answers changed since the last autosave may be sent along
+            save_answers(submission, data.get("answers", []), app.config['SUBMISSION_GRACE_SECONDS'])
+            finish_submission(submission)
+            db.session.commit()
+            return make_response(jsonify({
+                "message": "Assessment submitted successfully.",
+                "data": submission.to_dict()
+            }), 200)
+        except ValueError as e:
+            db.session.rollback()
+            return make_response(jsonify({"message": str(e)}), 400)
+        except AnswerWindowClosed as e:
+            db.session.rollback()
+            return make_response(jsonify({"message": str(e)}), 409)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            return make_response(jsonify({"message": "Database error occurred.", "error": str(e)}), 500)
+api.add_resource(FinishSubmission, '/interviewee/submissions/<int:submission_id>/submit')
+
 class SubmitAssessment(Resource):
     @jwt_required()
     def post(self, assessment_id):
-        """Submit an assessment by an interviewee."""
+        """
+        Submit an assessment by an interviewee in one request. Answers are saved into the open
+        in-progress submission if the candidate started one, otherwise a submission is created.
+        """
         try:
             interviewee_id = get_jwt()["sub"]
             data = request.get_json()
@@ -536,32 +828,25 @@ class SubmitAssessment(Resource):
                     "message": "Invalid input. 'answers' field is required."
                 }), 400)
 
-            # Create a new submission
-            submission = Submission(
-                assessment_id=assessment_id,
-                interviewee_id=interviewee_id,
-                status="submitted",
-                submitted_at=datetime.utcnow()
-            )
-            db.session.add(submission)
-
-            # Add answers to the submission
-            for answer in data.get("answers", []):
-                if "question_id" not in answer or "answer_text" not in answer:
-                    return make_response(jsonify({
-                        "message": "Each answer must include 'question_id' and 'answer_text'."
-                    }), 400)
-                db.session.add(Answer(
-                    submission_id=submission.id,
-                    question_id=answer["question_id"],
-                    answer_text=answer["answer_text"]
-                ))
+            Assessment.query.get_or_404(assessment_id)
+            submission, _ = start_submission(assessment_id, interviewee_id)
+            save_answers(submission, data.get("answers", []), app.config['SUBMISSION_GRACE_SECONDS'])
+            # Auto-grade multiple-choice answers; fully multiple-choice assessments end up graded
+            finish_submission(submission)
             # Commit the transaction
             db.session.commit()
             return make_response(jsonify({
                 "message": "Assessment submitted successfully.",
                 "data": submission.to_dict()
             }), 201)
+        except ValueError as e:
+            db.session.rollback()
+            return make_response(jsonify({"message": str(e)}), 400)
+        except AnswerWindowClosed as e:
+            db.session.rollback()
+            return make_response(jsonify({"message": str(e)}), 409)
+        except HTTPException:
+            raise
         except SQLAlchemyError as e:
             db.session.rollback()
             return make_response(jsonify({
@@ -575,27 +860,59 @@ class SubmitAssessment(Resource):
             }), 500)
 api.add_resource(SubmitAssessment, '/interviewee/assessments/<int:assessment_id>/submit')
 
+# Notification Routes; the stream pushes new notifications and unread counts instead of polling
+class NotificationList(Resource):
+    @jwt_required()
+    def get(self):
+        """Get the current user's notifications, newest first."""
+        user_id = get_jwt()["sub"]
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 10, type=int)
+        notifications = Notification.query.filter_by(user_id=user_id).order_by(
+            Notification.created_at.desc(), Notification.id.desc()
+        ).paginate(page=page, per_page=per_page)
+        return make_response(jsonify([notification.to_dict() for notification in notifications.items]), 200)
+
+class NotificationDetail(Resource):
+    @jwt_required()
+    def patch(self, notification_id):
+        """Mark a notification as read or unread; open streams receive the new unread count."""
+        notification = Notification.query.filter_by(id=notification_id, user_id=get_jwt()["sub"]).first_or_404()
+        data = request.get_json() or {}
+        notification.is_read = bool(data.get('is_read', True))
+        try:
+            db.session.commit()
+            return make_response(jsonify(notification.to_dict()), 200)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            return make_response(jsonify({"message": "Database error occurred.", "error": str(e)}), 500)
+
+class NotificationStream(Resource):
+    # EventSource cannot set headers, so the token may also be passed as ?jwt=<token>
+    @jwt_required(locations=['headers', 'query_string'])
+    def get(self):
+        """
+        The stream is served natively by the ASGI app (SERVER_MODE=async, see asgi.py). A sync worker
+        would be held for as long as the stream stays open, so this route only says so.
+        """
+        return make_response(jsonify({
+            "message": "The notification stream requires SERVER_MODE=async; poll /notifications instead."
+        }), 501)
+
+api.add_resource(NotificationList, '/notifications')
+api.add_resource(NotificationDetail, '/notifications/<int:notification_id>')
+api.add_resource(NotificationStream, '/notifications/stream')
+
 # API for Interviewee Status
 class IntervieweeStatus(Resource):
     @jwt_required()
+    @read_replica
     def get(self):
         """
         Fetch interviewee status, including average score and qualification status.
         """
         try:
-            # Query all users with role = 'interviewee'
-            interviewees = User.query.filter_by(role='interviewee').all()
-            # Serialize interviewee data with custom formatting
-            interviewee_status = [
-                {
-                    "id": interviewee.id,
-                    "name": f"{interviewee.first_name} {interviewee.last_name}",
-                    "average_score": interviewee.average_score(),
-                    "status": "Qualified" if interviewee.average_score() >= 50 else "Not Qualified"
-                }
-                for interviewee in interviewees
-            ]
-            return make_response(jsonify(interviewee_status), 200)
+            return make_response(jsonify(interviewee_status_payload(db.session)), 200)
         except Exception as e:
             return make_response(jsonify({"message": "Failed to fetch interviewee status", "error": str(e)}), 500)
 api.add_resource(IntervieweeStatus, '/interviewee/status')
@@ -603,12 +920,25 @@ api.add_resource(IntervieweeStatus, '/interviewee/status')
 # API for Interviewee Composition
 class IntervieweeComposition(Resource):
     @jwt_required()
+    @read_replica
     def get(self):
-        """Fetch interviewee composition based on gender."""
+        """
+        Interviewee counts per gender, or for each ?by= breakdown (see composition.py) in a single
+        response. Each breakdown is one GROUP BY query, cached for COMPOSITION_CACHE_TTL seconds.
+        """
         try:
-            male_count = User.query.filter_by(role='interviewee', gender='male').count()
-            female_count = User.query.filter_by(role='interviewee', gender='female').count()
-            return make_response(jsonify({"male": male_count, "female": female_count}), 200)
+            requested = breakdowns(request.args)
+            cache = content_cache().backend
+            rows = []
+            for dimensions in requested or DEFAULT_BREAKDOWNS:
+                breakdown = cache.get(cache_key(dimensions))
+                if breakdown is None:
+                    breakdown = breakdown_rows(db.session, dimensions)
+                    cache.set(cache_key(dimensions), breakdown, app.config['COMPOSITION_CACHE_TTL'])
+                rows.append(breakdown)
+            return make_response(jsonify(composition_payload(requested, rows)), 200)
+        except InvalidBreakdown as e:
+            return make_response(jsonify({"message": e.description}), 400)
         except Exception as e:
             return make_response(jsonify({"message": "Failed to fetch interviewee composition", "error": str(e)}), 500)
 api.add_resource(IntervieweeComposition, '/interviewee/composition')
@@ -616,26 +946,44 @@ api.add_resource(IntervieweeComposition, '/interviewee/composition')
 # API for Performance Statistics
 class PerformanceStatistics(Resource):
     @jwt_required()
+    @read_replica
     def get(self):
-        """Fetch monthly performance statistics for assessments."""
+        """
+        Performance statistics per month (or ?period=day) for trial and real assessments, optionally
+        limited to ?from=YYYY-MM-DD and ?to=YYYY-MM-DD, read from the assessment_daily_stats rollup.
+        """
         try:
-            # Query for trial and real assessments' monthly data
-            monthly_stats = (
-                db.session.query(
-                    extract('month', Submission.submitted_at).label('month'),
-                    func.sum(Submission.score).filter(Assessment.title.ilike('%trial%')).label('trial'),
-                    func.sum(Submission.score).filter(Assessment.title.ilike('%real%')).label('real')
-                )
-                .join(Assessment, Submission.assessment_id == Assessment.id)
-                .group_by('month')
-                .all()
-            )
-            # Serialize results
-            stats = [{"month": month, "trial": trial or 0, "real": real or 0} for month, trial, real in monthly_stats]
-            return make_response(jsonify({"monthly": stats}), 200)
+            return make_response(jsonify(statistics_payload(db.session, request.args)), 200)
+        except InvalidStatisticsRange as e:
+            return make_response(jsonify({"message": e.description}), 400)
         except Exception as e:
             return make_response(jsonify({"message": "Failed to fetch performance statistics", "error": str(e)}), 500)
 api.add_resource(PerformanceStatistics, '/performance/statistics')
 
+# Prometheus scrape endpoint; per-resource latency, SQL and pool metrics of this worker
+class PrometheusMetrics(Resource):
+    def get(self):
+        if 'metrics' not in app.extensions:
+            return make_response(jsonify({"message": "Metrics are disabled."}), 404)
+        return Response(metrics_text(), mimetype='text/plain; version=0.0.4')
+api.add_resource(PrometheusMetrics, '/metrics')
+
+class SlowQueries(Resource):
+    @jwt_required()
+    def get(self):
+        """This worker's slow statements aggregated by fingerprint, slowest in total first, with the latest ones."""
+        user = User.query.get(get_jwt()["sub"])
+        if not user or user.role != "recruiter":
+            return make_response(jsonify({"message": "Only recruiters can view slow queries."}), 403)
+        if 'slow_queries' not in app.extensions:
+            return make_response(jsonify({"message": "The slow query log is disabled."}), 404)
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+        recent = min(max(request.args.get('recent', 20, type=int), 0), 500)
+        return make_response(jsonify({
+            "message": "Slow queries retrieved successfully.",
+            "data": slow_query_log().summary(limit=limit, recent=recent)
+        }), 200)
+api.add_resource(SlowQueries, '/admin/slow-queries')
+
 if __name__ == '__main__':
     app.run(port=5555, host="0.0.0.0", debug=True)
\ No newline at end of file
@@ -0,0 +1,462 @@
+import asyncio
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+from urllib.parse import parse_qsl
+from flask_jwt_extended import decode_token  # type: ignore
+from flask_jwt_extended.exceptions import JWTExtendedException  # type: ignore
+from jwt import ExpiredSignatureError, InvalidTokenError  # type: ignore
+from sqlalchemy import select  # type: ignore
+from sqlalchemy.engine import make_url  # type: ignore
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # type: ignore
+from werkzeug.datastructures import Headers, MultiDict  # type: ignore
+from werkzeug.exceptions import HTTPException  # type: ignore
+from werkzeug.http import parse_cookie, parse_etags  # type: ignore
+from app import app, revocations
+from cache import LRUCache, content_cache
+from models import Assessment, Notification
+from notifications import SSE_HEADERS, AsyncSubscription, format_event
+from composition import breakdowns, cache_key
+from database import configure_engine, engine_options
+from replicas import pinned_to_primary
+from listings import (
+    DEFAULT_BREAKDOWNS, assessments_payload, breakdown_rows, composition_payload, interviewee_status_payload,
+    invitations_payload, questions_payload, statistics_payload
+)
+
+# Async drivers used when ASYNC_DATABASE_URI is not set explicitly
+ASYNC_DRIVERS = {'postgresql': 'postgresql+asyncpg', 'sqlite': 'sqlite+aiosqlite'}
+
+def async_database_uri(config):
+    """ASYNC_DATABASE_URI, or SQLALCHEMY_DATABASE_URI switched to the backend's async driver."""
+    if config.get('ASYNC_DATABASE_URI'):
+        return config['ASYNC_DATABASE_URI']
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+class Request:
+    """The parts of an ASGI HTTP scope the async handlers need, with Flask-compatible args."""
+
+    def __init__(self, scope):
+        self.path = scope['path']
+        self.headers = Headers([(key.decode('latin-1'), value.decode('latin-1')) for key, value in scope['headers']])
+        self.args = MultiDict(parse_qsl(scope['query_string'].decode('latin-1'), keep_blank_values=True))
+        self.if_none_match = parse_etags(self.headers.get('If-None-Match'))
+        self.cookies = parse_cookie(self.headers.get('Cookie'))
+
+def json_response(payload, status=200, headers=()):
+    body = app.json.dumps(payload, separators=(",", ":")) + "\n"
+    return status, body.encode('utf-8'), [('Content-Type', 'application/json'), *headers]
+
+def cache_headers(etag):
+    """Same validators as cache.etag_response: clients must revalidate with If-None-Match."""
+    return [('ETag', f'"{etag}"'), ('Cache-Control', 'private, no-cache')]
+
+ROUTES = []
+
+def route(pattern, query_token=False, replica=False):
+    """
+    Register an async handler for GET requests whose path matches pattern. With query_token the
+    JWT may also be passed as ?jwt=<token>, for clients such as EventSource that cannot set headers.
+    With replica the handler reads from a replica, like the @read_replica Flask resources.
+    """
+    def register(handler):
+        handler.query_token = query_token
+        handler.replica = replica
+        ROUTES.append((re.compile(f"^{pattern}$"), handler))
+        return handler
+    return register
+
+class WsgiFallback:
+    """
+    WSGI adapter running the Flask app on a shared bounded thread pool (asgiref's WsgiToAsgi runs
+    every WSGI request on one thread per process). The request body is spooled before the app is
+    called; the response is streamed to the client chunk by chunk as the app yields it.
+    """
+
+    def __init__(self, wsgi_app, executor):
+        self.wsgi_app = wsgi_app
+        self.executor = executor
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            raise ValueError(f"WSGI fallback cannot handle {scope['type']} connections")
+        body = SpooledTemporaryFile(max_size=65536)
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return
+            body.write(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+        body.seek(0)
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self.executor, self.run, scope, body, send, loop)
+        finally:
+            body.close()
+
+    @staticmethod
+    def environ(scope, body):
+        """The WSGI environ for an ASGI HTTP scope (PEP 3333)."""
+        root_path = scope.get('root_path', '')
+        path = scope['path']
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        server = scope.get('server') or ('localhost', 80)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': root_path.encode('utf-8').decode('latin-1'),
+            'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope['query_string'].decode('ascii'),
+            'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1] or 80),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        if scope.get('client'):
+            environ['REMOTE_ADDR'], environ['REMOTE_PORT'] = scope['client'][0], str(scope['client'][1])
+        for key, value in scope['headers']:
+            name = key.decode('latin-1').upper().replace('-', '_')
+            if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                name = f'HTTP_{name}'
+            value = value.decode('latin-1')
+            environ[name] = f"{environ[name]},{value}" if name in environ else value
+        return environ
+
+    def run(self, scope, body, send, loop):
+        """Call the WSGI app on a pool thread, sending each response message through the event loop."""
+        def send_message(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        response_start = {}
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and response_start.get('sent'):
+                raise exc_info[1].with_traceback(exc_info[2])
+            response_start.update(message={
+                'type': 'http.response.start', 'status': int(status.split(' ', 1)[0]),
+                'headers': [(key.lower().encode('latin-1'), value.encode('latin-1')) for key, value in headers]
+            })
+
+        def send_start():
+            # Deferred to the first chunk, so the app may still replace the status after an error
+            if not response_start.get('sent'):
+                send_message(response_start['message'])
+                response_start['sent'] = True
+
+        response = self.wsgi_app(self.environ(scope, body), start_response)
+        try:
+            for chunk in response:
+                if chunk:
+                    send_start()
+                    send_message({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            send_start()
+            send_message({'type': 'http.response.body', 'body': b''})
+        finally:
+            close = getattr(response, 'close', None)
+            if close:
+                close()
+
+class AsyncAPI:
+    """
+    ASGI application serving the read-heavy endpoints (assessments, questions, invitations and
+    stats) and the notification stream natively on an async SQLAlchemy engine, so slow clients
+    and long polls only cost a coroutine and a pooled connection while a query is running.
+    The listings are built by the same functions as the Flask resources (see listings.py), and the
+    handlers for the @read_replica resources read from the same replicas, through async engines of
+    their own, under the same router and stickiness rules (see replicas.py).
+    Every other route falls through to the Flask app on a bounded thread pool.
+    """
+
+    def __init__(self, flask_app):
+        config = flask_app.config
+        self.flask_app = flask_app
+        self.engine = create_async_engine(async_database_uri(config), **self.engine_options(config))
+        configure_engine(self.engine.sync_engine, config)
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.replicas = flask_app.extensions.get('replicas')
+        self.replica_engines = {}
+        self.replica_sessions = {}
+        for key, replica in (self.replicas.engines.items() if self.replicas else ()):
+            url = replica.url.set(drivername=ASYNC_DRIVERS[replica.url.get_backend_name()])
+            engine = self.replica_engines[key] = create_async_engine(url, **self.engine_options(config, url))
+            configure_engine(engine.sync_engine, config)
+            self.replicas.watch(key, engine.sync_engine)
+            self.replica_sessions[key] = async_sessionmaker(engine, expire_on_commit=False)
+        self.wsgi_executor = ThreadPoolExecutor(
+            max_workers=config.get('ASYNC_WSGI_THREADS', 16), thread_name_prefix="wsgi-fallback"
+        )
+        self.fallback = WsgiFallback(flask_app, self.wsgi_executor)
+        with flask_app.app_context():
+            self.content = content_cache()
+
+    @staticmethod
+    def engine_options(config, uri=None):
+        options = engine_options(config, uri or async_database_uri(config))
+        if 'pool_size' in options:
+            options.update(pool_size=config.get('ASYNC_POOL_SIZE', 10), max_overflow=config.get('ASYNC_MAX_OVERFLOW', 5))
+        return options
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            for pattern, handler in ROUTES:
+                match = pattern.match(scope['path'])
+                if match:
+                    request = Request(scope)
+                    status, body, headers = await self.dispatch(handler, request, match.groupdict())
+                    if 'Origin' in request.headers:
+                        # Same policy as the CORS(app) setup for the Flask routes
+                        headers.append(('Access-Control-Allow-Origin', '*'))
+                    await send({
+                        'type': 'http.response.start', 'status': status,
+                        'headers': [(key.lower().encode('latin-1'), value.encode('latin-1')) for key, value in headers]
+                    })
+                    if isinstance(body, bytes):
+                        await send({'type': 'http.response.body', 'body': body})
+                    else:
+                        await self.stream(body, receive, send)
+                    return
+        await self.fallback(scope, receive, send)
+
+    @staticmethod
+    async def stream(body, receive, send):
+        """Send an async iterator of chunks until it ends or the client disconnects."""
+        async def disconnected():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+
+        watcher = asyncio.ensure_future(disconnected())
+        try:
+            async for chunk in body:
+                if watcher.done():
+                    return
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        finally:
+            watcher.cancel()
+            await body.aclose()
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                if self.replicas is not None:
+                    # The first health check connects to every replica; keep it off the event loop
+                    await asyncio.to_thread(self.replicas.start)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.dispose()
+                self.wsgi_executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def dispose(self):
+        for engine in (self.engine, *self.replica_engines.values()):
+            await engine.dispose()
+
+    async def sessions_for(self, handler, request):
+        """The session factory for a request: a replica's for replica handlers, unless the client has just written."""
+        if not handler.replica or self.replicas is None:
+            return self.sessions
+        if self.replicas.checker is None:
+            await asyncio.to_thread(self.replicas.start)
+        key = self.replicas.choose(pinned_to_primary(request.headers, request.cookies, self.replicas.sticky_seconds))
+        return self.sessions if key is None else self.replica_sessions[key]
+
+    async def dispatch(self, handler, request, params):
+        error = await self.authenticate(request, handler.query_token)
+        if error:
+            return error
+        try:
+            sessions = await self.sessions_for(handler, request)
+            async with sessions() as session:
+                return await handler(self, request, session, **{key: int(value) for key, value in params.items()})
+        except HTTPException as e:
+            # InvalidCursor, InvalidBreakdown, InvalidStatisticsRange, or a page past the end
+            return json_response({"message": e.description}, e.code)
+        except Exception as e:
+            return json_response({"message": "An unexpected error occurred", "error": str(e)}, 500)
+
+    async def authenticate(self, request, query_token=False):
+        """
+        The checks @jwt_required() makes; returns an error response, or None for a valid token.
+        The token's claims are stored on request.claims.
+        """
+        header = request.headers.get('Authorization')
+        if header:
+            scheme, _, token = header.partition(' ')
+            if scheme != 'Bearer' or not token:
+                return json_response({"msg": "Bad Authorization header. Expected 'Authorization: Bearer <JWT>'"}, 422)
+        elif query_token and request.args.get('jwt'):
+            token = request.args['jwt']
+        else:
+            return json_response({"msg": "Missing Authorization Header"}, 401)
+        try:
+            with self.flask_app.app_context():
+                claims = decode_token(token)
+        except ExpiredSignatureError:
+            return json_response({"msg": "Token has expired"}, 401)
+        except (InvalidTokenError, JWTExtendedException) as e:
+            return json_response({"msg": str(e)}, 422)
+        if claims.get('type') != 'access':
+            return json_response({"msg": "Only non-refresh tokens are allowed"}, 422)
+
+        revoked = revocations.is_revoked_locally(claims['jti'])
+        if revoked is None:
+            # Filter sync or Bloom hit: the store needs the database, so check on a worker thread
+            revoked = await asyncio.to_thread(self.check_revoked, claims['jti'])
+        if revoked:
+            return json_response({"msg": "Token has been revoked"}, 401)
+        request.claims = claims
+        return None
+
+    def check_revoked(self, jti):
+        with self.flask_app.app_context():
+            return revocations.is_revoked(jti)
+
+    # Content cache: the in-process LRU never blocks, a Redis round trip is moved off the event loop
+
+    async def cache_call(self, function, *args):
+        if isinstance(self.content.backend, LRUCache):
+            return function(*args)
+        return await asyncio.to_thread(function, *args)
+
+    async def assessment_version(self, session, assessment_id):
+        key = self.content.version_key(assessment_id)
+        version = await self.cache_call(self.content.backend.get, key)
+        if version is None:
+            version = await session.scalar(select(Assessment.version).where(Assessment.id == assessment_id))
+            if version is None:
+                return None
+            await self.cache_call(self.content.backend.set, key, version, self.content.version_ttl)
+        return version
+
+    async def get_or_build(self, etag, build):
+        key = self.content.payload_key(etag)
+        payload = await self.cache_call(self.content.backend.get, key)
+        if payload is None:
+            payload = await build()
+            if payload is not None:
+                await self.cache_call(self.content.backend.set, key, payload, self.content.payload_ttl)
+        return payload
+
+    @route(r"/assessments", replica=True)
+    async def assessment_list(self, request, session):
+        # The shared listings are synchronous; run_sync executes them on this session's connection
+        return json_response(await session.run_sync(assessments_payload, request.args))
+
+    @route(r"/assessments/(?P<id>\d+)")
+    async def assessment_detail(self, request, session, id):
+        version = await self.assessment_version(session, id)
+        if version is None:
+            return json_response({"message": "Assessment not found"}, 404)
+        etag = self.content.etag("assessment", id, version)
+        if request.if_none_match.contains(etag):
+            return 304, b'', cache_headers(etag)
+
+        async def build():
+            assessment = await session.get(Assessment, id)
+            return assessment.to_dict() if assessment else None
+
+        payload = await self.get_or_build(etag, build)
+        if payload is None:
+            return json_response({"message": "Assessment not found"}, 404)
+        return json_response(payload, headers=cache_headers(etag))
+
+    @route(r"/questions/(?P<assessment_id>\d+)", replica=True)
+    async def question_list(self, request, session, assessment_id):
+        version = await self.assessment_version(session, assessment_id)
+
+        async def build():
+            if session.bind is self.engine:
+                return await session.run_sync(questions_payload, request.args, assessment_id)
+            # Built on the primary, as in QuestionList.get: the version may be newer than this replica
+            async with self.sessions() as primary:
+                return await primary.run_sync(questions_payload, request.args, assessment_id)
+        if version is None:
+            return json_response(await build())
+        etag = self.content.etag("questions", assessment_id, version, request.args)
+        if request.if_none_match.contains(etag):
+            return 304, b'', cache_headers(etag)
+        return json_response(await self.get_or_build(etag, build), headers=cache_headers(etag))
+
+    @route(r"/invitations")
+    async def invitation_list(self, request, session):
+        return json_response(await session.run_sync(invitations_payload, request.args))
+
+    @route(r"/interviewee/status", replica=True)
+    async def interviewee_status(self, request, session):
+        return json_response(await session.run_sync(interviewee_status_payload))
+
+    @route(r"/interviewee/composition", replica=True)
+    async def interviewee_composition(self, request, session):
+        requested = breakdowns(request.args)
+        rows = []
+        for dimensions in requested or DEFAULT_BREAKDOWNS:
+            breakdown = await self.cache_call(self.content.backend.get, cache_key(dimensions))
+            if breakdown is None:
+                breakdown = await session.run_sync(breakdown_rows, dimensions)
+                await self.cache_call(
+                    self.content.backend.set, cache_key(dimensions), breakdown, self.flask_app.config['COMPOSITION_CACHE_TTL']
+                )
+            rows.append(breakdown)
+        return json_response(composition_payload(requested, rows))
+
+    @route(r"/performance/statistics", replica=True)
+    async def performance_statistics(self, request, session):
+        return json_response(await session.run_sync(statistics_payload, request.args))
+
+    @route(r"/notifications/stream", query_token=True)
+    async def notification_stream(self, request, session):
+        """
+        Server-sent events stream of the user's new notifications and unread count, served on the
+        event loop so an idle stream costs a coroutine rather than a worker. Sends the current unread
+        count first, then a comment line every NOTIFICATION_HEARTBEAT seconds so proxies keep the
+        connection open and disconnected clients are noticed.
+        """
+        user_id = request.claims['sub']
+        broker = self.flask_app.extensions['notifications']
+        broker.start()
+        subscription = AsyncSubscription()
+        # Subscribe before counting so no notification falls between the two
+        unsubscribe = broker.hub.subscribe(user_id, subscription.deliver)
+        try:
+            counts = dict((await session.execute(Notification.unread_counts_query([user_id]))).all())
+        except BaseException:
+            unsubscribe()
+            raise
+        events = self.notification_events(subscription, unsubscribe, counts.get(user_id, 0))
+        return 200, events, [('Content-Type', 'text/event-stream'), *SSE_HEADERS.items()]
+
+    async def notification_events(self, subscription, unsubscribe, unread_count):
+        heartbeat = self.flask_app.config.get('NOTIFICATION_HEARTBEAT', 15)
+        try:
+            yield ("retry: 5000\n\n" + format_event('unread', {'unread_count': unread_count})).encode('utf-8')
+            while not subscription.overflowed:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                yield format_event(event['event'], event['data']).encode('utf-8')
+        finally:
+            unsubscribe()
+
+# Entry point for ASGI servers, e.g. SERVER_MODE=async gunicorn -c gunicorn.conf.py
+application = AsyncAPI(app)
+
+if __name__ == "__main__":
+    import uvicorn  # type: ignore
+
+    uvicorn.run("asgi:application", host="0.0.0.0", port=app.config['PORT'])
@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError  # type: ignore
+from models import db, dialect_insert, Answer, Assessment, Question, Submission
+from grading import grade_submission
+
+class AnswerWindowClosed(Exception):
+    """Raised when answers are written to a submission past its deadline or after it was submitted."""
+
+def submission_deadline(submission, time_limit):
+    """The time answers stop being accepted: start plus the assessment's time limit (minutes), if any."""
+    if not time_limit or not submission.created_at:
+        return None
+    return submission.created_at + timedelta(minutes=time_limit)
+
+def start_submission(assessment_id, interviewee_id):
+    """
+    Open an in-progress submission for a candidate, or resume the one already open.
+    Returns (submission, created). A unique partial index keeps concurrent starts to one row.
+    """
+    submission = Submission.query.filter_by(
+        assessment_id=assessment_id, interviewee_id=interviewee_id, status='in_progress'
+    ).first()
+    if submission:
+        return submission, False
+    submission = Submission(assessment_id=assessment_id, interviewee_id=interviewee_id, status='in_progress')
+    try:
+        with db.session.begin_nested():
+            db.session.add(submission)
+    except IntegrityError:
+        # Another request opened it first; use that one
+        return Submission.query.filter_by(
+            assessment_id=assessment_id, interviewee_id=interviewee_id, status='in_progress'
+        ).one(), False
+    return submission, True
+
+def save_answers(submission, answers, grace_seconds=30):
+    """
+    Upsert answers into an in-progress submission in a single INSERT ... ON CONFLICT statement keyed
+    on (submission, question), so debounced autosave patches stay small. A later value for the
+    same question replaces the earlier one. Raises ValueError for malformed answers or questions of
+    another assessment, and AnswerWindowClosed once the deadline plus `grace_seconds` has passed
+    or the submission was closed. The caller commits. Returns the number of answers saved.
+    """
+    # Re-read the status under a row lock: a submit or expiry committed since the submission was
+    # loaded is seen here, and one racing this transaction waits for it (no-op on SQLite)
+    status = db.session.query(Submission.status).filter_by(id=submission.id).with_for_update().scalar()
+    if status != 'in_progress':
+        raise AnswerWindowClosed("This submission has already been submitted.")
+    if not answers:
+        return 0
+    time_limit = db.session.query(Assessment.time_limit).filter_by(id=submission.assessment_id).scalar()
+    deadline = submission_deadline(submission, time_limit)
+    now = datetime.utcnow()
+    if deadline and now > deadline + timedelta(seconds=grace_seconds):
+        raise AnswerWindowClosed("The time limit for this assessment has passed.")
+
+    latest = {}
+    for answer in answers:
+        try:
+            latest[int(answer["question_id"])] = str(answer["answer_text"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("Each answer must include 'question_id' and 'answer_text'.")
+    valid_ids = {
+        id for (id,) in db.session.query(Question.id).filter(
+            Question.assessment_id == submission.assessment_id, Question.id.in_(latest)
+        )
+    }
+    invalid_ids = sorted(set(latest) - valid_ids)
+    if invalid_ids:
+        raise ValueError(f"Questions not in this assessment: {', '.join(map(str, invalid_ids))}")
+
+    table = Answer.__table__
+    connection = db.session.connection()
+    insert = dialect_insert(connection, table)
+    insert = insert.on_conflict_do_update(
+        index_elements=[table.c.submission_id, table.c.question_id],
+        # A changed answer must be graded again
+        set_={'answer_text': insert.excluded.answer_text, 'is_correct': None, 'score': None, 'updated_at': now}
+    )
+    connection.execute(insert, [
+        {'submission_id': submission.id, 'question_id': question_id, 'answer_text': answer_text,
+         'created_at': now, 'updated_at': now}
+        for question_id, answer_text in latest.items()
+    ])
+    return len(latest)
+
+def finish_submission(submission):
+    """
+    Close an in-progress submission and auto-grade it; answers are already saved. The caller commits.
+    The status is flipped with a conditional UPDATE, so of a second submit or the expiry scheduler
+    racing this one only the first closes and grades it; the others get AnswerWindowClosed.
+    """
+    now = datetime.utcnow()
+    table = Submission.__table__
+    closed = db.session.execute(
+        table.update().where(table.c.id == submission.id, table.c.status == 'in_progress').values(status='submitted')
+    ).rowcount
+    if not closed:
+        raise AnswerWindowClosed("This submission has already been submitted.")
+    # Set through the ORM as well so the rollup listeners see submitted_at change
+    submission.status = 'submitted'
+    submission.submitted_at = now
+    db.session.flush()
+    grade_submission(submission)
+    return submission
+
+def saved_answers(submission_id):
+    """The (question_id, answer_text) pairs saved so far, for resuming a session."""
+    return [
+        {'question_id': question_id, 'answer_text': answer_text}
+        for question_id, answer_text in db.session.query(Answer.question_id, Answer.answer_text).filter(
+            Answer.submission_id == submission_id
+        ).order_by(Answer.question_id)
+    ]
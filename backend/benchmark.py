@@ -0,0 +1,331 @@
+"""
+Endpoint benchmark for the resources in app.py.
+
+Sends requests to each resource in-process through the Flask test client, against the database in
+SQLALCHEMY_DATABASE_URI (load one with dataset.py first), and reports latency percentiles and
+SQL statements per request. Results can be saved and later runs compared against them:
+
+    python benchmark.py --requests 200 --json baseline.json
+    python benchmark.py --requests 200 --baseline baseline.json   # exits 1 on a regression
+
+Read-only scenarios run by default. --writes adds the scenarios that create or change rows; they
+work on users, assessments and submissions created for the run, which are left in the database.
+The notification stream is long-lived and is not benchmarked.
+"""
+import argparse
+import io
+import json
+import sys
+import time
+import uuid
+from datetime import datetime
+from flask_jwt_extended import create_access_token  # type: ignore
+from sqlalchemy import event, func  # type: ignore
+from models import db, Assessment, Feedback, Notification, Question, Submission, User
+
+class QueryCounter:
+    """Counts the SQL statements sent through an engine."""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self.increment)
+
+    def increment(self, *args):
+        self.count += 1
+
+class Scenario:
+    """
+    One benchmarked request. `path` and `body` may be callables of the iteration number, so each
+    request can target its own rows; `user` names a fixture user or is a callable returning a user id.
+    """
+
+    def __init__(self, name, method, path, user='recruiter', body=None, expect=(200,), upload=None, after=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.user = user
+        self.body = body
+        self.upload = upload
+        self.expect = expect
+        # Called with each successful response, to record the ids of created rows
+        self.after = after
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+class Benchmark:
+    def __init__(self, app, password, requests, warmup):
+        self.app = app
+        self.client = app.test_client()
+        self.password = password
+        self.requests = requests
+        self.warmup = warmup
+        self.run_id = uuid.uuid4().hex[:8]
+        self.tokens = {}
+        self.fixtures = {}
+        # Rows created by write scenarios, by iteration
+        self.created = {'users': [], 'assessments': [], 'invitations': [], 'submissions': []}
+
+    def token(self, user_id):
+        if user_id not in self.tokens:
+            self.tokens[user_id] = create_access_token(identity=user_id)
+        return self.tokens[user_id]
+
+    def load_fixtures(self):
+        """Pick representative rows: the busiest assessment, its recruiter, and a candidate with feedback."""
+        assessment_id = db.session.query(Submission.assessment_id).group_by(Submission.assessment_id).order_by(
+            func.count().desc()
+        ).limit(1).scalar() or db.session.query(Assessment.id).limit(1).scalar()
+        if assessment_id is None:
+            raise SystemExit("No assessments found; load a dataset with dataset.py first")
+        submission = (
+            Submission.query.join(Feedback, Feedback.submission_id == Submission.id).first()
+            or Submission.query.first()
+        )
+        if submission is None:
+            raise SystemExit("No submissions found; load a dataset with dataset.py first")
+        candidate = db.session.get(User, submission.interviewee_id)
+        self.fixtures = {
+            'assessment': assessment_id,
+            'recruiter': db.session.get(Assessment, assessment_id).recruiter_id,
+            'candidate': candidate.id,
+            'candidate_email': candidate.email,
+            'submission': submission.id,
+            'notification': db.session.query(Notification.id).filter_by(user_id=candidate.id).limit(1).scalar(),
+        }
+
+    def create_write_fixtures(self):
+        """Assessments owned by the fixture recruiter that the run's candidates take and questions are added to."""
+        recruiter_id = self.fixtures['recruiter']
+        for key in ('bench_assessment', 'bench_submit_assessment', 'bench_question_assessment'):
+            assessment = Assessment(
+                title=f"Benchmark {self.run_id}", description="Created by benchmark.py", recruiter_id=recruiter_id,
+                time_limit=60, is_published=True
+            )
+            db.session.add(assessment)
+            db.session.flush()
+            question = Question(
+                assessment_id=assessment.id, type='multiple_choice', text="What is 2 + 2?",
+                choices={"A": "3", "B": "4"}, correct_answer='B'
+            )
+            db.session.add(question)
+            db.session.flush()
+            self.fixtures[key] = assessment.id
+            self.fixtures[f'{key}_question'] = question.id
+        db.session.commit()
+
+    def read_scenarios(self):
+        f = self.fixtures
+        return [
+            Scenario('welcome', 'GET', '/', user=None),
+            Scenario('assessments page', 'GET', '/assessments?page=2&per_page=20'),
+            Scenario('assessments cursor', 'GET', '/assessments?limit=20'),
+            Scenario('assessment detail', 'GET', f"/assessments/{f['assessment']}"),
+            Scenario('assessment export csv', 'GET', f"/assessments/{f['assessment']}/export?format=csv"),
+            Scenario('assessment export ndjson', 'GET', f"/assessments/{f['assessment']}/export?format=ndjson"),
+            Scenario('invitations page', 'GET', '/invitations?page=2&per_page=20'),
+            Scenario('invitations cursor', 'GET', '/invitations?limit=20'),
+            Scenario('questions page', 'GET', f"/questions/{f['assessment']}"),
+            Scenario('interviewees page', 'GET', '/recruiter/interviewees?page=2&per_page=20'),
+            Scenario('interviewees cursor', 'GET', '/recruiter/interviewees?limit=20'),
+            Scenario('assessment interviewees', 'GET', f"/recruiter/assessments/{f['assessment']}/interviewees"),
+            Scenario('feedback', 'GET', f"/feedback/{f['submission']}", user='candidate'),
+            Scenario('interviewee assessments', 'GET', '/interviewee/assessments', user='candidate'),
+            Scenario('trial assessment', 'GET', '/interviewee/trial-assessment', user='candidate'),
+            Scenario('notifications', 'GET', '/notifications', user='candidate'),
+            Scenario('interviewee status', 'GET', '/interviewee/status'),
+            Scenario('composition', 'GET', '/interviewee/composition'),
+            Scenario('composition breakdowns', 'GET', '/interviewee/composition?by=gender,consent&by=invitation_status'),
+            Scenario('performance monthly', 'GET', '/performance/statistics'),
+            Scenario('performance daily', 'GET', f"/performance/statistics?period=day&from={datetime.utcnow().year}-01-01"),
+        ]
+
+    def write_scenarios(self):
+        """Ordered: later scenarios act on the users, assessments and submissions earlier ones created."""
+        f = self.fixtures
+        created = self.created
+        run = self.run_id
+
+        def candidate(i):
+            return created['users'][i]
+
+        def remember(kind, *keys):
+            def after(response):
+                value = response.get_json()
+                for key in keys:
+                    value = value[key]
+                created[kind].append(value)
+            return after
+
+        def reset_token(i):
+            response = self.client.post('/forgot-password', json={'email': f['candidate_email']})
+            return f"/reset-password/{response.get_json()['token']}"
+
+        def import_file(i):
+            lines = ["first_name,last_name,username,email,gender,consent"] + [
+                f"Bench,Import,bench-{run}-import-{i}-{k},bench-{run}-import-{i}-{k}@example.com,other,yes"
+                for k in range(20)
+            ]
+            return (io.BytesIO("\n".join(lines).encode()), 'candidates.csv')
+
+        def logout_token(i):
+            return create_access_token(identity=f['recruiter'])
+
+        return [
+            Scenario('signup', 'POST', '/signup', user=None, expect=(201,), body=lambda i: {
+                'first_name': 'Bench', 'last_name': 'Candidate', 'username': f"bench-{run}-{i}",
+                'email': f"bench-{run}-{i}@example.com", 'password': self.password, 'role': 'interviewee',
+                'gender': 'other', 'consent': True
+            }),
+            Scenario('login', 'POST', '/login', user=None, body={
+                'username': db.session.get(User, f['recruiter']).username, 'password': self.password
+            }),
+            Scenario('forgot password', 'POST', '/forgot-password', user=None, body={'email': f['candidate_email']}),
+            Scenario('reset password', 'POST', reset_token, user=None, body={'new_pass': self.password}),
+            Scenario('logout', 'POST', '/logout', user=logout_token),
+            Scenario('create assessment', 'POST', '/assessments', expect=(201,), after=remember('assessments', 'id'), body={
+                'title': f"Benchmark {run}", 'recruiter_id': f['recruiter'], 'time_limit': 30
+            }),
+            Scenario('update assessment', 'PUT', lambda i: f"/assessments/{created['assessments'][i]}",
+                     body={'description': "Updated by benchmark.py"}),
+            Scenario('create question', 'POST', f"/questions/{f['bench_question_assessment']}", expect=(201,), body={
+                'type': 'subjective', 'text': "Describe a project you are proud of."
+            }),
+            Scenario('delete assessment', 'DELETE', lambda i: f"/assessments/{created['assessments'][i]}", expect=(204,)),
+            Scenario('invite', 'POST', '/invitations', expect=(201,), after=remember('invitations', 'data', 0, 'id'), body=lambda i: {
+                'assessment_id': f['bench_assessment'], 'interviewee_id': candidate(i)
+            }),
+            Scenario('accept invitation', 'PUT', lambda i: f"/interviewee/invitations/{created['invitations'][i]}/accept",
+                     user=candidate),
+            Scenario('start assessment', 'POST', f"/interviewee/assessments/{f['bench_assessment']}/start",
+                     user=candidate, expect=(201,), after=remember('submissions', 'data', 'submission', 'id')),
+            Scenario('autosave answers', 'PATCH', lambda i: f"/interviewee/submissions/{created['submissions'][i]}/answers",
+                     user=candidate, body={'answers': [{'question_id': f['bench_assessment_question'], 'answer_text': 'A'}]}),
+            Scenario('finish submission', 'POST', lambda i: f"/interviewee/submissions/{created['submissions'][i]}/submit",
+                     user=candidate, body={'answers': [{'question_id': f['bench_assessment_question'], 'answer_text': 'B'}]}),
+            Scenario('submit assessment', 'POST', f"/interviewee/assessments/{f['bench_submit_assessment']}/submit",
+                     user=candidate, expect=(201,), body={
+                         'answers': [{'question_id': f['bench_submit_assessment_question'], 'answer_text': 'B'}]
+                     }),
+            Scenario('create feedback', 'POST', lambda i: f"/feedback/{created['submissions'][i]}", expect=(201,),
+                     body={'text': "Well done.", 'score': 8}),
+            Scenario('regrade assessment', 'POST', f"/assessments/{f['bench_assessment']}/regrade"),
+            Scenario('read notification', 'PATCH', f"/notifications/{f['notification']}", user='candidate',
+                     body={'is_read': True}),
+            Scenario('import candidates', 'POST', '/recruiter/interviewees/import', upload=import_file),
+        ]
+
+    def collect_signups(self):
+        usernames = [f"bench-{self.run_id}-{i}" for i in range(self.warmup + self.requests)]
+        ids = dict(db.session.query(User.username, User.id).filter(User.username.in_(usernames)))
+        self.created['users'] = [ids[username] for username in usernames]
+
+    def user_id(self, scenario, i):
+        if scenario.user is None:
+            return None
+        if callable(scenario.user):
+            return scenario.user(i)
+        return self.fixtures[scenario.user]
+
+    def run(self, scenario, counter):
+        latencies, queries, errors = [], [], 0
+        for i in range(self.warmup + self.requests):
+            path = scenario.path(i) if callable(scenario.path) else scenario.path
+            body = scenario.body(i) if callable(scenario.body) else scenario.body
+            user = self.user_id(scenario, i)
+            if isinstance(user, str):
+                headers = {'Authorization': f'Bearer {user}'}
+            else:
+                headers = {'Authorization': f'Bearer {self.token(user)}'} if user else {}
+            kwargs = {'headers': headers}
+            if scenario.upload:
+                kwargs['data'] = {'file': scenario.upload(i)}
+                kwargs['content_type'] = 'multipart/form-data'
+            elif body is not None:
+                kwargs['json'] = body
+
+            before = counter.count
+            started = time.perf_counter()
+            response = self.client.open(path, method=scenario.method, **kwargs)
+            # Consume streamed bodies inside the timing
+            response.get_data()
+            elapsed = time.perf_counter() - started
+            if response.status_code not in scenario.expect:
+                errors += 1
+            elif scenario.after:
+                scenario.after(response)
+            if i >= self.warmup:
+                latencies.append(elapsed * 1000)
+                queries.append(counter.count - before)
+        return {
+            'requests': len(latencies),
+            'p50': round(percentile(latencies, 0.5), 2),
+            'p95': round(percentile(latencies, 0.95), 2),
+            'p99': round(percentile(latencies, 0.99), 2),
+            'queries': round(sum(queries) / len(queries), 2) if queries else 0,
+            'max_queries': max(queries, default=0),
+            'errors': errors,
+        }
+
+# Latency changes smaller than this are timer noise for in-process requests
+MIN_REGRESSION_MS = 2.0
+
+def regressions(results, baseline, tolerance):
+    """Scenarios whose p95 grew by more than `tolerance` (a ratio) or that now send at least one more query."""
+    found = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if result['p95'] > previous['p95'] * tolerance and result['p95'] - previous['p95'] >= MIN_REGRESSION_MS:
+            found.append(f"{name}: p95 {previous['p95']} ms -> {result['p95']} ms")
+        if result['queries'] >= previous['queries'] + 1:
+            found.append(f"{name}: queries per request {previous['queries']} -> {result['queries']}")
+        if result['errors'] > previous['errors']:
+            found.append(f"{name}: errors {previous['errors']} -> {result['errors']}")
+    return found
+
+if __name__ == "__main__":
+    from app import app
+
+    parser = argparse.ArgumentParser(description="Benchmark every API resource against the current database.")
+    parser.add_argument('--requests', type=int, default=100, help="Timed requests per scenario")
+    parser.add_argument('--warmup', type=int, default=5, help="Untimed requests per scenario before timing")
+    parser.add_argument('--writes', action='store_true', help="Also run scenarios that create or change rows")
+    parser.add_argument('--only', help="Run only the read scenarios whose name contains this text")
+    parser.add_argument('--password', default='password', help="Password of the generated users (see dataset.py)")
+    parser.add_argument('--json', help="Save the results to this file")
+    parser.add_argument('--baseline', help="Compare against results saved with --json")
+    parser.add_argument('--tolerance', type=float, default=1.25, help="Allowed p95 growth over the baseline")
+    args = parser.parse_args()
+
+    with app.app_context():
+        benchmark = Benchmark(app, args.password, args.requests, args.warmup)
+        benchmark.load_fixtures()
+        scenarios = [scenario for scenario in benchmark.read_scenarios() if not args.only or args.only in scenario.name]
+        if args.writes:
+            benchmark.create_write_fixtures()
+            scenarios += benchmark.write_scenarios()
+        counter = QueryCounter(db.engine)
+
+        results = {}
+        print(f"{'scenario':<28} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8} {'errors':>7}")
+        for scenario in scenarios:
+            results[scenario.name] = result = benchmark.run(scenario, counter)
+            print(f"{scenario.name:<28} {result['p50']:>8.1f} {result['p95']:>8.1f} {result['p99']:>8.1f} "
+                  f"{result['queries']:>8.1f} {result['errors']:>7}")
+            if scenario.name == 'signup':
+                benchmark.collect_signups()
+            db.session.remove()
+
+        if args.json:
+            with open(args.json, 'w') as output:
+                json.dump({'created_at': datetime.utcnow().isoformat(), 'requests': args.requests,
+                           'results': results}, output, indent=2)
+        if args.baseline:
+            with open(args.baseline) as saved:
+                found = regressions(results, json.load(saved)['results'], args.tolerance)
+            for regression in found:
+                print(f"Regression: {regression}")
+            sys.exit(1 if found else 0)
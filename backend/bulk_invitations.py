@@ -0,0 +1,77 @@
+from datetime import datetime
+from models import db, dialect_insert, User, Invitation
+from mailer import enqueue_emails, invitation_email
+from notifications import notify_many
+
+def parse_expiry_date(expiry_date):
+    """Accept an ISO-8601 string (or datetime/None) for an invitation expiry date."""
+    if expiry_date is None or isinstance(expiry_date, datetime):
+        return expiry_date
+    return datetime.fromisoformat(expiry_date)
+
+def parse_interviewee_ids(interviewee_ids):
+    """Deduplicated integer ids, in request order; ValueError for anything that is not an integer id."""
+    try:
+        if isinstance(interviewee_ids, (str, dict)) or any(isinstance(id, (bool, float)) for id in interviewee_ids):
+            raise TypeError
+        return list(dict.fromkeys(int(id) for id in interviewee_ids))
+    except (TypeError, ValueError) as e:
+        raise ValueError("interviewee_ids must be a list of integer ids.") from e
+
+def chunks(ids, size):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+def create_bulk_invitations(assessment, interviewee_ids, status='pending', expiry_date=None, batch_size=1000):
+    """
+    Invite many interviewees to one assessment.
+
+    Ids are deduplicated and validated against the users table, pairs that already have an
+    invitation are skipped (both looked up `batch_size` ids per query), and the rest are inserted
+    in executemany batches with ON CONFLICT DO NOTHING so concurrent invites cannot create
+    duplicates. Invitation emails are
+    queued in the outbox and in-app notifications inserted alongside each batch, with one
+    multi-row statement each rather than one per invitee.
+    Returns a summary dict instead of the created rows.
+    """
+    assessment_id = assessment.id
+    requested_ids = parse_interviewee_ids(interviewee_ids)
+    expiry_date = parse_expiry_date(expiry_date)
+
+    # Looked up batch_size ids at a time: one IN list over tens of thousands of ids would exceed
+    # SQLite's bound parameter limit and make a needlessly large statement on PostgreSQL
+    emails = {}
+    for ids in chunks(requested_ids, batch_size):
+        emails.update(db.session.query(User.id, User.email).filter(User.id.in_(ids), User.role == 'interviewee'))
+    valid_ids = set(emails)
+    existing_ids = set()
+    for ids in chunks([id for id in requested_ids if id in valid_ids], batch_size):
+        existing_ids.update(id for (id,) in db.session.query(Invitation.interviewee_id).filter(
+            Invitation.assessment_id == assessment_id, Invitation.interviewee_id.in_(ids)
+        ))
+    to_invite = [id for id in requested_ids if id in valid_ids and id not in existing_ids]
+
+    table = Invitation.__table__
+    connection = db.session.connection()
+    created = 0
+    for ids in chunks(to_invite, batch_size):
+        rows = [
+            {'assessment_id': assessment_id, 'interviewee_id': id, 'status': status, 'expiry_date': expiry_date}
+            for id in ids
+        ]
+        insert = dialect_insert(connection, table).on_conflict_do_nothing(
+            index_elements=[table.c.assessment_id, table.c.interviewee_id]
+        ).returning(table.c.interviewee_id)
+        invited_ids = [id for (id,) in connection.execute(insert, rows)]
+        enqueue_emails(connection, [invitation_email(emails[id], assessment.title, expiry_date) for id in invited_ids])
+        notify_many(db.session, invited_ids, f"You have been invited to take the assessment '{assessment.title}'.")
+        created += len(invited_ids)
+    db.session.commit()
+
+    return {
+        "requested": len(requested_ids),
+        "created": created,
+        # Pairs that already existed, including ones that appeared concurrently during the insert
+        "skipped_existing": len(to_invite) - created + len(existing_ids),
+        "invalid_ids": [id for id in requested_ids if id not in valid_ids]
+    }
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, jsonify, make_response  # type: ignore
+from models import db, Assessment
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with per-entry TTL."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + ttl if ttl else None)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+class RedisCache:
+    """Cache backend for any Redis-compatible server, shared by all workers. Values are stored as JSON."""
+
+    def __init__(self, url, prefix="smartrecruiter:"):
+        import redis  # type: ignore
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, json.dumps(value), ex=int(ttl) if ttl else None)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+class ContentCache:
+    """
+    Cache for serialized assessment and question payloads.
+
+    Payload keys embed the assessment's version, which is bumped on every content change, so stale
+    payloads are never served and simply age out. The current version is itself cached for a short
+    TTL and dropped on bumps: with the Redis backend all workers see a bump immediately, with the
+    in-process backend other workers see it within CACHE_VERSION_TTL seconds.
+    """
+
+    def __init__(self, backend, payload_ttl=3600, version_ttl=5):
+        self.backend = backend
+        self.payload_ttl = payload_ttl
+        self.version_ttl = version_ttl
+
+    @staticmethod
+    def version_key(assessment_id):
+        return f"assessment:{assessment_id}:version"
+
+    def assessment_version(self, assessment_id):
+        """Current content version of an assessment, or None if it does not exist."""
+        version = self.backend.get(self.version_key(assessment_id))
+        if version is None:
+            version = db.session.query(Assessment.version).filter_by(id=assessment_id).scalar()
+            if version is None:
+                return None
+            self.backend.set(self.version_key(assessment_id), version, self.version_ttl)
+        return version
+
+    def bump(self, assessment_id):
+        """Increment an assessment's version in the current transaction; call published() after commit."""
+        db.session.query(Assessment).filter_by(id=assessment_id).update(
+            {Assessment.version: Assessment.version + 1}, synchronize_session=False
+        )
+
+    def published(self, assessment_id):
+        """Drop the cached version after a committed change so the next read picks up the new one."""
+        self.backend.delete(self.version_key(assessment_id))
+
+    @staticmethod
+    def payload_key(etag):
+        return f"payload:{etag}"
+
+    @staticmethod
+    def etag(kind, assessment_id, version, args=None):
+        tag = f"{kind}-{assessment_id}-v{version}"
+        if args:
+            tag += "-" + hashlib.sha1(json.dumps(sorted(args.items(multi=True))).encode('utf-8')).hexdigest()[:12]
+        return tag
+
+    def get_or_build(self, etag, build):
+        """Return the payload cached under an ETag, building and storing it on a miss."""
+        key = self.payload_key(etag)
+        payload = self.backend.get(key)
+        if payload is None:
+            payload = build()
+            self.backend.set(key, payload, self.payload_ttl)
+        return payload
+
+def init_cache(app):
+    """Create the content cache from config and register it on the app."""
+    config = app.config
+    if config.get('CACHE_REDIS_URL'):
+        backend = RedisCache(config['CACHE_REDIS_URL'])
+    else:
+        backend = LRUCache(config.get('CACHE_MAX_ENTRIES', 1024))
+    app.extensions['content_cache'] = ContentCache(
+        backend, payload_ttl=config.get('CACHE_PAYLOAD_TTL', 3600), version_ttl=config.get('CACHE_VERSION_TTL', 5)
+    )
+    return app.extensions['content_cache']
+
+def content_cache():
+    return current_app.extensions['content_cache']
+
+def etag_response(payload, etag):
+    """200 response for a cached payload; clients must revalidate with If-None-Match."""
+    response = make_response(jsonify(payload), 200)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def not_modified(etag):
+    response = make_response('', 304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,245 @@
+"""
+Bulk import of interviewees from a CSV or XLSX spreadsheet.
+
+    python candidate_import.py candidates.csv --errors errors.csv
+
+Expected columns (header names are case-insensitive): first_name, last_name, username, email,
+gender and consent, plus an optional password. Candidates without a password get an invite code
+by email to set one, so most imports skip password hashing entirely.
+"""
+import argparse
+import csv
+import io
+import os
+import secrets
+import sys
+from datetime import datetime, timedelta
+from sqlalchemy import or_  # type: ignore
+from models import db, dialect_insert, PasswordReset, User
+from mailer import account_invite_email, enqueue_emails
+from passwords import UNUSABLE_PASSWORD
+
+REQUIRED_COLUMNS = ('first_name', 'last_name', 'username', 'email', 'gender', 'consent')
+GENDERS = ('male', 'female', 'other')
+MAX_LENGTHS = {'first_name': 50, 'last_name': 50, 'username': 50, 'email': 100}
+TRUE_VALUES = ('true', '1', 't', 'yes', 'y')
+FALSE_VALUES = ('false', '0', 'f', 'no', 'n')
+
+class ImportFileError(ValueError):
+    """Raised when a spreadsheet cannot be read or lacks required columns."""
+
+def normalize_header(name):
+    return str(name or '').strip().lower().replace(' ', '_')
+
+def read_csv(stream):
+    reader = csv.reader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    yield from reader
+
+def read_xlsx(stream):
+    try:
+        from openpyxl import load_workbook  # type: ignore
+    except ImportError as e:
+        raise ImportFileError("XLSX import needs the openpyxl package; upload a CSV instead.") from e
+    # read_only streams rows from the sheet XML instead of loading the whole workbook
+    try:
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+    except Exception as e:
+        raise ImportFileError(f"Could not read the workbook: {e}") from e
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield ['' if value is None else value for value in row]
+    finally:
+        workbook.close()
+
+def read_rows(stream, filename):
+    """
+    Check the header row, then return an iterator of (row_number, {column: value}) over the data
+    rows that reads the file incrementally. Raises ImportFileError for an unusable header.
+    """
+    rows = read_xlsx(stream) if filename.lower().endswith('.xlsx') else read_csv(stream)
+    try:
+        header = [normalize_header(name) for name in next(rows, [])]
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ImportFileError(f"Could not read the file: {e}") from e
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing:
+        raise ImportFileError(f"Missing required columns: {', '.join(missing)}")
+
+    def numbered():
+        # Row numbers match the spreadsheet, header being row 1
+        row_number = 1
+        try:
+            for row_number, row in enumerate(rows, start=2):
+                if any(str(value).strip() for value in row):
+                    yield row_number, dict(zip(header, row))
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise ImportFileError(f"Could not read the file after row {row_number}: {e}") from e
+    return numbered()
+
+def validate_row(row):
+    """Return (user values, list of error messages) for one spreadsheet row."""
+    values = {column: str(row.get(column, '') or '').strip() for column in REQUIRED_COLUMNS + ('password',)}
+    errors = [f"{column} is required" for column in REQUIRED_COLUMNS if not values[column]]
+    for column, length in MAX_LENGTHS.items():
+        if len(values[column]) > length:
+            errors.append(f"{column} is longer than {length} characters")
+    if values['email'] and '@' not in values['email']:
+        errors.append("email is not a valid address")
+    values['gender'] = values['gender'].lower()
+    if values['gender'] and values['gender'] not in GENDERS:
+        errors.append(f"gender must be one of {', '.join(GENDERS)}")
+    consent = values['consent'].lower()
+    if consent in TRUE_VALUES:
+        values['consent'] = True
+    elif consent in FALSE_VALUES:
+        values['consent'] = False
+    elif consent:
+        errors.append("consent must be true or false")
+    return values, errors
+
+def import_candidates(rows, hasher, batch_size=1000, invite_hours=72):
+    """
+    Create interviewees from (row_number, row) pairs, yielding progress events as it goes.
+
+    Rows are validated and inserted per batch: usernames and emails are checked against the users
+    table with one query per batch (and against earlier rows of the file), given passwords are
+    hashed in parallel on the hasher's pool, and the batch is inserted with one executemany
+    INSERT ... ON CONFLICT DO NOTHING, so rows taken concurrently are reported rather than failing
+    the batch. Candidates without a password get an invite code (a password reset token) emailed
+    through the outbox. Each batch is committed on its own.
+
+    Yields {'event': 'error', 'row', 'errors'} per rejected row, {'event': 'progress', ...} per
+    batch and finally {'event': 'done', ...} with the totals.
+    """
+    totals = {'processed': 0, 'created': 0, 'invited': 0, 'failed': 0}
+    seen_usernames, seen_emails = set(), set()
+    batch = []
+
+    def flush():
+        for row_number, errors in insert_batch(batch, hasher, seen_usernames, seen_emails, invite_hours, totals):
+            totals['failed'] += 1
+            yield {'event': 'error', 'row': row_number, 'errors': errors}
+        totals['processed'] += len(batch)
+        batch.clear()
+        yield dict(totals, event='progress')
+
+    for row_number, row in rows:
+        batch.append((row_number, row))
+        if len(batch) >= batch_size:
+            yield from flush()
+    if batch:
+        yield from flush()
+    yield dict(totals, event='done')
+
+def insert_batch(batch, hasher, seen_usernames, seen_emails, invite_hours, totals):
+    """Insert one batch; returns [(row_number, errors)] for the rows that were not created."""
+    failures = []
+    valid = []
+    for row_number, row in batch:
+        values, errors = validate_row(row)
+        if values['username'] in seen_usernames:
+            errors.append("username appears earlier in the file")
+        if values['email'] in seen_emails:
+            errors.append("email appears earlier in the file")
+        if errors:
+            failures.append((row_number, errors))
+        else:
+            seen_usernames.add(values['username'])
+            seen_emails.add(values['email'])
+            valid.append((row_number, values))
+    if not valid:
+        return failures
+
+    usernames = [values['username'] for _, values in valid]
+    emails = [values['email'] for _, values in valid]
+    taken_usernames, taken_emails = set(), set()
+    for username, email in db.session.query(User.username, User.email).filter(
+        or_(User.username.in_(usernames), User.email.in_(emails))
+    ):
+        taken_usernames.add(username)
+        taken_emails.add(email)
+    new = []
+    for row_number, values in valid:
+        errors = []
+        if values['username'] in taken_usernames:
+            errors.append("username already exists")
+        if values['email'] in taken_emails:
+            errors.append("email already exists")
+        if errors:
+            failures.append((row_number, errors))
+        else:
+            new.append((row_number, values))
+
+    with_password = [values for _, values in new if values['password']]
+    for values, password_hash in zip(with_password, hasher.hash_many([values['password'] for values in with_password])):
+        values['password_hash'] = password_hash
+
+    now = datetime.utcnow()
+    table = User.__table__
+    connection = db.session.connection()
+    created = {}
+    if new:
+        insert = dialect_insert(connection, table).on_conflict_do_nothing().returning(table.c.id, table.c.username)
+        created = dict((username, id) for id, username in connection.execute(insert, [
+            {'first_name': values['first_name'], 'last_name': values['last_name'], 'username': values['username'],
+             'email': values['email'], 'role': 'interviewee', 'gender': values['gender'], 'consent': values['consent'],
+             'password_hash': values.get('password_hash', UNUSABLE_PASSWORD), 'created_at': now, 'updated_at': now}
+            for _, values in new
+        ]))
+
+    invites = []
+    for row_number, values in new:
+        if values['username'] not in created:
+            # Taken by a concurrent signup between the check and the insert
+            failures.append((row_number, ["username or email already exists"]))
+        elif not values['password']:
+            invites.append((created[values['username']], values, secrets.token_urlsafe(24)))
+    if invites:
+        connection.execute(PasswordReset.__table__.insert(), [
+            {'user_id': user_id, 'token': token, 'expires_at': now + timedelta(hours=invite_hours),
+             'used': False, 'created_at': now, 'updated_at': now}
+            for user_id, _, token in invites
+        ])
+        enqueue_emails(connection, [
+            account_invite_email(values['email'], values['first_name'], token, invite_hours)
+            for _, values, token in invites
+        ])
+    db.session.commit()
+    totals['created'] += len(created)
+    totals['invited'] += len(invites)
+    return sorted(failures)
+
+if __name__ == "__main__":
+    from app import app, passwords
+
+    parser = argparse.ArgumentParser(description="Import interviewees from a CSV or XLSX file.")
+    parser.add_argument('file')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--errors', help="Write rejected rows and their errors to this CSV file")
+    args = parser.parse_args()
+
+    error_file = open(args.errors, 'w', newline='') if args.errors else None
+    error_writer = csv.writer(error_file) if error_file else None
+    if error_writer:
+        error_writer.writerow(['row', 'errors'])
+    try:
+        with app.app_context(), open(args.file, 'rb') as stream:
+            events = import_candidates(
+                read_rows(stream, os.path.basename(args.file)), passwords,
+                batch_size=args.batch_size, invite_hours=app.config['IMPORT_INVITE_HOURS']
+            )
+            for event in events:
+                if event['event'] == 'error':
+                    if error_writer:
+                        error_writer.writerow([event['row'], '; '.join(event['errors'])])
+                    else:
+                        print(f"Row {event['row']}: {'; '.join(event['errors'])}", file=sys.stderr)
+                else:
+                    print(f"{'Done: ' if event['event'] == 'done' else ''}{event['processed']} rows processed: {event['created']} created "
+                          f"({event['invited']} invited to set a password), {event['failed']} failed")
+    except ImportFileError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if error_file:
+            error_file.close()
@@ -0,0 +1,30 @@
+import sys
+from app import db, app
+from models import CandidateStats
+
+def rebuild():
+    with app.app_context():
+        CandidateStats.rebuild()
+        db.session.commit()
+        print(f"Rebuilt candidate stats for {CandidateStats.query.count()} users")
+
+def check():
+    with app.app_context():
+        mismatches = CandidateStats.check()
+        for mismatch in mismatches:
+            print(f"User {mismatch['user_id']}: stored {mismatch['stored']} expected {mismatch['expected']}")
+        if mismatches:
+            print(f"Found {len(mismatches)} inconsistent candidate stats rows, run 'python candidate_stats.py rebuild' to repair")
+            return 1
+        print("Candidate stats are consistent with submissions")
+        return 0
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command == "rebuild":
+        rebuild()
+    elif command == "check":
+        sys.exit(check())
+    else:
+        print("Usage: python candidate_stats.py [rebuild|check]")
+        sys.exit(2)
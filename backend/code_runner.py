@@ -0,0 +1,224 @@
+import hashlib
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Applies resource limits and then execs the real command; used instead of preexec_fn,
+# which is not safe to use from the runner's worker threads.
+LIMITS_WRAPPER = r'''
+import os, resource, sys
+cpu, memory = int(sys.argv[1]), int(sys.argv[2])
+resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu))
+resource.setrlimit(resource.RLIMIT_FSIZE, (1024 * 1024, 1024 * 1024))
+resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+if memory:
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+os.execv(sys.argv[3], sys.argv[3:])
+'''
+
+# Runs inside the sandboxed interpreter: loads the candidate's solution, calls the entrypoint
+# for every case and prints the results after a marker line. The spec it reads holds only each
+# case's arguments, never the expected outputs, and is kept out of the module globals, so an
+# answer cannot look it up through sys.modules['__main__'].
+PYTHON_HARNESS = r'''
+import json, sys
+
+def main():
+    spec = json.loads(sys.stdin.read())
+    namespace = {"__name__": "solution"}
+    with open("solution.py") as source:
+        exec(compile(source.read(), "solution.py", "exec"), namespace)
+    results = []
+    for case in spec["cases"]:
+        try:
+            results.append({"ok": True, "value": namespace[spec["entrypoint"]](*case["args"])})
+        except BaseException as e:
+            results.append({"ok": False, "error": repr(e)})
+    sys.stdout.write("\n" + spec["marker"] + json.dumps(results, default=repr) + "\n")
+
+main()
+'''
+
+JAVASCRIPT_HARNESS = r'''
+const fs = require("fs");
+const vm = require("vm");
+const spec = JSON.parse(fs.readFileSync(0, "utf8"));
+const context = vm.createContext({console});
+vm.runInContext(fs.readFileSync("solution.js", "utf8"), context, {filename: "solution.js"});
+const results = spec.cases.map((testCase) => {
+  try {
+    return {ok: true, value: context[spec.entrypoint](...testCase.args)};
+  } catch (e) {
+    return {ok: false, error: String(e)};
+  }
+});
+process.stdout.write("\n" + spec.marker + JSON.stringify(results) + "\n");
+'''
+
+LANGUAGES = ('python', 'javascript')
+
+def validate_test_cases(test_cases):
+    """
+    Check a coding question's test cases before they are stored, so grading never meets a spec it
+    cannot run. Raises ValueError describing the first problem.
+    """
+    if not isinstance(test_cases, dict):
+        raise ValueError("test_cases must be an object.")
+    entrypoint = test_cases.get('entrypoint')
+    if not isinstance(entrypoint, str) or not entrypoint.isidentifier():
+        raise ValueError("test_cases.entrypoint must be a function name.")
+    language = test_cases.get('language', 'python')
+    if language not in LANGUAGES:
+        raise ValueError(f"test_cases.language must be one of: {', '.join(LANGUAGES)}.")
+    cases = test_cases.get('cases')
+    if not isinstance(cases, list) or not cases:
+        raise ValueError("test_cases.cases must be a non-empty list.")
+    for case in cases:
+        if not isinstance(case, dict) or 'expected' not in case or not isinstance(case.get('args', []), list):
+            raise ValueError('Each test case must be an object with an "args" list and an "expected" value.')
+
+class CodeRunner:
+    """
+    Bounded pool evaluating coding answers against per-question test cases.
+
+    Each run executes in a fresh subprocess session in a throwaway directory with an empty
+    environment and CPU, memory, file-size and wall-clock limits. At most `workers` runs execute
+    at once. Results are cached by (question, test cases, answer) hash so identical resubmissions
+    are not executed again. The limits bound runaway answers but are not a security boundary,
+    so graders should run in an unprivileged container.
+    """
+
+    def __init__(self, workers=None, time_limit=5, memory_mb=256, cache_size=10000):
+        self.workers = workers or os.cpu_count() or 1
+        self.time_limit = time_limit
+        self.memory_mb = memory_mb
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.cache_lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="code-runner")
+
+    @staticmethod
+    def cache_key(question_id, test_cases, answer_text):
+        digest = hashlib.sha256()
+        digest.update(json.dumps(test_cases, sort_keys=True).encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(answer_text.encode('utf-8'))
+        return question_id, digest.hexdigest()
+
+    def submit(self, question_id, test_cases, answer_text):
+        """Schedule a run; returns a future resolving to {'passed', 'total', 'results'}."""
+        key = self.cache_key(question_id, test_cases, answer_text)
+        with self.cache_lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                future = Future()
+                future.set_result(self.cache[key])
+                return future
+        return self.executor.submit(self._run_and_cache, key, test_cases, answer_text)
+
+    def _run_and_cache(self, key, test_cases, answer_text):
+        outcome = self.run(test_cases, answer_text)
+        with self.cache_lock:
+            self.cache[key] = outcome
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return outcome
+
+    def run(self, test_cases, answer_text):
+        cases = test_cases.get('cases', [])
+        language = test_cases.get('language', 'python')
+        marker = f"__RESULTS_{os.urandom(8).hex()}__"
+        # Only the arguments go to the sandbox; results are compared with the expected values here
+        spec = json.dumps({
+            'entrypoint': test_cases['entrypoint'], 'cases': [{'args': case.get('args', [])} for case in cases],
+            'marker': marker
+        })
+
+        workdir = tempfile.mkdtemp(prefix="code-run-")
+        try:
+            command = self.with_limits(language, self.prepare(language, workdir, answer_text))
+            process = subprocess.Popen(
+                command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                cwd=workdir, env={'PATH': os.environ.get('PATH', ''), 'HOME': workdir}, start_new_session=True
+            )
+            try:
+                stdout, stderr = process.communicate(spec, timeout=self.time_limit)
+                results = self.parse(stdout, marker) or [
+                    {'ok': False, 'error': stderr[-500:] or f"Exited with status {process.returncode}"}
+                ] * len(cases)
+            except subprocess.TimeoutExpired:
+                results = [{'ok': False, 'error': "Time limit exceeded"}] * len(cases)
+            finally:
+                # Kill the whole session so processes forked by the answer do not outlive the run
+                try:
+                    os.killpg(process.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                process.communicate()
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        checked = [
+            {'passed': result.get('ok') and result.get('value') == case.get('expected'),
+             'error': result.get('error')}
+            for case, result in zip(cases, results)
+        ]
+        return {'passed': sum(1 for result in checked if result['passed']), 'total': len(cases), 'results': checked}
+
+    @staticmethod
+    def prepare(language, workdir, answer_text):
+        if language == 'python':
+            filename, harness, command = 'solution.py', PYTHON_HARNESS, [sys.executable, '-I', '-S', 'harness.py']
+        elif language == 'javascript':
+            node = shutil.which('node')
+            if not node:
+                raise RuntimeError("Node.js is required to run javascript answers")
+            filename, harness, command = 'solution.js', JAVASCRIPT_HARNESS, [node, '--max-old-space-size=128', 'harness.js']
+        else:
+            raise ValueError(f"Unsupported language: {language}")
+        with open(os.path.join(workdir, filename), 'w') as solution:
+            solution.write(answer_text)
+        with open(os.path.join(workdir, command[-1]), 'w') as runner:
+            runner.write(harness)
+        return command
+
+    def with_limits(self, language, command):
+        """Prefix a command with the resource-limit wrapper where the platform supports it."""
+        if os.name != 'posix':
+            return command
+        # V8 reserves far more address space than it uses, so node is capped by heap size instead
+        memory = 0 if language == 'javascript' else self.memory_mb * 1024 * 1024
+        return [sys.executable, '-I', '-S', '-c', LIMITS_WRAPPER, str(self.time_limit), str(memory)] + command
+
+    @staticmethod
+    def parse(stdout, marker):
+        for line in reversed(stdout.splitlines()):
+            if line.startswith(marker):
+                try:
+                    return json.loads(line[len(marker):])
+                except ValueError:
+                    return None
+        return None
+
+_runner = None
+_runner_lock = threading.Lock()
+
+def get_runner(config):
+    """Process-wide runner sized from the app config."""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = CodeRunner(
+                workers=config.get('CODE_RUN_WORKERS'),
+                time_limit=config.get('CODE_RUN_TIME_LIMIT', 5),
+                memory_mb=config.get('CODE_RUN_MEMORY_MB', 256),
+                cache_size=config.get('CODE_RUN_CACHE_SIZE', 10000)
+            )
+        return _runner
@@ -0,0 +1,73 @@
+from sqlalchemy import func, select  # type: ignore
+from sqlalchemy.orm import aliased  # type: ignore
+from werkzeug.exceptions import BadRequest  # type: ignore
+from models import Assessment, Invitation, User
+
+# The recruiter who owns the assessment an interviewee was invited to; only recruiters have a company
+Recruiter = aliased(User, name='recruiter')
+
+# Allowed breakdown dimensions; invitation dimensions count invitations rather than users
+DIMENSIONS = {
+    'gender': User.gender,
+    'role': User.role,
+    'consent': User.consent,
+    'company': Recruiter.company_name,
+    'assessment': Invitation.assessment_id,
+    'invitation_status': Invitation.status,
+}
+INVITATION_DIMENSIONS = {'assessment', 'invitation_status', 'company'}
+MAX_DIMENSIONS = 3
+MAX_BREAKDOWNS = 10
+
+class InvalidBreakdown(BadRequest):
+    """Raised for an unknown or oversized ?by= breakdown."""
+
+def breakdowns(args):
+    """
+    Read the requested breakdowns from the request args. ?by= may repeat, one breakdown each, and
+    a comma-separated value cross-tabulates dimensions: ?by=gender&by=assessment,invitation_status.
+    """
+    requested = []
+    for value in args.getlist('by'):
+        dimensions = tuple(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+        unknown = [name for name in dimensions if name not in DIMENSIONS]
+        if unknown or not dimensions:
+            raise InvalidBreakdown(f"Unknown breakdown '{value}'; allowed dimensions are {', '.join(DIMENSIONS)}.")
+        if len(dimensions) > MAX_DIMENSIONS:
+            raise InvalidBreakdown(f"A breakdown can combine at most {MAX_DIMENSIONS} dimensions.")
+        if dimensions not in requested:
+            requested.append(dimensions)
+    if len(requested) > MAX_BREAKDOWNS:
+        raise InvalidBreakdown(f"At most {MAX_BREAKDOWNS} breakdowns can be requested at once.")
+    return requested
+
+def composition_query(dimensions):
+    """
+    One GROUP BY over users (or invitations joined to their users) counting each combination of
+    dimensions. The company is the inviting recruiter's, reached through the invitation's assessment.
+    """
+    columns = [DIMENSIONS[name].label(name) for name in dimensions]
+    if INVITATION_DIMENSIONS.intersection(dimensions):
+        query = select(*columns, func.count()).select_from(Invitation).join(User, User.id == Invitation.interviewee_id)
+        if 'company' in dimensions:
+            query = query.join(Assessment, Assessment.id == Invitation.assessment_id).join(
+                Recruiter, Recruiter.id == Assessment.recruiter_id
+            )
+    else:
+        query = select(*columns, func.count()).select_from(User)
+    # Interviewees only, unless the breakdown is by role itself
+    if 'role' not in dimensions:
+        query = query.where(User.role == 'interviewee')
+    return query.group_by(*columns).order_by(*columns)
+
+def composition_rows(rows, dimensions):
+    return [dict(zip(dimensions, row[:-1]), count=row[-1]) for row in rows]
+
+def cache_key(dimensions):
+    return "composition:" + ",".join(dimensions)
+
+def gender_counts(rows):
+    """The original response shape: interviewee counts per gender."""
+    counts = {'male': 0, 'female': 0, 'other': 0}
+    counts.update((row['gender'], row['count']) for row in rows)
+    return counts
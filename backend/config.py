@@ -12,12 +12,93 @@ class Config:
     # Database configuration
     SQLALCHEMY_DATABASE_URI = os.getenv('SQLALCHEMY_DATABASE_URI', "default_db_url")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_POOL_SIZE = 10
-    SQLALCHEMY_MAX_OVERFLOW = 5
-    SQLALCHEMY_POOL_TIMEOUT = 30
+
+    # Connection pool and session settings (see database.py). Pools are per process, so the app
+    # holds up to WEB_WORKERS * (SQLALCHEMY_POOL_SIZE + SQLALCHEMY_MAX_OVERFLOW) connections
+    SQLALCHEMY_POOL_CLASS = os.getenv('SQLALCHEMY_POOL_CLASS', 'queue')  # 'queue', or 'null' to connect per checkout
+    SQLALCHEMY_POOL_SIZE = int(os.getenv('SQLALCHEMY_POOL_SIZE', 10))
+    SQLALCHEMY_MAX_OVERFLOW = int(os.getenv('SQLALCHEMY_MAX_OVERFLOW', 5))
+    SQLALCHEMY_POOL_TIMEOUT = int(os.getenv('SQLALCHEMY_POOL_TIMEOUT', 30))
+    SQLALCHEMY_POOL_RECYCLE = int(os.getenv('SQLALCHEMY_POOL_RECYCLE', 1800))  # Seconds before a connection is replaced
+    SQLALCHEMY_POOL_PRE_PING = os.getenv('SQLALCHEMY_POOL_PRE_PING', 'True').lower() in ['true', '1', 't']
+    DATABASE_STATEMENT_TIMEOUT_MS = int(os.getenv('DATABASE_STATEMENT_TIMEOUT_MS', 0))  # 0 for no limit
+    DATABASE_APPLICATION_NAME = os.getenv('DATABASE_APPLICATION_NAME', 'smartrecruiter')
+    # Behind PgBouncer in transaction pooling mode: no session state or server-side prepared statements
+    DATABASE_PGBOUNCER = os.getenv('DATABASE_PGBOUNCER', 'False').lower() in ['true', '1', 't']
+    # Direct connection for the notification listener, since LISTEN needs a session of its own
+    DATABASE_LISTEN_URI = os.getenv('DATABASE_LISTEN_URI')
+
+    # Read replicas for the read-only resources (see replicas.py), comma-separated; empty to read from the primary
+    SQLALCHEMY_REPLICA_URIS = [uri.strip() for uri in os.getenv('SQLALCHEMY_REPLICA_URIS', '').split(',') if uri.strip()]
+    REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 5))  # Reads stay on the primary after a client's write
+    REPLICA_HEALTH_INTERVAL = float(os.getenv('REPLICA_HEALTH_INTERVAL', 5))
+    REPLICA_MAX_LAG_SECONDS = float(os.getenv('REPLICA_MAX_LAG_SECONDS', 10))
 
     # Application settings
     PORT = int(os.getenv('PORT', 5555))
+    INVITATION_BATCH_SIZE = int(os.getenv('INVITATION_BATCH_SIZE', 1000))
+
+    # Serving mode (see gunicorn.conf.py): 'sync' serves app:app on sync workers,
+    # 'async' serves asgi:application, with the read-heavy endpoints on an async engine
+    SERVER_MODE = os.getenv('SERVER_MODE', 'sync')
+    WEB_WORKERS = int(os.getenv('WEB_WORKERS', 2 * (os.cpu_count() or 1) + 1))
+    ASYNC_DATABASE_URI = os.getenv('ASYNC_DATABASE_URI')  # Defaults to SQLALCHEMY_DATABASE_URI with an async driver
+    ASYNC_POOL_SIZE = int(os.getenv('ASYNC_POOL_SIZE', 10))
+    ASYNC_MAX_OVERFLOW = int(os.getenv('ASYNC_MAX_OVERFLOW', 5))
+    ASYNC_WSGI_THREADS = int(os.getenv('ASYNC_WSGI_THREADS', 16))  # Threads for routes still served by Flask
+
+    # Password hashing (see passwords.py): new hashes use this scheme and cost, older ones are upgraded at login
+    PASSWORD_HASH_SCHEME = os.getenv('PASSWORD_HASH_SCHEME', 'bcrypt')  # 'bcrypt' or 'pbkdf2'
+    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', 12))
+    PBKDF2_ITERATIONS = int(os.getenv('PBKDF2_ITERATIONS', 600000))
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 256))  # Queued hashes before 503s
+    # Bulk imports hash on their own, smaller pool so logins are not queued behind them
+    PASSWORD_HASH_BULK_WORKERS = int(os.getenv('PASSWORD_HASH_BULK_WORKERS', max(1, (os.cpu_count() or 1) // 2)))
+
+    # JWT revocation (see revocation.py): how often each worker syncs its local filter
+    REVOCATION_SYNC_INTERVAL = float(os.getenv('REVOCATION_SYNC_INTERVAL', 1.0))
+    REVOCATION_REBUILD_INTERVAL = int(os.getenv('REVOCATION_REBUILD_INTERVAL', 600))
+    REVOCATION_BLOOM_CAPACITY = int(os.getenv('REVOCATION_BLOOM_CAPACITY', 100000))
+
+    # Assessment content cache (see cache.py); set CACHE_REDIS_URL to share it between workers
+    CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL')
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 1024))
+    CACHE_PAYLOAD_TTL = int(os.getenv('CACHE_PAYLOAD_TTL', 3600))
+    CACHE_VERSION_TTL = int(os.getenv('CACHE_VERSION_TTL', 5))
+    # Seconds a composition breakdown (see composition.py) is served from the cache
+    COMPOSITION_CACHE_TTL = int(os.getenv('COMPOSITION_CACHE_TTL', 30))
+
+    # Coding answer execution (see code_runner.py); workers default to the host's cores
+    CODE_RUN_WORKERS = int(os.getenv('CODE_RUN_WORKERS', os.cpu_count() or 1))
+    CODE_RUN_TIME_LIMIT = int(os.getenv('CODE_RUN_TIME_LIMIT', 5))  # Seconds per answer
+    CODE_RUN_MEMORY_MB = int(os.getenv('CODE_RUN_MEMORY_MB', 256))
+    CODE_RUN_CACHE_SIZE = int(os.getenv('CODE_RUN_CACHE_SIZE', 10000))
+
+    # Live assessments (see autosave.py): answers are still accepted this long after the time limit
+    SUBMISSION_GRACE_SECONDS = int(os.getenv('SUBMISSION_GRACE_SECONDS', 30))
+
+    # Expiry scheduler (see expiry.py)
+    EXPIRY_REFRESH_INTERVAL = float(os.getenv('EXPIRY_REFRESH_INTERVAL', 60))  # Seconds between database top-ups
+    EXPIRY_HORIZON = int(os.getenv('EXPIRY_HORIZON', 900))  # Seconds ahead that invitation expiries are loaded
+    EXPIRY_BATCH_SIZE = int(os.getenv('EXPIRY_BATCH_SIZE', 500))
+
+    # Candidate import (see candidate_import.py): hours an emailed set-password code stays valid
+    IMPORT_INVITE_HOURS = int(os.getenv('IMPORT_INVITE_HOURS', 72))
+
+    # Notification stream (see notifications.py): seconds between keep-alive comments
+    NOTIFICATION_HEARTBEAT = int(os.getenv('NOTIFICATION_HEARTBEAT', 15))
+
+    # Request, SQL and pool metrics served at /metrics (see metrics.py)
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() in ['true', '1', 't']
+
+    # Slow query log (see slow_queries.py), viewed at /admin/slow-queries
+    SLOW_QUERY_LOG_ENABLED = os.getenv('SLOW_QUERY_LOG_ENABLED', 'True').lower() in ['true', '1', 't']
+    SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', 200))
+    SLOW_QUERY_BUFFER_SIZE = int(os.getenv('SLOW_QUERY_BUFFER_SIZE', 500))
+    SLOW_QUERY_LOG_PATH = os.getenv('SLOW_QUERY_LOG_PATH')  # JSONL file, one line per slow statement
+    SLOW_QUERY_EXPLAIN_RATE = float(os.getenv('SLOW_QUERY_EXPLAIN_RATE', 0))  # Share of slow SELECTs re-run under EXPLAIN ANALYZE
+    SLOW_QUERY_EXPLAIN_INTERVAL = int(os.getenv('SLOW_QUERY_EXPLAIN_INTERVAL', 300))  # Seconds between plans per fingerprint
 
     # Mail server settings
     MAIL_SERVER = os.getenv('MAIL_SERVER', 'smtp.gmail.com')
@@ -25,6 +106,15 @@ class Config:
     MAIL_USE_TLS = os.getenv('MAIL_USE_TLS', 'True').lower() in ['true', '1', 't']
     MAIL_USERNAME = os.getenv('MAIL_USERNAME')
     MAIL_PASSWORD = os.getenv('MAIL_PASSWORD')
+    MAIL_DEFAULT_SENDER = os.getenv('MAIL_DEFAULT_SENDER', MAIL_USERNAME)
+
+    # Outbox delivery worker settings (see mailer.py)
+    MAIL_WORKERS = int(os.getenv('MAIL_WORKERS', 4))
+    MAIL_BATCH_SIZE = int(os.getenv('MAIL_BATCH_SIZE', 50))
+    MAIL_MAX_ATTEMPTS = int(os.getenv('MAIL_MAX_ATTEMPTS', 5))
+    MAIL_RETRY_BACKOFF = int(os.getenv('MAIL_RETRY_BACKOFF', 30))  # Seconds, doubled per attempt
+    MAIL_RATE_LIMIT = float(os.getenv('MAIL_RATE_LIMIT', 10))  # Messages per second per SMTP provider
+    MAIL_POLL_INTERVAL = float(os.getenv('MAIL_POLL_INTERVAL', 2))
 
     # Validation for critical environment variables
     @classmethod
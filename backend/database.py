@@ -0,0 +1,78 @@
+from uuid import uuid4
+from sqlalchemy import event  # type: ignore
+from sqlalchemy.engine import make_url  # type: ignore
+from sqlalchemy.pool import NullPool  # type: ignore
+
+POOL_CLASSES = ('queue', 'null')
+
+def engine_options(config, uri=None):
+    """
+    SQLAlchemy engine options for `uri` (SQLALCHEMY_DATABASE_URI by default) from the
+    SQLALCHEMY_POOL_* and DATABASE_* settings. Flask-SQLAlchemy 3 only reads these through
+    SQLALCHEMY_ENGINE_OPTIONS; the old SQLALCHEMY_POOL_SIZE style keys have no effect on their own.
+    """
+    url = make_url(uri or config['SQLALCHEMY_DATABASE_URI'])
+    pool_class = config.get('SQLALCHEMY_POOL_CLASS', 'queue')
+    if pool_class not in POOL_CLASSES:
+        raise ValueError(f"Unknown SQLALCHEMY_POOL_CLASS: {pool_class}; use {' or '.join(POOL_CLASSES)}")
+    if url.get_backend_name() == 'sqlite':
+        # Flask-SQLAlchemy picks the SQLite pools itself
+        return {}
+
+    options = {}
+    if pool_class == 'null':
+        # A connection per checkout, for when PgBouncer does the pooling
+        options['poolclass'] = NullPool
+    else:
+        options.update(
+            pool_size=config.get('SQLALCHEMY_POOL_SIZE', 10),
+            max_overflow=config.get('SQLALCHEMY_MAX_OVERFLOW', 5),
+            pool_timeout=config.get('SQLALCHEMY_POOL_TIMEOUT', 30),
+            pool_recycle=config.get('SQLALCHEMY_POOL_RECYCLE', 1800),
+            pool_pre_ping=config.get('SQLALCHEMY_POOL_PRE_PING', True),
+        )
+    if url.get_backend_name() == 'postgresql':
+        options['connect_args'] = postgres_connect_args(config, url.get_driver_name())
+    return options
+
+def postgres_connect_args(config, driver):
+    """
+    application_name and statement_timeout as startup parameters. PgBouncer rejects a startup
+    statement_timeout, so with DATABASE_PGBOUNCER it is set per transaction instead (see
+    configure_engine), and asyncpg's server-side prepared statements are turned off: in transaction
+    pooling the next statement may run on a server connection that never prepared it.
+    """
+    name = config.get('DATABASE_APPLICATION_NAME')
+    timeout = config.get('DATABASE_STATEMENT_TIMEOUT_MS', 0)
+    pgbouncer = config.get('DATABASE_PGBOUNCER', False)
+    if driver == 'asyncpg':
+        settings = {}
+        if name:
+            settings['application_name'] = name
+        if timeout and not pgbouncer:
+            settings['statement_timeout'] = str(timeout)
+        args = {'server_settings': settings} if settings else {}
+        if pgbouncer:
+            args.update(
+                statement_cache_size=0,
+                prepared_statement_cache_size=0,
+                prepared_statement_name_func=lambda: f"__asyncpg_{uuid4()}__",
+            )
+        return args
+    # psycopg2 sends every statement unprepared
+    args = {}
+    if name:
+        args['application_name'] = name
+    if timeout and not pgbouncer:
+        args['options'] = f"-c statement_timeout={int(timeout)}"
+    return args
+
+def configure_engine(engine, config):
+    """Per-transaction settings that cannot be startup parameters behind PgBouncer."""
+    timeout = config.get('DATABASE_STATEMENT_TIMEOUT_MS', 0)
+    if engine.dialect.name != 'postgresql' or not (config.get('DATABASE_PGBOUNCER') and timeout):
+        return
+
+    @event.listens_for(engine, 'begin')
+    def set_statement_timeout(connection):
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout)}")
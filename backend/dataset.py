@@ -0,0 +1,341 @@
+"""
+Synthetic dataset generator for load and performance testing.
+
+    python dataset.py --recruiters 500 --candidates 200000 --submissions 2000000 --reset
+
+Rows are generated deterministically from --seed and written straight to the tables: with COPY on
+PostgreSQL, with executemany batches elsewhere. Ids are assigned here, so foreign keys need no
+lookups, and the rollup tables are rebuilt once at the end instead of per row. Every generated
+user's password is --password. Without --reset, rows are appended after the existing ones.
+"""
+import argparse
+import csv
+import io
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, text  # type: ignore
+from models import (
+    db, Answer, Assessment, AssessmentDailyStats, CandidateStats, Feedback, Invitation, Notification, Question,
+    Submission, User
+)
+
+GENDERS = ('male', 'female', 'other')
+FIRST_NAMES = ('Amina', 'Brian', 'Chen', 'Daisy', 'Emeka', 'Fatma', 'George', 'Hana', 'Ivan', 'Joy', 'Kofi', 'Lena')
+LAST_NAMES = ('Otieno', 'Smith', 'Wang', 'Nyaga', 'Okafor', 'Yilmaz', 'Brown', 'Sato', 'Petrov', 'Mwangi')
+COMPANIES = ('Tech Corp', 'Biz Solutions', 'Data Works', 'Cloud Nine', 'Fin Logic')
+CHOICES = {"A": "First option", "B": "Second option", "C": "Third option", "D": "Fourth option"}
+
+class CopyLoader:
+    """Streams rows into PostgreSQL with COPY ... FROM STDIN, one CSV buffer per chunk."""
+
+    def __init__(self, connection, chunk_size):
+        self.cursor = connection.connection.cursor()
+        self.chunk_size = chunk_size
+
+    @staticmethod
+    def cell(value):
+        if value is None:
+            return None
+        if isinstance(value, bool):
+            return 't' if value else 'f'
+        if isinstance(value, datetime):
+            return value.isoformat(sep=' ')
+        if isinstance(value, (dict, list)):
+            return json.dumps(value)
+        return value
+
+    def load(self, table, columns, rows):
+        statement = f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+        count = 0
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            # Unquoted empty fields are NULL in COPY's CSV format
+            writer.writerow(['' if value is None else value for value in map(self.cell, row)])
+            count += 1
+            if count % self.chunk_size == 0:
+                buffer.seek(0)
+                self.cursor.copy_expert(statement, buffer)
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            buffer.seek(0)
+            self.cursor.copy_expert(statement, buffer)
+        return count
+
+class InsertLoader:
+    """Portable fallback: executemany INSERTs of chunk_size rows."""
+
+    def __init__(self, connection, chunk_size):
+        self.connection = connection
+        self.chunk_size = chunk_size
+
+    def load(self, table, columns, rows):
+        insert = table.insert()
+        count = 0
+        chunk = []
+        for row in rows:
+            chunk.append(dict(zip(columns, row)))
+            if len(chunk) >= self.chunk_size:
+                self.connection.execute(insert, chunk)
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            self.connection.execute(insert, chunk)
+            count += len(chunk)
+        return count
+
+class DatasetGenerator:
+    """
+    Generates a consistent dataset: recruiters own assessments with questions, candidates are
+    invited to assessments (one invitation per pair), submissions belong to invited pairs with an
+    answer per question, and a share of submissions get feedback.
+    """
+
+    def __init__(self, recruiters, candidates, assessments, questions, invitations, submissions,
+                 feedback_rate=0.05, notifications=2, trial_rate=0.1, days=365, password_hash='', seed=42):
+        self.recruiters = recruiters
+        self.candidates = candidates
+        self.assessments = assessments
+        self.questions = questions
+        # One invitation per (assessment, candidate) pair
+        self.invitations = min(invitations, assessments * candidates)
+        self.submissions = submissions
+        self.feedback_rate = feedback_rate
+        self.notifications = notifications
+        self.trial_rate = trial_rate
+        self.days = days
+        self.password_hash = password_hash
+        self.seed = seed
+        self.now = datetime.utcnow().replace(microsecond=0)
+
+    def random(self, table):
+        """Independent deterministic stream per table, so changing one count does not reshuffle the rest."""
+        return random.Random(f"{self.seed}:{table}")
+
+    def moment(self, rng):
+        return self.now - timedelta(seconds=rng.randrange(self.days * 86400))
+
+    def users(self, first_id):
+        rng = self.random('users')
+        for index in range(self.recruiters + self.candidates):
+            id = first_id + index
+            recruiter = index < self.recruiters
+            created_at = self.moment(rng)
+            yield (
+                id, f"{'recruiter' if recruiter else 'candidate'}{id}", rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES),
+                f"user{id}@example.com", 'recruiter' if recruiter else 'interviewee', rng.choice(GENDERS),
+                self.password_hash, rng.choice(COMPANIES) if recruiter else None,
+                None if recruiter else rng.random() < 0.9, created_at, created_at
+            )
+
+    def assessment_rows(self, first_id, first_recruiter_id):
+        rng = self.random('assessments')
+        for index in range(self.assessments):
+            trial = rng.random() < self.trial_rate
+            created_at = self.moment(rng)
+            yield (
+                first_id + index, f"{'Trial' if trial else 'Screening'} assessment {first_id + index}",
+                "Generated assessment", first_recruiter_id + index % self.recruiters, rng.choice((30, 45, 60, 90)),
+                rng.random() < 0.8, 1, 'trial' if trial else 'real', created_at, created_at
+            )
+
+    def question_rows(self, first_id, first_assessment_id):
+        rng = self.random('questions')
+        for index in range(self.assessments * self.questions):
+            roll = rng.random()
+            question_type = 'multiple_choice' if roll < 0.7 else 'subjective' if roll < 0.9 else 'coding'
+            created_at = self.moment(rng)
+            yield (
+                first_id + index, first_assessment_id + index // self.questions, question_type,
+                f"Generated {question_type.replace('_', ' ')} question {first_id + index}",
+                CHOICES if question_type == 'multiple_choice' else None,
+                rng.choice(tuple(CHOICES)) if question_type == 'multiple_choice' else None, None, created_at, created_at
+            )
+
+    def pair(self, index):
+        """
+        The (assessment index, candidate index) of invitation `index`. Candidates take turns, and
+        each candidate's rounds visit distinct assessments from a per-candidate offset, so pairs never repeat.
+        """
+        candidate = index % self.candidates
+        round_ = index // self.candidates
+        return (round_ + candidate * 2654435761) % self.assessments, candidate
+
+    def invitation_rows(self, first_id, first_assessment_id, first_candidate_id):
+        rng = self.random('invitations')
+        for index in range(self.invitations):
+            assessment, candidate = self.pair(index)
+            created_at = self.moment(rng)
+            if index < self.submissions:
+                status = 'accepted' if rng.random() < 0.2 else 'completed'
+            else:
+                status = 'pending' if rng.random() < 0.7 else 'expired'
+            expiry_date = created_at + timedelta(days=14)
+            yield (
+                first_id + index, first_assessment_id + assessment, first_candidate_id + candidate, status,
+                expiry_date, created_at, created_at
+            )
+
+    def submission_rows(self, first_id, first_assessment_id, first_candidate_id):
+        rng = self.random('submissions')
+        for index in range(self.submissions):
+            assessment, candidate = self.pair(index % self.invitations)
+            created_at = self.moment(rng)
+            roll = rng.random()
+            # Only a pair's first attempt may still be in progress
+            if roll < 0.03 and index < self.invitations:
+                status, score, submitted_at = 'in_progress', None, None
+            elif roll < 0.3:
+                status, score, submitted_at = 'submitted', None, created_at + timedelta(minutes=rng.randrange(5, 90))
+            else:
+                status, score = 'graded', round(rng.uniform(0, 100), 2)
+                submitted_at = created_at + timedelta(minutes=rng.randrange(5, 90))
+            yield (
+                first_id + index, first_assessment_id + assessment, first_candidate_id + candidate, status, score,
+                submitted_at, created_at, submitted_at or created_at
+            )
+
+    def answer_rows(self, first_id, first_submission_id, first_question_id):
+        rng = self.random('answers')
+        id = first_id
+        for index in range(self.submissions):
+            assessment, _ = self.pair(index % self.invitations)
+            created_at = self.moment(rng)
+            for offset in range(self.questions):
+                correct = rng.random() < 0.6
+                yield (
+                    id, first_submission_id + index, first_question_id + assessment * self.questions + offset,
+                    rng.choice(tuple(CHOICES)), correct, 10.0 if correct else 0.0, created_at, created_at
+                )
+                id += 1
+
+    def feedback_rows(self, first_id, first_submission_id, first_recruiter_id):
+        rng = self.random('feedback')
+        id = first_id
+        for index in range(self.submissions):
+            if rng.random() >= self.feedback_rate:
+                continue
+            assessment, _ = self.pair(index % self.invitations)
+            created_at = self.moment(rng)
+            yield (
+                id, first_submission_id + index, None, first_recruiter_id + assessment % self.recruiters,
+                "Generated feedback", round(rng.uniform(0, 10), 1), created_at, created_at
+            )
+            id += 1
+
+    def notification_rows(self, first_id, first_candidate_id):
+        rng = self.random('notifications')
+        id = first_id
+        for candidate in range(self.candidates):
+            for _ in range(self.notifications):
+                created_at = self.moment(rng)
+                yield (
+                    id, first_candidate_id + candidate, rng.choice(('info', 'info', 'warning')),
+                    "Generated notification", rng.random() < 0.5, created_at, created_at
+                )
+                id += 1
+
+def next_id(connection, model):
+    return (connection.execute(db.select(func.max(model.id))).scalar() or 0) + 1
+
+def reset_sequences(connection, models):
+    """Move PostgreSQL id sequences past the explicitly inserted ids."""
+    for model in models:
+        table = model.__tablename__
+        connection.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 1)) FROM {table}"
+        ))
+
+def generate(generator, chunk_size=50000, log=print):
+    """Load the generated dataset in one transaction and rebuild the rollups; returns {table: rows}."""
+    connection = db.session.connection()
+    postgres = connection.dialect.name == 'postgresql'
+    loader = (CopyLoader if postgres else InsertLoader)(connection, chunk_size)
+    first = {model: next_id(connection, model) for model in (
+        User, Assessment, Question, Invitation, Submission, Answer, Feedback, Notification
+    )}
+    first_recruiter_id = first[User]
+    first_candidate_id = first[User] + generator.recruiters
+    counts = {}
+
+    def load(model, columns, rows):
+        started = time.monotonic()
+        counts[model.__tablename__] = loader.load(model.__table__, columns, rows)
+        log(f"{model.__tablename__}: {counts[model.__tablename__]} rows in {time.monotonic() - started:.1f}s")
+
+    load(User, ['id', 'username', 'first_name', 'last_name', 'email', 'role', 'gender', 'password_hash',
+                'company_name', 'consent', 'created_at', 'updated_at'], generator.users(first[User]))
+    load(Assessment, ['id', 'title', 'description', 'recruiter_id', 'time_limit', 'is_published', 'version', 'kind',
+                      'created_at', 'updated_at'], generator.assessment_rows(first[Assessment], first_recruiter_id))
+    load(Question, ['id', 'assessment_id', 'type', 'text', 'choices', 'correct_answer', 'test_cases',
+                    'created_at', 'updated_at'], generator.question_rows(first[Question], first[Assessment]))
+    load(Invitation, ['id', 'assessment_id', 'interviewee_id', 'status', 'expiry_date', 'created_at', 'updated_at'],
+         generator.invitation_rows(first[Invitation], first[Assessment], first_candidate_id))
+    load(Submission, ['id', 'assessment_id', 'interviewee_id', 'status', 'score', 'submitted_at',
+                      'created_at', 'updated_at'],
+         generator.submission_rows(first[Submission], first[Assessment], first_candidate_id))
+    load(Answer, ['id', 'submission_id', 'question_id', 'answer_text', 'is_correct', 'score', 'created_at', 'updated_at'],
+         generator.answer_rows(first[Answer], first[Submission], first[Question]))
+    load(Feedback, ['id', 'submission_id', 'question_id', 'recruiter_id', 'text', 'score', 'created_at', 'updated_at'],
+         generator.feedback_rows(first[Feedback], first[Submission], first_recruiter_id))
+    load(Notification, ['id', 'user_id', 'type', 'message', 'is_read', 'created_at', 'updated_at'],
+         generator.notification_rows(first[Notification], first_candidate_id))
+
+    started = time.monotonic()
+    CandidateStats.rebuild(connection)
+    AssessmentDailyStats.rebuild(connection)
+    log(f"Rebuilt rollups in {time.monotonic() - started:.1f}s")
+    if postgres:
+        reset_sequences(connection, (User, Assessment, Question, Invitation, Submission, Answer, Feedback, Notification))
+    db.session.commit()
+    if postgres:
+        # Fresh statistics so the planner sees the new table sizes
+        with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as autocommit:
+            autocommit.execute(text("ANALYZE"))
+    return counts
+
+if __name__ == "__main__":
+    from app import app, passwords
+
+    parser = argparse.ArgumentParser(description="Bulk-load a synthetic dataset for benchmarking.")
+    parser.add_argument('--recruiters', type=int, default=50)
+    parser.add_argument('--candidates', type=int, default=10000)
+    parser.add_argument('--assessments', type=int, help="Defaults to 4 per recruiter")
+    parser.add_argument('--questions', type=int, default=10, help="Questions per assessment")
+    parser.add_argument('--invitations', type=int, help="Defaults to the number of submissions")
+    parser.add_argument('--submissions', type=int, default=50000)
+    parser.add_argument('--feedback-rate', type=float, default=0.05)
+    parser.add_argument('--notifications', type=int, default=2, help="Notifications per candidate")
+    parser.add_argument('--days', type=int, default=365, help="Spread creation dates over this many days")
+    parser.add_argument('--password', default='password')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--reset', action='store_true', help="Drop and recreate all tables first")
+    args = parser.parse_args()
+
+    if args.recruiters < 1 or args.candidates < 1:
+        parser.error("--recruiters and --candidates must be at least 1")
+    with app.app_context():
+        if args.reset:
+            db.drop_all(bind_key=None)  # Replicas get the schema through replication
+            db.create_all(bind_key=None)
+            print("Recreated all tables")
+        generator = DatasetGenerator(
+            recruiters=args.recruiters,
+            candidates=args.candidates,
+            assessments=args.assessments or args.recruiters * 4,
+            questions=args.questions,
+            invitations=args.invitations or max(args.submissions, 1),
+            submissions=args.submissions,
+            feedback_rate=args.feedback_rate,
+            notifications=args.notifications,
+            days=args.days,
+            password_hash=passwords.hash(args.password),
+            seed=args.seed
+        )
+        started = time.monotonic()
+        counts = generate(generator, chunk_size=args.chunk_size)
+        print(f"Loaded {sum(counts.values())} rows in {time.monotonic() - started:.1f}s")
@@ -0,0 +1,192 @@
+import heapq
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from models import db, Assessment, AssessmentDailyStats, CandidateStats, Invitation, Submission
+from grading import AnswerKey, grade_submission
+from notifications import notify
+
+logger = logging.getLogger(__name__)
+
+INVITATION = 'invitation'
+SUBMISSION = 'submission'
+
+class ExpiryScheduler:
+    """
+    Expires pending invitations at their expiry date and auto-submits in-progress submissions
+    when their time limit (plus SUBMISSION_GRACE_SECONDS) runs out.
+
+    Upcoming deadlines are kept in a min-heap of (due, kind, id), built from the database on start.
+    Every `refresh_interval` seconds it is topped up with invitations expiring within `horizon`
+    (a range scan of the partial pending-expiry index) and submissions started since the last
+    refresh. Between refreshes the thread sleeps until the earliest deadline, then applies all
+    due entries with one conditional UPDATE per kind. The UPDATE rechecks the status, so entries
+    made stale by an accepted invitation or a manual submit do nothing, and several schedulers
+    can run side by side.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        config = app.config
+        self.refresh_interval = config['EXPIRY_REFRESH_INTERVAL']
+        self.horizon = timedelta(seconds=config['EXPIRY_HORIZON'])
+        self.batch_size = config['EXPIRY_BATCH_SIZE']
+        self.grace = timedelta(seconds=config['SUBMISSION_GRACE_SECONDS'])
+        self.heap = []
+        # Current due time per (kind, id); heap entries that disagree are stale and skipped
+        self.scheduled = {}
+        self.last_submission_id = 0
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="expiry-scheduler", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=None):
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def run(self):
+        with self.app.app_context():
+            next_refresh = 0
+            while not self.stopping.is_set():
+                try:
+                    if time.monotonic() >= next_refresh:
+                        self.refresh()
+                        next_refresh = time.monotonic() + self.refresh_interval
+                    self.fire_due()
+                except Exception:
+                    logger.exception("Expiry scheduler iteration failed")
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+                self.stopping.wait(self.seconds_until_due(next_refresh - time.monotonic()))
+
+    def seconds_until_due(self, until_refresh):
+        if not self.heap:
+            return max(until_refresh, 0)
+        until_due = (self.heap[0][0] - datetime.utcnow()).total_seconds()
+        return max(min(until_refresh, until_due), 0)
+
+    def schedule(self, kind, id, due):
+        if self.scheduled.get((kind, id)) == due:
+            return
+        self.scheduled[(kind, id)] = due
+        heapq.heappush(self.heap, (due, kind, id))
+
+    def refresh(self):
+        """Add deadlines due within the horizon (overdue ones included) to the heap."""
+        until = datetime.utcnow() + self.horizon
+        for id, expiry_date in db.session.query(Invitation.id, Invitation.expiry_date).filter(
+            Invitation.status == 'pending', Invitation.expiry_date <= until
+        ):
+            self.schedule(INVITATION, id, expiry_date)
+
+        # Live attempts are few and their time limits short, so each one is scheduled once, as it is seen
+        for id, created_at, time_limit in db.session.query(
+            Submission.id, Submission.created_at, Assessment.time_limit
+        ).join(Assessment, Assessment.id == Submission.assessment_id).filter(
+            Submission.status == 'in_progress', Submission.id > self.last_submission_id
+        ).order_by(Submission.id):
+            self.last_submission_id = id
+            if time_limit and created_at:
+                self.schedule(SUBMISSION, id, created_at + timedelta(minutes=time_limit) + self.grace)
+        db.session.commit()
+
+    def pop_due(self, now):
+        due = {INVITATION: [], SUBMISSION: []}
+        count = 0
+        while self.heap and self.heap[0][0] <= now and count < self.batch_size:
+            when, kind, id = heapq.heappop(self.heap)
+            if self.scheduled.get((kind, id)) != when:
+                continue
+            del self.scheduled[(kind, id)]
+            due[kind].append(id)
+            count += 1
+        return due
+
+    def fire_due(self):
+        """Apply up to batch_size due entries; returns (invitations expired, submissions auto-submitted)."""
+        now = datetime.utcnow()
+        due = self.pop_due(now)
+        expired = self.expire_invitations(due[INVITATION], now) if due[INVITATION] else 0
+        submitted = self.submit_overdue(due[SUBMISSION], now) if due[SUBMISSION] else 0
+        if expired or submitted:
+            logger.info("Expired %s invitations, auto-submitted %s submissions", expired, submitted)
+        return expired, submitted
+
+    def expire_invitations(self, ids, now):
+        table = Invitation.__table__
+        result = db.session.execute(
+            table.update()
+            .where(table.c.id.in_(ids), table.c.status == 'pending', table.c.expiry_date <= now)
+            .values(status='expired', updated_at=now)
+        )
+        db.session.commit()
+        return result.rowcount
+
+    def submit_overdue(self, ids, now):
+        # The time limit may have been raised since the entry was scheduled; such submissions go back on the heap
+        overdue = []
+        for id, created_at, time_limit in db.session.query(
+            Submission.id, Submission.created_at, Assessment.time_limit
+        ).join(Assessment, Assessment.id == Submission.assessment_id).filter(
+            Submission.id.in_(ids), Submission.status == 'in_progress'
+        ):
+            if not time_limit:
+                continue
+            deadline = created_at + timedelta(minutes=time_limit) + self.grace
+            if deadline > now:
+                self.schedule(SUBMISSION, id, deadline)
+            else:
+                overdue.append(id)
+        if not overdue:
+            db.session.commit()
+            return 0
+
+        table = Submission.__table__
+        closed = db.session.execute(
+            table.update()
+            .where(table.c.id.in_(overdue), table.c.status == 'in_progress')
+            .values(status='submitted', submitted_at=now, updated_at=now)
+            .returning(table.c.id, table.c.assessment_id, table.c.interviewee_id)
+        ).all()
+        if not closed:
+            db.session.commit()
+            return 0
+        # The bulk update bypasses the flush listeners, so count the new submissions into the rollups here
+        connection = db.session.connection()
+        counts = {}
+        for _, assessment_id, _ in closed:
+            counts[assessment_id] = counts.get(assessment_id, 0) + 1
+        AssessmentDailyStats.apply_deltas(connection, {
+            (assessment_id, now.date()): {'submission_count': count, 'scored_count': 0, 'score_sum': 0.0}
+            for assessment_id, count in counts.items()
+        })
+        CandidateStats.rebuild(connection, {interviewee_id for _, _, interviewee_id in closed})
+        # Grade through the ORM so scores reach the candidate_stats rollup; one answer key per assessment
+        answer_keys = {}
+        for submission in Submission.query.filter(Submission.id.in_([id for id, _, _ in closed])):
+            if submission.assessment_id not in answer_keys:
+                answer_keys[submission.assessment_id] = AnswerKey(submission.assessment_id)
+            notify(submission.interviewee_id, "Your time ran out; your saved answers were submitted.")
+            grade_submission(submission, answer_keys[submission.assessment_id])
+        db.session.commit()
+        return len(closed)
+
+if __name__ == "__main__":
+    from app import app
+
+    logging.basicConfig(level=logging.INFO)
+    scheduler = ExpiryScheduler(app)
+    scheduler.start()
+    print("Expiry scheduler started")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("Stopping expiry scheduler")
+        scheduler.stop(timeout=30)
@@ -0,0 +1,149 @@
+import csv
+import io
+import json
+from itertools import groupby
+from flask import Response, stream_with_context  # type: ignore
+from sqlalchemy import select  # type: ignore
+from models import db, Answer, Feedback, Submission, User
+
+FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+CSV_COLUMNS = [
+    'submission_id', 'interviewee_id', 'username', 'first_name', 'last_name', 'email',
+    'status', 'score', 'submitted_at', 'question_id', 'answer', 'is_correct', 'answer_score',
+    'feedback', 'feedback_score',
+]
+
+# Flush the response buffer once it holds this many characters
+CHUNK_SIZE = 64 * 1024
+
+def isoformat(value):
+    return value.isoformat() if value else None
+
+def submission_records(assessment_id, batch_size=1000):
+    """
+    Yield one dict per submission of an assessment, with its candidate, answers and feedback.
+    Answers and feedback are read through two server-side cursors ordered by submission and
+    merged here, so memory holds one submission at a time however large the assessment is.
+    """
+    rows = db.session.execute(
+        select(
+            Submission.id, Submission.status, Submission.score, Submission.submitted_at,
+            User.id, User.username, User.first_name, User.last_name, User.email,
+            Answer.question_id, Answer.answer_text, Answer.is_correct, Answer.score
+        )
+        .join(User, User.id == Submission.interviewee_id)
+        .outerjoin(Answer, Answer.submission_id == Submission.id)
+        .where(Submission.assessment_id == assessment_id)
+        .order_by(Submission.id, Answer.question_id)
+        .execution_options(yield_per=batch_size)
+    )
+    feedback_rows = db.session.execute(
+        select(Feedback.submission_id, Feedback.question_id, Feedback.text, Feedback.score)
+        .join(Submission, Submission.id == Feedback.submission_id)
+        .where(Submission.assessment_id == assessment_id)
+        .order_by(Feedback.submission_id, Feedback.id)
+        .execution_options(yield_per=batch_size)
+    )
+    feedback_groups = groupby(feedback_rows, key=lambda row: row[0])
+    pending_feedback = next(feedback_groups, None)
+
+    for submission_id, group in groupby(rows, key=lambda row: row[0]):
+        group = list(group)
+        first = group[0]
+        # Advance the feedback cursor to this submission; both are ordered by submission id
+        while pending_feedback is not None and pending_feedback[0] < submission_id:
+            pending_feedback = next(feedback_groups, None)
+        feedback = []
+        if pending_feedback is not None and pending_feedback[0] == submission_id:
+            feedback = [{'question_id': row[1], 'text': row[2], 'score': row[3]} for row in pending_feedback[1]]
+            pending_feedback = next(feedback_groups, None)
+
+        yield {
+            'submission_id': submission_id,
+            'status': first[1],
+            'score': first[2],
+            'submitted_at': isoformat(first[3]),
+            'interviewee': {
+                'id': first[4], 'username': first[5], 'first_name': first[6], 'last_name': first[7], 'email': first[8],
+            },
+            'answers': [
+                {'question_id': row[9], 'answer_text': row[10], 'is_correct': row[11], 'score': row[12]}
+                for row in group if row[9] is not None
+            ],
+            'feedback': feedback,
+        }
+
+def csv_cell(value):
+    """Keep spreadsheet programs from evaluating candidate text as a formula."""
+    if isinstance(value, str) and value[:1] in ('=', '+', '-', '@', '\t', '\r'):
+        return "'" + value
+    return value
+
+def csv_rows(record):
+    """
+    Flatten a submission record into CSV rows: one per answer, carrying that question's feedback,
+    plus one for feedback on the submission as a whole. A submission without either still gets a row.
+    """
+    interviewee = record['interviewee']
+    submission = [
+        record['submission_id'], interviewee['id'], interviewee['username'], interviewee['first_name'],
+        interviewee['last_name'], interviewee['email'], record['status'], record['score'], record['submitted_at'],
+    ]
+    feedback_by_question = {}
+    for feedback in record['feedback']:
+        feedback_by_question.setdefault(feedback['question_id'], []).append(feedback)
+
+    def feedback_columns(feedback):
+        if not feedback:
+            return [None, None]
+        return ["\n".join(item['text'] for item in feedback), feedback[-1]['score']]
+
+    for answer in record['answers']:
+        yield submission + [
+            answer['question_id'], answer['answer_text'], answer['is_correct'], answer['score']
+        ] + feedback_columns(feedback_by_question.pop(answer['question_id'], None))
+    # Submission-wide feedback, and feedback on questions left unanswered
+    for question_id, feedback in feedback_by_question.items():
+        yield submission + [question_id, None, None, None] + feedback_columns(feedback)
+    if not record['answers'] and not feedback_by_question:
+        yield submission + [None] * 6
+
+def csv_chunks(records):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    # The header goes out at once so the download starts before the first query returns
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    for record in records:
+        for row in csv_rows(record):
+            writer.writerow([csv_cell(value) for value in row])
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def ndjson_chunks(records):
+    chunk = []
+    size = 0
+    for record in records:
+        line = json.dumps(record) + "\n"
+        chunk.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield "".join(chunk)
+            chunk, size = [], 0
+    yield "".join(chunk)
+
+def export_response(assessment_id, format='csv', batch_size=1000):
+    """Streaming download of an assessment's submissions as CSV or newline-delimited JSON."""
+    records = submission_records(assessment_id, batch_size)
+    chunks = csv_chunks(records) if format == 'csv' else ndjson_chunks(records)
+    return Response(
+        stream_with_context(chunks),
+        mimetype=FORMATS[format],
+        headers={'Content-Disposition': f'attachment; filename=assessment-{assessment_id}-submissions.{format}'}
+    )
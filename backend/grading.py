@@ -0,0 +1,192 @@
+import json
+import logging
+import sys
+from datetime import datetime
+from flask import current_app  # type: ignore
+from sqlalchemy import update  # type: ignore
+from code_runner import get_runner
+from models import db, Answer, AssessmentDailyStats, CandidateStats, Question, Submission
+from notifications import notify
+
+logger = logging.getLogger(__name__)
+
+# Points awarded for a fully correct answer; coding answers earn a share per passing test case
+QUESTION_POINTS = 10.0
+
+def normalize(value):
+    return str(value).strip().casefold()
+
+def load_choices(choices):
+    """Question.choices may hold a JSON-encoded string rather than a JSON value."""
+    if isinstance(choices, str):
+        try:
+            return json.loads(choices)
+        except ValueError:
+            return None
+    return choices
+
+def accepted_answers(question):
+    """
+    Normalized answer texts counted as correct for a multiple-choice question.
+    With labelled choices ({"A": "3", "B": "4"}) both the label and the choice text are accepted.
+    """
+    if question.correct_answer is None:
+        return frozenset()
+    correct = normalize(question.correct_answer)
+    accepted = {correct}
+    choices = load_choices(question.choices)
+    if isinstance(choices, dict):
+        for label, text in choices.items():
+            if normalize(label) == correct or normalize(text) == correct:
+                accepted.update((normalize(label), normalize(text)))
+    return frozenset(accepted)
+
+class AnswerKey:
+    """In-memory answer key for one assessment, built from a single query over its questions."""
+
+    def __init__(self, assessment_id, runner=None):
+        questions = Question.query.filter_by(assessment_id=assessment_id).all()
+        self.assessment_id = assessment_id
+        self.multiple_choice = {
+            question.id: accepted_answers(question) for question in questions if question.type == 'multiple_choice'
+        }
+        self.coding = {
+            question.id: question.test_cases for question in questions
+            if question.type == 'coding' and isinstance(question.test_cases, dict) and question.test_cases.get('cases')
+        }
+        self.runner = runner or (get_runner(current_app.config) if self.coding else None)
+        # Subjective questions and coding questions without test cases still need a reviewer
+        self.fully_automatic = len(self.multiple_choice) + len(self.coding) == len(questions)
+        self.possible_points = QUESTION_POINTS * (len(self.multiple_choice) + len(self.coding))
+
+    def grade(self, answers):
+        """
+        Score (answer_id, question_id, answer_text) rows in one pass; coding answers run in parallel
+        on the code runner pool. Returns (answer updates for a bulk UPDATE, submission score or None).
+        """
+        return self.finish(self.start(answers))
+
+    def start(self, answers):
+        """Score multiple-choice answers and schedule coding runs without waiting for them."""
+        answer_updates = []
+        runs = []
+        earned = 0.0
+        for answer_id, question_id, answer_text in answers:
+            if question_id in self.coding:
+                runs.append((answer_id, self.runner.submit(question_id, self.coding[question_id], answer_text)))
+                continue
+            accepted = self.multiple_choice.get(question_id)
+            if accepted is None:
+                continue
+            is_correct = normalize(answer_text) in accepted
+            score = QUESTION_POINTS if is_correct else 0.0
+            earned += score
+            answer_updates.append({'id': answer_id, 'is_correct': is_correct, 'score': score, 'grading_error': None})
+        return answer_updates, runs, earned
+
+    def finish(self, pending):
+        """
+        Collect the coding runs scheduled by start() and compute the submission score.
+        An answer whose run fails scores 0 with its grading_error set, instead of failing the submission.
+        """
+        answer_updates, runs, earned = pending
+        for answer_id, run in runs:
+            try:
+                outcome = run.result()
+            except Exception as e:
+                logger.warning("Could not run coding answer %s: %r", answer_id, e)
+                answer_updates.append({'id': answer_id, 'is_correct': False, 'score': 0.0, 'grading_error': str(e) or repr(e)})
+                continue
+            score = round(QUESTION_POINTS * outcome['passed'] / outcome['total'], 2)
+            earned += score
+            answer_updates.append({
+                'id': answer_id, 'is_correct': outcome['passed'] == outcome['total'], 'score': score, 'grading_error': None
+            })
+
+        if not self.fully_automatic or not self.possible_points:
+            return answer_updates, None
+        # Unanswered questions count as wrong; the score is a percentage like manual grades
+        return answer_updates, round(100 * earned / self.possible_points, 2)
+
+def grade_submission(submission, answer_key=None):
+    """
+    Grade the automatically gradable answers of one submission. The caller commits.
+    The submission is scored and marked graded only if every question could be graded automatically.
+    Coding answers are evaluated against their question's test cases.
+    """
+    answer_key = answer_key or AnswerKey(submission.assessment_id)
+    answers = db.session.query(Answer.id, Answer.question_id, Answer.answer_text).filter(
+        Answer.submission_id == submission.id
+    ).all()
+    answer_updates, score = answer_key.grade(answers)
+    if answer_updates:
+        db.session.execute(update(Answer), answer_updates)
+    if score is not None:
+        # Set through the ORM so the candidate_stats rollup sees the change
+        submission.score = score
+        submission.status = 'graded'
+        notify(submission.interviewee_id, "Your assessment has been graded.")
+    return score
+
+def regrade_assessment(assessment_id, batch_size=500):
+    """
+    Regrade every submitted or graded submission of an assessment, e.g. after an answer-key change.
+    The answer key is loaded once; answers and submissions are updated in bulk per batch.
+    Returns the number of submissions regraded.
+    """
+    answer_key = AnswerKey(assessment_id)
+    last_id = 0
+    regraded = 0
+    rescored = False
+    while True:
+        submissions = db.session.query(Submission.id, Submission.interviewee_id).filter(
+            Submission.assessment_id == assessment_id,
+            Submission.status.in_(['submitted', 'graded']),
+            Submission.id > last_id
+        ).order_by(Submission.id).limit(batch_size).all()
+        if not submissions:
+            break
+        last_id = submissions[-1].id
+        submission_ids = [submission.id for submission in submissions]
+
+        answers_by_submission = {}
+        for answer in db.session.query(Answer.submission_id, Answer.id, Answer.question_id, Answer.answer_text).filter(
+            Answer.submission_id.in_(submission_ids)
+        ):
+            answers_by_submission.setdefault(answer.submission_id, []).append(answer[1:])
+
+        answer_updates = []
+        submission_updates = []
+        now = datetime.utcnow()
+        # Schedule every coding run of the batch before waiting, so they share the runner pool
+        pending = [answer_key.start(answers_by_submission.get(submission_id, [])) for submission_id in submission_ids]
+        for submission_id, started in zip(submission_ids, pending):
+            updates, score = answer_key.finish(started)
+            answer_updates.extend(updates)
+            if score is not None:
+                submission_updates.append({'id': submission_id, 'score': score, 'status': 'graded', 'updated_at': now})
+
+        if answer_updates:
+            db.session.execute(update(Answer), answer_updates)
+        if submission_updates:
+            db.session.execute(update(Submission), submission_updates)
+            # Bulk updates bypass the flush listener, so refresh the affected rollup rows directly
+            CandidateStats.rebuild(db.session.connection(), {submission.interviewee_id for submission in submissions})
+            rescored = True
+        db.session.commit()
+        regraded += len(submission_ids)
+    if rescored:
+        # Rebuilt from every submission of the assessment, so once after all batches rather than per batch
+        AssessmentDailyStats.rebuild(db.session.connection(), [assessment_id])
+        db.session.commit()
+    return regraded
+
+if __name__ == "__main__":
+    from app import app
+
+    if len(sys.argv) != 3 or sys.argv[1] != "regrade":
+        print("Usage: python grading.py regrade <assessment_id>")
+        sys.exit(2)
+    with app.app_context():
+        count = regrade_assessment(int(sys.argv[2]))
+        print(f"Regraded {count} submissions")
@@ -0,0 +1,13 @@
+# Gunicorn settings; SERVER_MODE picks the sync Flask app or the async ASGI entry point
+from config import Config
+
+bind = f"0.0.0.0:{Config.PORT}"
+workers = Config.WEB_WORKERS
+
+if Config.SERVER_MODE == 'async':
+    wsgi_app = "asgi:application"
+    worker_class = "uvicorn.workers.UvicornWorker"
+elif Config.SERVER_MODE == 'sync':
+    wsgi_app = "app:app"
+else:
+    raise ValueError(f"Unknown SERVER_MODE: {Config.SERVER_MODE}")
@@ -0,0 +1,97 @@
+"""
+Read-only listings served by both server modes: the Flask resources call these with db.session, and
+asgi.AsyncAPI runs the same functions on its async engine through AsyncSession.run_sync, so the
+queries and response shapes are defined once.
+"""
+from sqlalchemy import select  # type: ignore
+from werkzeug.exceptions import NotFound  # type: ignore
+from composition import composition_query, composition_rows, gender_counts
+from models import Assessment, AssessmentDailyStats, CandidateStats, Invitation, Question, User
+from pagination import keyset_paginate_select, wants_cursor
+from performance import statistics_args, summarize
+
+def offset_page(session, statement, args):
+    """
+    Page/per_page pagination like Flask-SQLAlchemy's paginate(), without its COUNT query.
+    Raises NotFound where paginate() would 404: invalid arguments or an empty page past the first.
+    """
+    page = args.get('page', 1, type=int)
+    per_page = args.get('per_page', 10, type=int)
+    if page < 1 or per_page < 1:
+        raise NotFound()
+    items = session.scalars(statement.limit(per_page).offset((page - 1) * per_page)).all()
+    if not items and page != 1:
+        raise NotFound()
+    return items
+
+def assessments_payload(session, args):
+    if wants_cursor(args):
+        # Keyset pagination: seeks on (created_at, id), no OFFSET or COUNT(*)
+        assessments, pagination = keyset_paginate_select(session, select(Assessment), Assessment, args)
+        return {
+            "data": [assessment.to_dict() for assessment in assessments],
+            "pagination": pagination
+        }
+    return [assessment.to_dict() for assessment in offset_page(session, select(Assessment), args)]
+
+def questions_payload(session, args, assessment_id):
+    statement = select(Question).where(Question.assessment_id == assessment_id)
+    if wants_cursor(args):
+        questions, pagination = keyset_paginate_select(session, statement, Question, args)
+        return {
+            "data": [question.to_dict() for question in questions],
+            "pagination": pagination
+        }
+    return [question.to_dict() for question in offset_page(session, statement, args)]
+
+def invitations_payload(session, args):
+    if wants_cursor(args):
+        invitations, pagination = keyset_paginate_select(session, select(Invitation), Invitation, args)
+        return {
+            "message": "Invitations retrieved successfully.",
+            "data": [invitation.to_dict() for invitation in invitations],
+            "pagination": pagination
+        }
+    return {
+        "message": "Invitations retrieved successfully.",
+        "data": [invitation.to_dict() for invitation in offset_page(session, select(Invitation), args)]
+    }
+
+def interviewee_status_payload(session):
+    """Every interviewee with their average score (one grouped query) and qualification status."""
+    interviewees = session.execute(
+        select(User.id, User.first_name, User.last_name).where(User.role == 'interviewee')
+    ).all()
+    average_scores = {
+        user_id: round(float(average), 2) for user_id, average in session.execute(
+            select(CandidateStats.user_id, CandidateStats.average_score).join(
+                User, User.id == CandidateStats.user_id
+            ).where(User.role == 'interviewee', CandidateStats.scored_count > 0)
+        )
+    }
+    interviewee_status = []
+    for interviewee in interviewees:
+        average_score = average_scores.get(interviewee.id, 0)
+        interviewee_status.append({
+            "id": interviewee.id,
+            "name": f"{interviewee.first_name} {interviewee.last_name}",
+            "average_score": average_score,
+            "status": "Qualified" if average_score >= 50 else "Not Qualified"
+        })
+    return interviewee_status
+
+# Read when no ?by= breakdown is requested
+DEFAULT_BREAKDOWNS = [('gender',)]
+
+def breakdown_rows(session, dimensions):
+    return composition_rows(session.execute(composition_query(dimensions)).all(), dimensions)
+
+def composition_payload(requested, rows):
+    """The composition response from the rows of each breakdown in `requested or DEFAULT_BREAKDOWNS`, in order."""
+    if not requested:
+        return gender_counts(rows[0])
+    return {','.join(dimensions): breakdown for dimensions, breakdown in zip(requested, rows)}
+
+def statistics_payload(session, args):
+    start, end, period = statistics_args(args)
+    return summarize(session.execute(AssessmentDailyStats.totals_query(start, end)).all(), period)
@@ -0,0 +1,204 @@
+"""
+Load test comparing the serving modes (see gunicorn.conf.py) and worker counts.
+
+For each mode and worker count, starts gunicorn, holds N concurrent keep-alive clients against
+one endpoint for a fixed duration and reports throughput, latency percentiles, errors and the
+server's total resident memory. On PostgreSQL it also reports the peak number of server
+connections the app held, against max_connections. Run against a seeded database:
+
+    python loadtest.py --path /assessments --workers 2 --concurrency 50,200,500 --duration 10
+
+Pool settings (see database.py) are passed through --env, e.g. to compare the default pools with
+NullPool behind PgBouncer as workers are added:
+
+    python loadtest.py --modes sync --workers 2,8,32 --concurrency 200
+    python loadtest.py --modes sync --workers 2,8,32 --concurrency 200 --env SQLALCHEMY_POOL_CLASS=null \
+        --env DATABASE_PGBOUNCER=true --env SQLALCHEMY_DATABASE_URI=postgresql://app@localhost:6432/app
+"""
+import argparse
+import http.client
+import os
+import subprocess
+import sys
+import threading
+import time
+
+def process_tree_rss(pid):
+    """Resident memory in MB of a process and all of its descendants (Linux /proc)."""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as stat:
+                    parent = int(stat.read().rsplit(')', 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(parent, []).append(int(entry))
+    total_kb, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        pending.extend(children.get(current, []))
+        try:
+            with open(f'/proc/{current}/status') as status:
+                total_kb += next(int(line.split()[1]) for line in status if line.startswith('VmRSS:'))
+        except (OSError, StopIteration):
+            pass
+    return total_kb / 1024
+
+def start_server(mode, workers, port, extra_env=None):
+    env = dict(os.environ, SERVER_MODE=mode, **(extra_env or {}))
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}',
+         '--workers', str(workers), '--backlog', '4096'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    # The master binds the port before its workers have imported the app, so wait for a response;
+    # many workers take a while to boot, and the first requests would otherwise queue behind them
+    deadline = time.monotonic() + 30 + workers
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            connection.request('GET', '/')
+            if connection.getresponse().status == 200:
+                connection.close()
+                return server
+            connection.close()
+        except OSError:
+            pass
+        time.sleep(0.2)
+    server.kill()
+    raise RuntimeError(f"{mode} server did not start")
+
+def run_clients(port, path, headers, concurrency, duration):
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client():
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        local = []
+        while time.monotonic() < deadline:
+            started = time.monotonic()
+            try:
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                if response.status >= 400:
+                    raise http.client.HTTPException(response.status)
+                local.append(time.monotonic() - started)
+            except (OSError, http.client.HTTPException):
+                with lock:
+                    errors[0] += 1
+                connection.close()
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        connection.close()
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(concurrency)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    latencies.sort()
+
+    def percentile(fraction):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))] * 1000 if latencies else 0.0
+
+    return len(latencies) / elapsed, percentile(0.5), percentile(0.99), errors[0]
+
+class ConnectionSampler:
+    """Polls pg_stat_activity for the app's server connections while a run is in progress."""
+
+    def __init__(self, uri, application_name, interval=0.25):
+        from sqlalchemy import create_engine, text  # type: ignore
+        from sqlalchemy.pool import NullPool  # type: ignore
+
+        self.engine = create_engine(uri, poolclass=NullPool)
+        self.query = text("SELECT count(*) FROM pg_stat_activity WHERE application_name = :name")
+        self.application_name = application_name
+        self.interval = interval
+        with self.engine.connect() as connection:
+            self.max_connections = int(connection.exec_driver_sql("SHOW max_connections").scalar())
+        self.peak = 0
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def __enter__(self):
+        self.peak = 0
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopping.set()
+        self.thread.join()
+
+    def run(self):
+        with self.engine.connect() as connection:
+            while not self.stopping.is_set():
+                count = connection.execute(self.query, {'name': self.application_name}).scalar()
+                self.peak = max(self.peak, count)
+                connection.rollback()
+                self.stopping.wait(self.interval)
+
+def connection_sampler():
+    """A sampler when the app runs on PostgreSQL (queried directly, not through PgBouncer), else None."""
+    from config import Config
+
+    uri = os.getenv('LOADTEST_DATABASE_URI', Config.SQLALCHEMY_DATABASE_URI)
+    if not uri.startswith('postgresql'):
+        return None
+    return ConnectionSampler(uri, Config.DATABASE_APPLICATION_NAME)
+
+def access_token(user_id):
+    from flask_jwt_extended import create_access_token  # type: ignore
+    from app import app
+    from models import User
+
+    with app.app_context():
+        user_id = user_id or User.query.filter_by(role='recruiter').with_entities(User.id).limit(1).scalar()
+        if user_id is None:
+            raise SystemExit("No recruiter found; seed the database or pass --user-id")
+        return create_access_token(identity=user_id)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare serving modes and worker counts under concurrent load.")
+    parser.add_argument('--path', default='/assessments')
+    parser.add_argument('--modes', default='sync,async')
+    parser.add_argument('--workers', default='2', help="Comma-separated worker counts")
+    parser.add_argument('--concurrency', default='50,200,500')
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--port', type=int, default=5600)
+    parser.add_argument('--user-id', type=int)
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE', help="Extra server environment")
+    args = parser.parse_args()
+
+    extra_env = dict(value.split('=', 1) for value in args.env)
+    headers = {'Authorization': f'Bearer {access_token(args.user_id)}'}
+    sampler = connection_sampler()
+    if sampler:
+        print(f"PostgreSQL max_connections: {sampler.max_connections}")
+    print(f"{'mode':<6} {'workers':>7} {'clients':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} "
+          f"{'rss MB':>8} {'db conns':>8}")
+    for mode in args.modes.split(','):
+        for workers in (int(value) for value in args.workers.split(',')):
+            server = start_server(mode, workers, args.port, extra_env)
+            try:
+                for concurrency in (int(value) for value in args.concurrency.split(',')):
+                    if sampler:
+                        with sampler:
+                            rate, p50, p99, errors = run_clients(args.port, args.path, headers, concurrency, args.duration)
+                        connections = str(sampler.peak)
+                    else:
+                        rate, p50, p99, errors = run_clients(args.port, args.path, headers, concurrency, args.duration)
+                        connections = '-'
+                    rss = process_tree_rss(server.pid)
+                    print(f"{mode:<6} {workers:>7} {concurrency:>7} {rate:>9.1f} {p50:>8.1f} {p99:>8.1f} {errors:>7} "
+                          f"{rss:>8.1f} {connections:>8}")
+            finally:
+                server.terminate()
+                server.wait()
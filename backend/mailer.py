@@ -0,0 +1,225 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from flask_mail import Message  # type: ignore
+from sqlalchemy import or_, and_  # type: ignore
+from models import db, EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+# Rows stuck in 'sending' longer than this (e.g. a worker died mid-batch) are claimed again
+SENDING_LEASE = timedelta(minutes=5)
+
+def enqueue_email(recipient, subject, body):
+    """Queue an email in the outbox; it is sent once the caller commits."""
+    email = EmailOutbox(recipient=recipient, subject=subject, body=body)
+    db.session.add(email)
+    return email
+
+def enqueue_emails(connection, emails):
+    """Queue many emails with a single executemany insert on the given connection."""
+    if emails:
+        connection.execute(EmailOutbox.__table__.insert(), [
+            {'recipient': recipient, 'subject': subject, 'body': body}
+            for recipient, subject, body in emails
+        ])
+
+def invitation_email(recipient, assessment_title, expiry_date=None):
+    """Build the (recipient, subject, body) tuple for an assessment invitation."""
+    body = f"You have been invited to take the assessment '{assessment_title}' on Smart Recruiter."
+    if expiry_date:
+        body += f" The invitation expires on {expiry_date:%Y-%m-%d %H:%M} UTC."
+    return recipient, f"Invitation: {assessment_title}", body
+
+def account_invite_email(recipient, first_name, token, valid_hours):
+    """Build the (recipient, subject, body) tuple inviting an imported candidate to set a password."""
+    return (
+        recipient,
+        "Your Smart Recruiter account",
+        f"Hello {first_name}, an account has been created for you on Smart Recruiter. "
+        f"Set your password with the code {token} within {valid_hours} hours."
+    )
+
+def feedback_email(recipient, assessment_title):
+    """Build the (recipient, subject, body) tuple for a graded/feedback notification."""
+    return (
+        recipient,
+        f"Feedback available: {assessment_title}",
+        f"A recruiter has left feedback on your submission for '{assessment_title}'. Log in to Smart Recruiter to view it."
+    )
+
+class RateLimiter:
+    """
+    Thread-safe token bucket allowing `rate` messages per second with bursts up to `rate`. The
+    bucket holds at least one token, so rates below one message per second still send.
+    """
+
+    def __init__(self, rate):
+        if rate <= 0:
+            raise ValueError(f"MAIL_RATE_LIMIT must be positive, got {rate}")
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class OutboxWorker:
+    """
+    Pool of threads draining the email outbox.
+
+    Each thread claims a batch of due rows (FOR UPDATE SKIP LOCKED, so several worker processes
+    can run side by side), sends the whole batch over one SMTP connection and records the outcome.
+    Failures are retried with exponential backoff until MAIL_MAX_ATTEMPTS, then marked failed.
+    """
+
+    _rate_limiters = {}
+    _rate_limiters_lock = threading.Lock()
+
+    def __init__(self, app, mail):
+        self.app = app
+        self.mail = mail
+        config = app.config
+        self.workers = config['MAIL_WORKERS']
+        self.batch_size = config['MAIL_BATCH_SIZE']
+        self.max_attempts = config['MAIL_MAX_ATTEMPTS']
+        self.retry_backoff = config['MAIL_RETRY_BACKOFF']
+        self.poll_interval = config['MAIL_POLL_INTERVAL']
+        self.rate_limiter = self.rate_limiter_for(config['MAIL_SERVER'], config['MAIL_RATE_LIMIT'])
+        self.stopping = threading.Event()
+        self.threads = []
+
+    @classmethod
+    def rate_limiter_for(cls, provider, rate):
+        """Share one token bucket per SMTP provider across all workers in the process."""
+        with cls._rate_limiters_lock:
+            if provider not in cls._rate_limiters:
+                cls._rate_limiters[provider] = RateLimiter(rate)
+            return cls._rate_limiters[provider]
+
+    def start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(target=self.run, name=f"outbox-worker-{index}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self, timeout=None):
+        self.stopping.set()
+        for thread in self.threads:
+            thread.join(timeout)
+
+    def run(self):
+        with self.app.app_context():
+            while not self.stopping.is_set():
+                try:
+                    processed = self.drain_once()
+                except Exception:
+                    logger.exception("Outbox worker iteration failed")
+                    db.session.rollback()
+                    processed = 0
+                finally:
+                    db.session.remove()
+                if not processed:
+                    self.stopping.wait(self.poll_interval)
+
+    def claim_batch(self):
+        """Mark up to batch_size due emails as 'sending' and return them as plain dicts."""
+        now = datetime.utcnow()
+        due = or_(
+            and_(EmailOutbox.status == 'pending', EmailOutbox.next_attempt_at <= now),
+            and_(EmailOutbox.status == 'sending', EmailOutbox.updated_at <= now - SENDING_LEASE)
+        )
+        ids = [id for (id,) in (
+            db.session.query(EmailOutbox.id)
+            .filter(due)
+            .order_by(EmailOutbox.next_attempt_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )]
+        if not ids:
+            db.session.commit()
+            return []
+
+        # Re-checking the due condition makes the claim atomic even where SKIP LOCKED is unavailable
+        table = EmailOutbox.__table__
+        claimed = db.session.execute(
+            table.update()
+            .where(table.c.id.in_(ids), due)
+            .values(status='sending', attempts=table.c.attempts + 1, updated_at=now)
+            .returning(table.c.id, table.c.recipient, table.c.subject, table.c.body, table.c.attempts)
+        ).mappings().all()
+        db.session.commit()
+        return claimed
+
+    def drain_once(self):
+        """Send one batch; returns the number of emails processed."""
+        emails = self.claim_batch()
+        if not emails:
+            return 0
+
+        sent_ids = []
+        failures = []
+        try:
+            with self.mail.connect() as connection:
+                for email in emails:
+                    self.rate_limiter.acquire()
+                    try:
+                        connection.send(Message(subject=email['subject'], recipients=[email['recipient']], body=email['body']))
+                        sent_ids.append(email['id'])
+                    except Exception as e:
+                        failures.append((email, e))
+        except Exception as e:
+            # Connection-level failure: everything not yet sent in this batch is retried
+            done = set(sent_ids) | {email['id'] for email, _ in failures}
+            failures.extend((email, e) for email in emails if email['id'] not in done)
+
+        table = EmailOutbox.__table__
+        now = datetime.utcnow()
+        if sent_ids:
+            db.session.execute(table.update().where(table.c.id.in_(sent_ids)).values(
+                status='sent', sent_at=now, last_error=None, updated_at=now
+            ))
+        for email, error in failures:
+            db.session.execute(table.update().where(table.c.id == email['id']).values(
+                updated_at=now, **self.retry_values(email['attempts'], error)
+            ))
+            if email['attempts'] >= self.max_attempts:
+                logger.warning("Giving up on email %s to %s: %s", email['id'], email['recipient'], error)
+        db.session.commit()
+        return len(emails)
+
+    def retry_values(self, attempts, error):
+        """Column values for a failed attempt: back off exponentially, then give up."""
+        if attempts >= self.max_attempts:
+            return {'status': 'failed', 'last_error': str(error)}
+        return {
+            'status': 'pending',
+            'last_error': str(error),
+            'next_attempt_at': datetime.utcnow() + timedelta(seconds=self.retry_backoff * 2 ** (attempts - 1))
+        }
+
+if __name__ == "__main__":
+    from app import app, mail
+
+    logging.basicConfig(level=logging.INFO)
+    worker = OutboxWorker(app, mail)
+    worker.start()
+    print(f"Outbox worker started with {worker.workers} threads")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("Stopping outbox worker")
+        worker.stop(timeout=30)
@@ -0,0 +1,269 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from flask import current_app, request  # type: ignore
+from sqlalchemy import event  # type: ignore
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError  # type: ignore
+from sqlalchemy.pool import QueuePool  # type: ignore
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def format_labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in zip(names, values)) + '}'
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def inc(self, label_values=(), amount=1):
+        with self.lock:
+            self.series[label_values] = self.series.get(label_values, 0) + amount
+
+    def render(self, extra):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self.lock:
+            series = list(self.series.items())
+        for values, total in series:
+            yield f"{self.name}{format_labels(self.labels + extra[0], values + extra[1])} {format_value(total)}"
+
+class Histogram:
+    """Fixed-bucket histogram; an observation is a bisect and a few additions under a lock."""
+
+    def __init__(self, name, help, buckets, labels=()):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.labels = labels
+        # label values -> [count per bucket (last one is +Inf), sum]
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = [0] * (len(self.buckets) + 1) + [0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self, extra):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self.lock:
+            series = [(values, list(counts)) for values, counts in self.series.items()]
+        names = self.labels + extra[0] + ('le',)
+        for values, counts in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                yield f"{self.name}_bucket{format_labels(names, values + extra[1] + (bound,))} {cumulative}"
+            labels = format_labels(self.labels + extra[0], values + extra[1])
+            yield f"{self.name}_sum{labels} {format_value(counts[-1])}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+class RequestStats:
+    __slots__ = ('endpoint', 'statements', 'statement_seconds')
+
+    def __init__(self):
+        self.endpoint = None
+        self.statements = 0
+        self.statement_seconds = 0.0
+
+# Statistics of the request being served on this thread or task
+current_request = ContextVar('metrics_request', default=None)
+
+class Metrics:
+    """
+    Process-local request, SQL and connection pool metrics, rendered in the Prometheus text format.
+    Every series carries a `worker` label (the process id), since each gunicorn worker keeps its own
+    numbers and a scrape reaches one of them; sum over `worker` in queries.
+    """
+
+    def __init__(self):
+        self.worker = (('worker',), (str(os.getpid()),))
+        self.requests = Counter('http_requests_total', "Requests served, by resource, method and status.",
+                                ('endpoint', 'method', 'status'))
+        self.latency = Histogram('http_request_duration_seconds', "Time to serve a request, body included.",
+                                 LATENCY_BUCKETS, ('endpoint', 'method'))
+        self.response_size = Histogram('http_response_size_bytes', "Response body size.", SIZE_BUCKETS, ('endpoint',))
+        self.statements = Histogram('db_statements_per_request', "SQL statements executed per request.",
+                                    STATEMENT_BUCKETS, ('endpoint',))
+        self.statement_time = Histogram('db_statement_seconds_per_request', "Time spent in SQL statements per request.",
+                                        LATENCY_BUCKETS, ('endpoint',))
+        self.pool_wait = Histogram('db_pool_checkout_wait_seconds', "Time to check a connection out of the pool.",
+                                   POOL_WAIT_BUCKETS)
+        self.pool_timeouts = Counter('db_pool_checkout_timeouts_total', "Checkouts that gave up waiting for a connection.")
+        self.waiting = 0
+        self.waiting_lock = threading.Lock()
+        self.engine = None
+
+    def record(self, stats, method, status, size, seconds):
+        endpoint = stats.endpoint or 'unmatched'
+        self.requests.inc((endpoint, method, status))
+        self.latency.observe((endpoint, method), seconds)
+        self.response_size.observe((endpoint,), size)
+        self.statements.observe((endpoint,), stats.statements)
+        self.statement_time.observe((endpoint,), stats.statement_seconds)
+
+    def instrument_engine(self, engine):
+        """Count statements per request and time pool checkouts on `engine`."""
+        self.engine = engine
+        self.count_statements(engine)
+        # dispose() replaces the pool, so the new one is wrapped as well
+        event.listen(engine, 'engine_disposed', lambda engine: self.instrument_pool(engine.pool))
+        self.instrument_pool(engine.pool)
+
+    def count_statements(self, engine):
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+
+    def instrument_pool(self, pool):
+        connect = pool.connect
+
+        def timed_connect():
+            with self.waiting_lock:
+                self.waiting += 1
+            started = time.perf_counter()
+            try:
+                return connect()
+            except PoolTimeoutError:
+                self.pool_timeouts.inc()
+                raise
+            finally:
+                self.pool_wait.observe((), time.perf_counter() - started)
+                with self.waiting_lock:
+                    self.waiting -= 1
+
+        pool.connect = timed_connect
+
+    def pool_gauges(self):
+        pool = self.engine.pool if self.engine is not None else None
+        if not isinstance(pool, QueuePool):
+            # NullPool and the SQLite single-connection pools have no size to saturate
+            return
+        size, checked_out, overflow = pool.size(), pool.checkedout(), pool.overflow()
+        max_overflow = getattr(pool, '_max_overflow', 0)
+        capacity = size + max_overflow if max_overflow >= 0 else 0
+        labels = format_labels(*self.worker)
+        for name, help, value in (
+            ('db_pool_size', "Connections the pool keeps open.", size),
+            ('db_pool_checked_out', "Connections currently checked out.", checked_out),
+            ('db_pool_overflow', "Connections open beyond the pool size.", max(overflow, 0)),
+            ('db_pool_checkout_waiting', "Checkouts currently waiting for a connection.", self.waiting),
+            ('db_pool_saturation', "Checked-out connections over the pool's capacity (0 when unbounded).",
+             round(checked_out / capacity, 4) if capacity else 0),
+        ):
+            yield f"# HELP {name} {help}"
+            yield f"# TYPE {name} gauge"
+            yield f"{name}{labels} {format_value(value)}"
+
+    def render(self):
+        lines = []
+        for metric in (self.requests, self.latency, self.response_size, self.statements, self.statement_time,
+                       self.pool_wait, self.pool_timeouts):
+            lines.extend(metric.render(self.worker))
+        lines.extend(self.pool_gauges())
+        return "\n".join(lines) + "\n"
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request.get()
+    if stats is not None and context is not None:
+        stats.statements += 1
+        context._metrics_started = time.perf_counter()
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request.get()
+    started = getattr(context, '_metrics_started', None)
+    if stats is not None and started is not None:
+        stats.statement_seconds += time.perf_counter() - started
+
+class MetricsMiddleware:
+    """
+    WSGI middleware timing each request until its body has been sent, so streamed responses
+    (exports, imports) count in full. Response bytes are counted as they pass through.
+    """
+
+    def __init__(self, wsgi_app, metrics):
+        self.wsgi_app = wsgi_app
+        self.metrics = metrics
+
+    def __call__(self, environ, start_response):
+        stats = RequestStats()
+        current_request.set(stats)
+        started = time.perf_counter()
+        status = ['500']
+
+        def capture(status_line, headers, exc_info=None):
+            status[0] = status_line[:3]
+            return start_response(status_line, headers, exc_info)
+
+        def finish(size):
+            self.metrics.record(stats, environ.get('REQUEST_METHOD', ''), status[0], size,
+                                time.perf_counter() - started)
+            current_request.set(None)
+
+        try:
+            body = self.wsgi_app(environ, capture)
+        except Exception:
+            finish(0)
+            raise
+        return MeasuredBody(body, finish)
+
+class MeasuredBody:
+    def __init__(self, body, finish):
+        self.body = body
+        self.finish = finish
+        self.size = 0
+
+    def __iter__(self):
+        for chunk in self.body:
+            self.size += len(chunk)
+            yield chunk
+
+    def close(self):
+        try:
+            if hasattr(self.body, 'close'):
+                self.body.close()
+        finally:
+            if self.finish is not None:
+                self.finish(self.size)
+                self.finish = None
+
+def init_metrics(app, engine, replicas=()):
+    """Instrument the app and its engine and register the metrics on the app. Statements on `replicas` count towards their request."""
+    metrics = Metrics()
+    metrics.instrument_engine(engine)
+    for replica in replicas:
+        metrics.count_statements(replica)
+    app.wsgi_app = MetricsMiddleware(app.wsgi_app, metrics)
+
+    @app.before_request
+    def label_request():
+        stats = current_request.get()
+        if stats is not None:
+            stats.endpoint = request.endpoint
+
+    app.extensions['metrics'] = metrics
+    return metrics
+
+def metrics_text():
+    return current_app.extensions['metrics'].render()
@@ -0,0 +1,26 @@
+"""Add test cases to questions
+
+Revision ID: 2b7e4f9a6d13
+Revises: 1a6d8e3f5c92
+Create Date: 2026-10-18 15:20:47.281936
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2b7e4f9a6d13'
+down_revision = '1a6d8e3f5c92'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('questions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('test_cases', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('questions', schema=None) as batch_op:
+        batch_op.drop_column('test_cases')
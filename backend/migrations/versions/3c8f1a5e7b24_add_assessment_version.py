@@ -0,0 +1,26 @@
+"""Add assessment content version
+
+Revision ID: 3c8f1a5e7b24
+Revises: 2b7e4f9a6d13
+Create Date: 2026-10-18 16:34:12.840517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c8f1a5e7b24'
+down_revision = '2b7e4f9a6d13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('assessments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('assessments', schema=None) as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,24 @@
+"""Add notification unread index
+
+Revision ID: 5e1b7c3d9f20
+Revises: 4d9a2c6b8e31
+Create Date: 2026-10-18 21:52:31.408712
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e1b7c3d9f20'
+down_revision = '4d9a2c6b8e31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_notifications_user_id_is_read', 'notifications', ['user_id', 'is_read'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_notifications_user_id_is_read', table_name='notifications')
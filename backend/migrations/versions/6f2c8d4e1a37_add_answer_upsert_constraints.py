@@ -0,0 +1,42 @@
+"""Add answer upsert constraints
+
+Revision ID: 6f2c8d4e1a37
+Revises: 5e1b7c3d9f20
+Create Date: 2026-10-18 22:14:52.730164
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6f2c8d4e1a37'
+down_revision = '5e1b7c3d9f20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keep the latest answer of any question answered more than once in a submission
+    op.execute(
+        "DELETE FROM answers WHERE id NOT IN ("
+        "SELECT MAX(id) FROM answers GROUP BY submission_id, question_id)"
+    )
+    # Only the newest in-progress attempt per candidate and assessment stays open
+    op.execute(
+        "UPDATE submissions SET status = 'submitted', submitted_at = COALESCE(updated_at, created_at) "
+        "WHERE status = 'in_progress' AND id NOT IN ("
+        "SELECT MAX(id) FROM submissions WHERE status = 'in_progress' GROUP BY assessment_id, interviewee_id)"
+    )
+    with op.batch_alter_table('answers', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_answers_submission_id_question_id', ['submission_id', 'question_id'])
+        batch_op.drop_index(batch_op.f('ix_answers_submission_id'))
+    op.create_index('ix_submissions_in_progress', 'submissions', ['assessment_id', 'interviewee_id'], unique=True,
+                    postgresql_where=sa.text("status = 'in_progress'"), sqlite_where=sa.text("status = 'in_progress'"))
+
+
+def downgrade():
+    op.drop_index('ix_submissions_in_progress', table_name='submissions')
+    with op.batch_alter_table('answers', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_answers_submission_id'), ['submission_id'], unique=False)
+        batch_op.drop_constraint('uq_answers_submission_id_question_id', type_='unique')
@@ -0,0 +1,52 @@
+"""Add assessment kind and assessment_daily_stats rollup
+
+Revision ID: 7a4e2b9c5d16
+Revises: 6f2c8d4e1a37
+Create Date: 2026-10-18 23:14:06.552917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a4e2b9c5d16'
+down_revision = '6f2c8d4e1a37'
+branch_labels = None
+depends_on = None
+
+assessment_kind = sa.Enum('real', 'trial', name='assessment_kind')
+
+
+def upgrade():
+    assessment_kind.create(op.get_bind(), checkfirst=True)
+    with op.batch_alter_table('assessments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('kind', assessment_kind, server_default='real', nullable=False))
+    # Statistics used to tell trial assessments apart by title
+    op.execute("UPDATE assessments SET kind = 'trial' WHERE LOWER(title) LIKE '%trial%'")
+
+    op.create_table('assessment_daily_stats',
+    sa.Column('assessment_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('submission_count', sa.Integer(), nullable=False),
+    sa.Column('scored_count', sa.Integer(), nullable=False),
+    sa.Column('score_sum', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['assessment_id'], ['assessments.id'], name=op.f('fk_assessment_daily_stats_assessment_id')),
+    sa.PrimaryKeyConstraint('assessment_id', 'day', name=op.f('pk_assessment_daily_stats'))
+    )
+    op.create_index('ix_assessment_daily_stats_day', 'assessment_daily_stats', ['day'], unique=False)
+    # Backfill from existing submissions
+    op.execute(
+        "INSERT INTO assessment_daily_stats "
+        "(assessment_id, day, submission_count, scored_count, score_sum) "
+        "SELECT assessment_id, DATE(submitted_at), COUNT(id), COUNT(score), COALESCE(SUM(score), 0) "
+        "FROM submissions WHERE submitted_at IS NOT NULL GROUP BY assessment_id, DATE(submitted_at)"
+    )
+
+
+def downgrade():
+    op.drop_index('ix_assessment_daily_stats_day', table_name='assessment_daily_stats')
+    op.drop_table('assessment_daily_stats')
+    with op.batch_alter_table('assessments', schema=None) as batch_op:
+        batch_op.drop_column('kind')
+    assessment_kind.drop(op.get_bind(), checkfirst=True)
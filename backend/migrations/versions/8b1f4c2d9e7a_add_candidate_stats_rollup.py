@@ -0,0 +1,40 @@
+"""Add candidate_stats rollup
+
+Revision ID: 8b1f4c2d9e7a
+Revises: 3623d775bb49
+Create Date: 2026-10-18 09:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b1f4c2d9e7a'
+down_revision = '3623d775bb49'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('candidate_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('submission_count', sa.Integer(), nullable=False),
+    sa.Column('scored_count', sa.Integer(), nullable=False),
+    sa.Column('score_sum', sa.Float(), nullable=False),
+    sa.Column('average_score', sa.Float(), nullable=True),
+    sa.Column('last_submitted_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], name=op.f('fk_candidate_stats_user_id')),
+    sa.PrimaryKeyConstraint('user_id', name=op.f('pk_candidate_stats'))
+    )
+    # Backfill from existing submissions
+    op.execute(
+        "INSERT INTO candidate_stats "
+        "(user_id, submission_count, scored_count, score_sum, average_score, last_submitted_at) "
+        "SELECT interviewee_id, COUNT(id), COUNT(score), COALESCE(SUM(score), 0), AVG(score), MAX(submitted_at) "
+        "FROM submissions GROUP BY interviewee_id"
+    )
+
+
+def downgrade():
+    op.drop_table('candidate_stats')
@@ -0,0 +1,34 @@
+"""Backfill created_at and make it NOT NULL
+
+Revision ID: 9d3f6a2b8c41
+Revises: 7a4e2b9c5d16
+Create Date: 2026-10-19 09:12:40.318226
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d3f6a2b8c41'
+down_revision = '7a4e2b9c5d16'
+branch_labels = None
+depends_on = None
+
+# Tables with TimestampMixin; keyset pagination seeks on (created_at, id), which skips NULLs
+TABLES = ('users', 'password_resets', 'assessments', 'questions', 'invitations', 'submissions', 'answers',
+          'feedback', 'notifications', 'email_outbox')
+
+
+def upgrade():
+    for table in TABLES:
+        # updated_at is the best remaining estimate of when such a row was written
+        op.execute(f"UPDATE {table} SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP) WHERE created_at IS NULL")
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,46 @@
+"""Add indexes for hot query paths
+
+Revision ID: c4e9a1f3b2d6
+Revises: 8b1f4c2d9e7a
+Create Date: 2026-10-18 10:03:27.551812
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e9a1f3b2d6'
+down_revision = '8b1f4c2d9e7a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # IntervieweeAssessments: interviewee's accepted invitations
+    op.create_index('ix_invitations_interviewee_id_status', 'invitations', ['interviewee_id', 'status'], unique=False)
+    # AssessmentInterviewees: accepted invitations of an assessment
+    op.create_index('ix_invitations_assessment_id_status', 'invitations', ['assessment_id', 'status'], unique=False)
+    # Expiry lookups only ever look at pending invitations
+    op.create_index('ix_invitations_pending_expiry_date', 'invitations', ['expiry_date'], unique=False,
+                    postgresql_where=sa.text("status = 'pending'"), sqlite_where=sa.text("status = 'pending'"))
+    op.create_index(op.f('ix_questions_assessment_id'), 'questions', ['assessment_id'], unique=False)
+    op.create_index(op.f('ix_submissions_interviewee_id'), 'submissions', ['interviewee_id'], unique=False)
+    op.create_index(op.f('ix_submissions_assessment_id'), 'submissions', ['assessment_id'], unique=False)
+    op.create_index(op.f('ix_answers_submission_id'), 'answers', ['submission_id'], unique=False)
+    op.create_index(op.f('ix_feedback_submission_id'), 'feedback', ['submission_id'], unique=False)
+    # IntervieweeList / IntervieweeComposition filter on role, then gender
+    op.create_index('ix_users_role_gender', 'users', ['role', 'gender'], unique=False)
+    # password_resets(token) is already covered by uq_password_resets_token
+
+
+def downgrade():
+    op.drop_index('ix_users_role_gender', table_name='users')
+    op.drop_index(op.f('ix_feedback_submission_id'), table_name='feedback')
+    op.drop_index(op.f('ix_answers_submission_id'), table_name='answers')
+    op.drop_index(op.f('ix_submissions_assessment_id'), table_name='submissions')
+    op.drop_index(op.f('ix_submissions_interviewee_id'), table_name='submissions')
+    op.drop_index(op.f('ix_questions_assessment_id'), table_name='questions')
+    op.drop_index('ix_invitations_pending_expiry_date', table_name='invitations')
+    op.drop_index('ix_invitations_assessment_id_status', table_name='invitations')
+    op.drop_index('ix_invitations_interviewee_id_status', table_name='invitations')
@@ -0,0 +1,26 @@
+"""Add grading_error to answers
+
+Revision ID: e2c7b5d91f04
+Revises: 9d3f6a2b8c41
+Create Date: 2026-10-19 11:05:12.604417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2c7b5d91f04'
+down_revision = '9d3f6a2b8c41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('answers', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('grading_error', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('answers', schema=None) as batch_op:
+        batch_op.drop_column('grading_error')
@@ -0,0 +1,38 @@
+"""Add (created_at, id) indexes for keyset pagination
+
+Revision ID: e5d2b7a8c1f0
+Revises: c4e9a1f3b2d6
+Create Date: 2026-10-18 11:26:54.902117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5d2b7a8c1f0'
+down_revision = 'c4e9a1f3b2d6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_assessments_created_at_id', 'assessments', ['created_at', 'id'], unique=False)
+    op.create_index('ix_invitations_created_at_id', 'invitations', ['created_at', 'id'], unique=False)
+    op.create_index('ix_users_role_created_at_id', 'users', ['role', 'created_at', 'id'], unique=False)
+    # Widen the filter indexes so filtered listings can seek without a sort
+    op.create_index('ix_questions_assessment_id_created_at_id', 'questions', ['assessment_id', 'created_at', 'id'], unique=False)
+    op.drop_index(op.f('ix_questions_assessment_id'), table_name='questions')
+    op.create_index('ix_invitations_interviewee_id_status_created_at_id', 'invitations',
+                    ['interviewee_id', 'status', 'created_at', 'id'], unique=False)
+    op.drop_index('ix_invitations_interviewee_id_status', table_name='invitations')
+
+
+def downgrade():
+    op.create_index('ix_invitations_interviewee_id_status', 'invitations', ['interviewee_id', 'status'], unique=False)
+    op.drop_index('ix_invitations_interviewee_id_status_created_at_id', table_name='invitations')
+    op.create_index(op.f('ix_questions_assessment_id'), 'questions', ['assessment_id'], unique=False)
+    op.drop_index('ix_questions_assessment_id_created_at_id', table_name='questions')
+    op.drop_index('ix_users_role_created_at_id', table_name='users')
+    op.drop_index('ix_invitations_created_at_id', table_name='invitations')
+    op.drop_index('ix_assessments_created_at_id', table_name='assessments')
@@ -0,0 +1,31 @@
+"""Unique invitation per assessment and interviewee
+
+Revision ID: f7a3c9d1e4b8
+Revises: e5d2b7a8c1f0
+Create Date: 2026-10-18 12:41:09.664031
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7a3c9d1e4b8'
+down_revision = 'e5d2b7a8c1f0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keep the earliest invitation of any duplicated (assessment, interviewee) pair
+    op.execute(
+        "DELETE FROM invitations WHERE id NOT IN ("
+        "SELECT MIN(id) FROM invitations GROUP BY assessment_id, interviewee_id)"
+    )
+    with op.batch_alter_table('invitations', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_invitations_assessment_id_interviewee_id', ['assessment_id', 'interviewee_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('invitations', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_invitations_assessment_id_interviewee_id', type_='unique')
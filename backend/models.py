@@ -1,7 +1,8 @@
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy #type: ignore
-from flask_bcrypt import Bcrypt #type: ignore
-from sqlalchemy import func, Enum, MetaData #type: ignore
+from sqlalchemy import func, Enum, MetaData, case, event, inspect #type: ignore
+from sqlalchemy.orm import Session, joinedload #type: ignore
+from replicas import RoutingSession
 # from flask_serializer import SerializerMixin #type: ignore
 
 # Naming convention for PostgreSQL
@@ -14,16 +15,20 @@ metadata = MetaData(naming_convention={
 })
 
 # Initialize extensions
-db = SQLAlchemy(metadata=metadata)
-bcrypt = Bcrypt()
+db = SQLAlchemy(metadata=metadata, session_options={'class_': RoutingSession})
 
 class TimestampMixin:
     """Mixin for adding timestamp fields to models."""
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # NOT NULL: keyset pagination seeks on (created_at, id)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class User(db.Model, TimestampMixin):
     __tablename__ = "users"
+    __table_args__ = (
+        db.Index('ix_users_role_gender', 'role', 'gender'),
+        db.Index('ix_users_role_created_at_id', 'role', 'created_at', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(50), unique=True, nullable=False)
@@ -48,15 +53,32 @@ class User(db.Model, TimestampMixin):
         if self.role != 'interviewee':
             return None
 
-        # Query the submissions for the user and calculate the average score
-        total_scores = sum([submission.score for submission in self.submissions if submission.score is not None])
-        count = len([submission for submission in self.submissions if submission.score is not None])
-        return round(total_scores / count, 2) if count > 0 else 0
+        return User.average_scores([self.id]).get(self.id, 0)
 
-    def to_dict(self):
+    @staticmethod
+    def average_scores(user_ids):
+        """
+        Fetch average scores for many interviewees in one query against the candidate_stats rollup.
+        Returns a dict of interviewee id -> average score; users without scored submissions are omitted.
+        """
+        user_ids = list(user_ids)
+        if not user_ids:
+            return {}
+
+        rows = (
+            db.session.query(CandidateStats.user_id, CandidateStats.average_score)
+            .filter(CandidateStats.user_id.in_(user_ids), CandidateStats.scored_count > 0)
+            .all()
+        )
+        return {user_id: round(float(average), 2) for user_id, average in rows}
+
+    def to_dict(self, average_score=None):
         """
         Serialize User object to a dictionary format, including the average score for interviewees.
+        Pass a precomputed average_score (see User.average_scores) to avoid a query per user.
         """
+        if self.role == 'interviewee' and average_score is None:
+            average_score = self.average_score()
         return {
             'id': self.id,
             'username': self.username,
@@ -67,7 +89,7 @@ class User(db.Model, TimestampMixin):
             'gender': self.gender,
             'company_name': self.company_name,
             'consent': self.consent,
-            'average_score': self.average_score() if self.role == 'interviewee' else None,
+            'average_score': average_score if self.role == 'interviewee' else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -90,8 +112,14 @@ class PasswordReset(db.Model, TimestampMixin):
             'used': self.used
         }
 
+# Trial assessments are practice runs; performance statistics report them apart from real ones
+ASSESSMENT_KINDS = ('real', 'trial')
+
 class Assessment(db.Model, TimestampMixin):
     __tablename__ = "assessments"
+    __table_args__ = (
+        db.Index('ix_assessments_created_at_id', 'created_at', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
@@ -99,6 +127,9 @@ class Assessment(db.Model, TimestampMixin):
     recruiter_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     time_limit = db.Column(db.Integer, nullable=False)  # Time in minutes
     is_published = db.Column(db.Boolean, default=False)
+    # Bumped on every content change; keys cached assessment/question payloads and ETags
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    kind = db.Column(Enum(*ASSESSMENT_KINDS, name="assessment_kind"), nullable=False, default='real', server_default='real')
 
         # Relationships
     questions = db.relationship('Question', backref='assessment', lazy="dynamic")
@@ -112,12 +143,16 @@ class Assessment(db.Model, TimestampMixin):
             'recruiter_id': self.recruiter_id,
             'time_limit': self.time_limit,
             'is_published': self.is_published,
+            'kind': self.kind,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
 class Question(db.Model, TimestampMixin):
     __tablename__ = "questions"
+    __table_args__ = (
+        db.Index('ix_questions_assessment_id_created_at_id', 'assessment_id', 'created_at', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     assessment_id = db.Column(db.Integer, db.ForeignKey('assessments.id'), nullable=False)
@@ -125,6 +160,8 @@ class Question(db.Model, TimestampMixin):
     text = db.Column(db.Text, nullable=False)
     choices = db.Column(db.JSON, nullable=True)
     correct_answer = db.Column(db.Text, nullable=True)
+    # Coding questions: {"language": "python", "entrypoint": "fn", "cases": [{"args": [...], "expected": ...}]}
+    test_cases = db.Column(db.JSON, nullable=True)
 
         # Relationships
     answers = db.relationship('Answer', backref='question', lazy="dynamic")
@@ -137,12 +174,23 @@ class Question(db.Model, TimestampMixin):
             'text': self.text,
             'choices': self.choices,
             'correct_answer': self.correct_answer,
+            'test_cases': self.test_cases,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
 class Invitation(db.Model, TimestampMixin):
     __tablename__ = "invitations"
+    __table_args__ = (
+        # One invitation per candidate per assessment; also the conflict target for bulk inserts
+        db.UniqueConstraint('assessment_id', 'interviewee_id', name='uq_invitations_assessment_id_interviewee_id'),
+        db.Index('ix_invitations_interviewee_id_status_created_at_id', 'interviewee_id', 'status', 'created_at', 'id'),
+        db.Index('ix_invitations_assessment_id_status', 'assessment_id', 'status'),
+        db.Index('ix_invitations_created_at_id', 'created_at', 'id'),
+        # Only pending invitations can expire, so keep the expiry index small
+        db.Index('ix_invitations_pending_expiry_date', 'expiry_date',
+                 postgresql_where=db.text("status = 'pending'"), sqlite_where=db.text("status = 'pending'")),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     assessment_id = db.Column(db.Integer, db.ForeignKey('assessments.id'), nullable=False)
@@ -150,6 +198,19 @@ class Invitation(db.Model, TimestampMixin):
     status = db.Column(db.Enum('pending', 'accepted', 'completed', 'expired', name="invitation_status"), default='pending')
     expiry_date = db.Column(db.DateTime, nullable=True)
 
+    # Relationships
+    interviewee = db.relationship('User', lazy="select")
+
+    @classmethod
+    def with_interviewee(cls):
+        """Invitation query that loads each invited interviewee in the same SELECT."""
+        return cls.query.options(joinedload(cls.interviewee))
+
+    @classmethod
+    def with_assessment(cls):
+        """Invitation query that loads each invitation's assessment in the same SELECT."""
+        return cls.query.options(joinedload(cls.assessment))
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -163,13 +224,26 @@ class Invitation(db.Model, TimestampMixin):
 
 class Submission(db.Model, TimestampMixin):
     __tablename__ = "submissions"
+    __table_args__ = (
+        # At most one in-progress attempt per candidate and assessment, so starting is idempotent
+        db.Index('ix_submissions_in_progress', 'assessment_id', 'interviewee_id', unique=True,
+                 postgresql_where=db.text("status = 'in_progress'"), sqlite_where=db.text("status = 'in_progress'")),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    assessment_id = db.Column(db.Integer, db.ForeignKey('assessments.id'), nullable=False)
-    interviewee_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    # active_history on assessment_id and interviewee_id so moving a submission can rebuild the previous
+    # assessment's and candidate's rollup rows, even when the attribute was expired (e.g. by a commit)
+    assessment_id = db.column_property(
+        db.Column(db.Integer, db.ForeignKey('assessments.id'), nullable=False, index=True), active_history=True
+    )
+    interviewee_id = db.column_property(
+        db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True), active_history=True
+    )
     status = db.Column(db.Enum('in_progress', 'submitted', 'graded', name="submission_status"), default='in_progress')
-    score = db.Column(db.Float, nullable=True)
-    submitted_at = db.Column(db.DateTime, nullable=True)
+    # active_history keeps the previous score available to the candidate_stats rollup listener
+    score = db.column_property(db.Column(db.Float, nullable=True), active_history=True)
+    # active_history for the assessment_daily_stats listener, which buckets by submission day
+    submitted_at = db.column_property(db.Column(db.DateTime, nullable=True), active_history=True)
 
         # Relationships
     answers = db.relationship('Answer', backref='submission', lazy="dynamic")
@@ -188,6 +262,10 @@ class Submission(db.Model, TimestampMixin):
 
 class Answer(db.Model, TimestampMixin):
     __tablename__ = "answers"
+    __table_args__ = (
+        # One answer per question; the conflict target for autosave upserts and the submission_id index
+        db.UniqueConstraint('submission_id', 'question_id', name='uq_answers_submission_id_question_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     submission_id = db.Column(db.Integer, db.ForeignKey('submissions.id'), nullable=False)
@@ -195,6 +273,8 @@ class Answer(db.Model, TimestampMixin):
     answer_text = db.Column(db.Text, nullable=False)
     is_correct = db.Column(db.Boolean, nullable=True)
     score = db.Column(db.Float, nullable=True)
+    # Set when a coding answer could not be run (e.g. its runtime is unavailable); scored 0 meanwhile
+    grading_error = db.Column(db.Text, nullable=True)
 
     def to_dict(self):
         return {
@@ -204,6 +284,7 @@ class Answer(db.Model, TimestampMixin):
             'answer_text': self.answer_text,
             'is_correct': self.is_correct,
             'score': self.score,
+            'grading_error': self.grading_error,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -212,7 +293,7 @@ class Feedback(db.Model, TimestampMixin):
     __tablename__ = "feedback"
 
     id = db.Column(db.Integer, primary_key=True)
-    submission_id = db.Column(db.Integer, db.ForeignKey('submissions.id'), nullable=False)
+    submission_id = db.Column(db.Integer, db.ForeignKey('submissions.id'), nullable=False, index=True)
     question_id = db.Column(db.Integer, db.ForeignKey('questions.id'), nullable=True)
     recruiter_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     text = db.Column(db.Text, nullable=False)
@@ -232,6 +313,9 @@ class Feedback(db.Model, TimestampMixin):
 
 class Notification(db.Model, TimestampMixin):
     __tablename__ = "notifications"
+    __table_args__ = (
+        db.Index('ix_notifications_user_id_is_read', 'user_id', 'is_read'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -249,3 +333,400 @@ class Notification(db.Model, TimestampMixin):
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+
+    @staticmethod
+    def unread_counts_query(user_ids):
+        """Select (user_id, unread count) for the given users; users with nothing unread are omitted."""
+        return db.select(Notification.user_id, func.count(Notification.id)).where(
+            Notification.user_id.in_(user_ids), Notification.is_read.is_not(True)
+        ).group_by(Notification.user_id)
+
+    @staticmethod
+    def unread_count(user_id):
+        counts = dict(db.session.execute(Notification.unread_counts_query([user_id])).all())
+        return counts.get(user_id, 0)
+
+class EmailOutbox(db.Model, TimestampMixin):
+    """Queued outgoing email, delivered by the background worker in mailer.py."""
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        db.Index('ix_email_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(100), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.Enum('pending', 'sending', 'sent', 'failed', name="email_status"), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text, nullable=True)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'recipient': self.recipient,
+            'subject': self.subject,
+            'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'last_error': self.last_error,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class RevokedToken(db.Model):
+    """Logged-out JWT, kept until the token would have expired anyway (see revocation.py)."""
+    __tablename__ = "revoked_tokens"
+
+    jti = db.Column(db.String(36), primary_key=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    revoked_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+def dialect_insert(connection, table):
+    """Return an INSERT construct supporting ON CONFLICT for the connection's dialect."""
+    if connection.dialect.name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert #type: ignore
+    else:
+        from sqlalchemy.dialects.postgresql import insert #type: ignore
+    return insert(table)
+
+class CandidateStats(db.Model):
+    """
+    Denormalized per-candidate score rollup, maintained incrementally on every flush that
+    creates, rescores or deletes a Submission (see _maintain_candidate_stats).
+    """
+    __tablename__ = "candidate_stats"
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    submission_count = db.Column(db.Integer, nullable=False, default=0)
+    scored_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0)
+    average_score = db.Column(db.Float, nullable=True)
+    last_submitted_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'submission_count': self.submission_count,
+            'scored_count': self.scored_count,
+            'score_sum': self.score_sum,
+            'average_score': round(self.average_score, 2) if self.average_score is not None else None,
+            'last_submitted_at': self.last_submitted_at.isoformat() if self.last_submitted_at else None
+        }
+
+    @staticmethod
+    def aggregate_query(user_ids=None):
+        """Select the rollup columns computed from scratch from the submissions table."""
+        query = db.select(
+            Submission.interviewee_id,
+            func.count(Submission.id),
+            func.count(Submission.score),
+            func.coalesce(func.sum(Submission.score), 0.0),
+            func.avg(Submission.score),
+            func.max(Submission.submitted_at)
+        ).group_by(Submission.interviewee_id)
+        if user_ids is not None:
+            query = query.where(Submission.interviewee_id.in_(user_ids))
+        return query
+
+    @classmethod
+    def rebuild(cls, connection=None, user_ids=None):
+        """
+        Recompute the rollup from the submissions table, for all users or only the given ones.
+        Used for backfill and to repair rows after deletions.
+        """
+        connection = connection or db.session.connection()
+        table = cls.__table__
+        delete = table.delete()
+        if user_ids is not None:
+            user_ids = list(user_ids)
+            delete = delete.where(table.c.user_id.in_(user_ids))
+        connection.execute(delete)
+        connection.execute(table.insert().from_select(
+            ['user_id', 'submission_count', 'scored_count', 'score_sum', 'average_score', 'last_submitted_at'],
+            cls.aggregate_query(user_ids)
+        ))
+
+    @classmethod
+    def check(cls, tolerance=1e-6):
+        """
+        Compare the rollup against a fresh aggregate of the submissions table.
+        Returns a list of mismatches, each a dict with the user id and the stored/expected rows.
+        """
+        expected = {row[0]: tuple(row[1:]) for row in db.session.execute(cls.aggregate_query())}
+        stored = {
+            stats.user_id: (stats.submission_count, stats.scored_count, stats.score_sum,
+                            stats.average_score, stats.last_submitted_at)
+            for stats in cls.query.all()
+        }
+
+        def same(left, right):
+            if left is None or right is None:
+                return left is None and right is None
+            if isinstance(left, (int, float)) and isinstance(right, (int, float)):
+                return abs(left - right) <= tolerance
+            return left == right
+
+        empty = (0, 0, 0.0, None, None)
+        mismatches = []
+        for user_id in sorted(set(expected) | set(stored)):
+            expected_row = expected.get(user_id, empty)
+            stored_row = stored.get(user_id, empty)
+            if not all(same(left, right) for left, right in zip(stored_row, expected_row)):
+                mismatches.append({'user_id': user_id, 'stored': stored_row, 'expected': expected_row})
+        return mismatches
+
+    @classmethod
+    def apply_deltas(cls, connection, deltas):
+        """Atomically add per-user deltas to the rollup, creating rows as needed."""
+        table = cls.__table__
+        for user_id, delta in deltas.items():
+            scored_count = delta['scored_count']
+            score_sum = delta['score_sum']
+            insert = dialect_insert(connection, table).values(
+                user_id=user_id,
+                submission_count=delta['submission_count'],
+                scored_count=scored_count,
+                score_sum=score_sum,
+                average_score=score_sum / scored_count if scored_count > 0 else None,
+                last_submitted_at=delta['last_submitted_at']
+            )
+            new_scored_count = table.c.scored_count + insert.excluded.scored_count
+            new_score_sum = table.c.score_sum + insert.excluded.score_sum
+            connection.execute(insert.on_conflict_do_update(
+                index_elements=[table.c.user_id],
+                set_={
+                    'submission_count': table.c.submission_count + insert.excluded.submission_count,
+                    'scored_count': new_scored_count,
+                    'score_sum': new_score_sum,
+                    'average_score': case((new_scored_count > 0, new_score_sum / new_scored_count), else_=None),
+                    'last_submitted_at': case(
+                        (table.c.last_submitted_at.is_(None), insert.excluded.last_submitted_at),
+                        (insert.excluded.last_submitted_at > table.c.last_submitted_at, insert.excluded.last_submitted_at),
+                        else_=table.c.last_submitted_at
+                    )
+                }
+            ))
+
+@event.listens_for(Session, "after_flush")
+def _maintain_candidate_stats(session, flush_context):
+    """Fold submission inserts and score changes of this flush into the candidate_stats rollup."""
+    deltas = {}
+    rebuild_user_ids = set()
+
+    def delta_for(user_id):
+        return deltas.setdefault(user_id, {
+            'submission_count': 0, 'scored_count': 0, 'score_sum': 0.0, 'last_submitted_at': None
+        })
+
+    def add_submitted_at(delta, submitted_at):
+        if submitted_at and (delta['last_submitted_at'] is None or submitted_at > delta['last_submitted_at']):
+            delta['last_submitted_at'] = submitted_at
+
+    for obj in session.new:
+        if isinstance(obj, Submission):
+            delta = delta_for(obj.interviewee_id)
+            delta['submission_count'] += 1
+            if obj.score is not None:
+                delta['scored_count'] += 1
+                delta['score_sum'] += obj.score
+            add_submitted_at(delta, obj.submitted_at)
+
+    for obj in session.dirty:
+        if not isinstance(obj, Submission):
+            continue
+        state = inspect(obj)
+        if state.attrs.interviewee_id.history.has_changes():
+            # Reassigned submissions are rare; recompute both users from scratch
+            rebuild_user_ids.update(state.attrs.interviewee_id.history.deleted)
+            rebuild_user_ids.add(obj.interviewee_id)
+            continue
+        score_history = state.attrs.score.history
+        if score_history.has_changes():
+            old_score = score_history.deleted[0] if score_history.deleted else None
+            delta = delta_for(obj.interviewee_id)
+            if old_score is not None:
+                delta['scored_count'] -= 1
+                delta['score_sum'] -= old_score
+            if obj.score is not None:
+                delta['scored_count'] += 1
+                delta['score_sum'] += obj.score
+        if state.attrs.submitted_at.history.has_changes():
+            add_submitted_at(delta_for(obj.interviewee_id), obj.submitted_at)
+
+    for obj in session.deleted:
+        if isinstance(obj, Submission):
+            # last_submitted_at cannot be decremented, so deletions recompute the user's row
+            rebuild_user_ids.add(obj.interviewee_id)
+
+    for user_id in rebuild_user_ids:
+        deltas.pop(user_id, None)
+    deltas = {
+        user_id: delta for user_id, delta in deltas.items()
+        if user_id is not None and (delta['submission_count'] or delta['scored_count']
+                                    or delta['score_sum'] or delta['last_submitted_at'])
+    }
+    if deltas:
+        CandidateStats.apply_deltas(session.connection(), deltas)
+    if rebuild_user_ids:
+        CandidateStats.rebuild(session.connection(), rebuild_user_ids - {None})
+
+class AssessmentDailyStats(db.Model):
+    """
+    Per-assessment, per-day submission rollup behind the performance statistics, maintained
+    incrementally on every flush that creates, rescores, submits or deletes a Submission
+    (see _maintain_assessment_daily_stats). Days are submission days; unsubmitted attempts are
+    not counted. The assessment kind is joined from assessments when reading.
+    """
+    __tablename__ = "assessment_daily_stats"
+    __table_args__ = (
+        db.Index('ix_assessment_daily_stats_day', 'day'),
+    )
+
+    assessment_id = db.Column(db.Integer, db.ForeignKey('assessments.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    submission_count = db.Column(db.Integer, nullable=False, default=0)
+    scored_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0)
+
+    @staticmethod
+    def aggregate_query(assessment_ids=None):
+        """Select the rollup columns computed from scratch from the submissions table."""
+        day = func.date(Submission.submitted_at)
+        query = db.select(
+            Submission.assessment_id,
+            day,
+            func.count(Submission.id),
+            func.count(Submission.score),
+            func.coalesce(func.sum(Submission.score), 0.0)
+        ).where(Submission.submitted_at.is_not(None)).group_by(Submission.assessment_id, day)
+        if assessment_ids is not None:
+            query = query.where(Submission.assessment_id.in_(assessment_ids))
+        return query
+
+    @classmethod
+    def rebuild(cls, connection=None, assessment_ids=None):
+        """Recompute the rollup from the submissions table, for all assessments or only the given ones."""
+        connection = connection or db.session.connection()
+        table = cls.__table__
+        delete = table.delete()
+        if assessment_ids is not None:
+            assessment_ids = list(assessment_ids)
+            delete = delete.where(table.c.assessment_id.in_(assessment_ids))
+        connection.execute(delete)
+        connection.execute(table.insert().from_select(
+            ['assessment_id', 'day', 'submission_count', 'scored_count', 'score_sum'],
+            cls.aggregate_query(assessment_ids)
+        ))
+
+    @classmethod
+    def check(cls, tolerance=1e-6):
+        """
+        Compare the rollup against a fresh aggregate of the submissions table.
+        Returns a list of mismatches, each a dict with the (assessment id, day) key and the stored/expected rows.
+        """
+        expected = {
+            (row[0], str(row[1])): tuple(row[2:]) for row in db.session.execute(cls.aggregate_query())
+        }
+        stored = {
+            (stats.assessment_id, str(stats.day)): (stats.submission_count, stats.scored_count, stats.score_sum)
+            for stats in cls.query.all()
+        }
+        empty = (0, 0, 0.0)
+        mismatches = []
+        for key in sorted(set(expected) | set(stored)):
+            expected_row = expected.get(key, empty)
+            stored_row = stored.get(key, empty)
+            if any(abs(left - right) > tolerance for left, right in zip(stored_row, expected_row)):
+                mismatches.append({'key': key, 'stored': stored_row, 'expected': expected_row})
+        return mismatches
+
+    @classmethod
+    def apply_deltas(cls, connection, deltas):
+        """Atomically add {(assessment_id, day): delta} to the rollup with one upsert, creating rows as needed."""
+        table = cls.__table__
+        insert = dialect_insert(connection, table)
+        connection.execute(insert.on_conflict_do_update(
+            index_elements=[table.c.assessment_id, table.c.day],
+            set_={
+                'submission_count': table.c.submission_count + insert.excluded.submission_count,
+                'scored_count': table.c.scored_count + insert.excluded.scored_count,
+                'score_sum': table.c.score_sum + insert.excluded.score_sum
+            }
+        ), [
+            {'assessment_id': assessment_id, 'day': day, **delta}
+            for (assessment_id, day), delta in deltas.items()
+        ])
+
+    @classmethod
+    def totals_query(cls, start=None, end=None):
+        """Daily totals per assessment kind between two dates (inclusive), from the rollup alone."""
+        query = db.select(
+            cls.day,
+            Assessment.kind,
+            func.sum(cls.submission_count),
+            func.sum(cls.scored_count),
+            func.sum(cls.score_sum)
+        ).join(Assessment, Assessment.id == cls.assessment_id).group_by(cls.day, Assessment.kind).order_by(cls.day)
+        if start is not None:
+            query = query.where(cls.day >= start)
+        if end is not None:
+            query = query.where(cls.day <= end)
+        return query
+
+@event.listens_for(Session, "after_flush")
+def _maintain_assessment_daily_stats(session, flush_context):
+    """Fold submission inserts, submits and score changes of this flush into the assessment_daily_stats rollup."""
+    deltas = {}
+    rebuild_assessment_ids = set()
+
+    def contribute(assessment_id, submitted_at, score, sign):
+        if assessment_id is None or submitted_at is None:
+            return
+        delta = deltas.setdefault((assessment_id, submitted_at.date()), {
+            'submission_count': 0, 'scored_count': 0, 'score_sum': 0.0
+        })
+        delta['submission_count'] += sign
+        if score is not None:
+            delta['scored_count'] += sign
+            delta['score_sum'] += sign * score
+
+    def previous(history, current):
+        if not history.has_changes():
+            return current
+        return history.deleted[0] if history.deleted else None
+
+    for obj in session.new:
+        if isinstance(obj, Submission):
+            contribute(obj.assessment_id, obj.submitted_at, obj.score, 1)
+
+    for obj in session.dirty:
+        if not isinstance(obj, Submission):
+            continue
+        state = inspect(obj)
+        if state.attrs.assessment_id.history.has_changes():
+            rebuild_assessment_ids.update(state.attrs.assessment_id.history.deleted)
+            rebuild_assessment_ids.add(obj.assessment_id)
+            continue
+        score_history = state.attrs.score.history
+        submitted_at_history = state.attrs.submitted_at.history
+        if score_history.has_changes() or submitted_at_history.has_changes():
+            contribute(obj.assessment_id, previous(submitted_at_history, obj.submitted_at),
+                       previous(score_history, obj.score), -1)
+            contribute(obj.assessment_id, obj.submitted_at, obj.score, 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, Submission):
+            rebuild_assessment_ids.add(obj.assessment_id)
+
+    deltas = {
+        key: delta for key, delta in deltas.items()
+        if key[0] not in rebuild_assessment_ids and (delta['submission_count'] or delta['scored_count'] or delta['score_sum'])
+    }
+    if deltas:
+        AssessmentDailyStats.apply_deltas(session.connection(), deltas)
+    if rebuild_assessment_ids - {None}:
+        AssessmentDailyStats.rebuild(session.connection(), rebuild_assessment_ids - {None})
@@ -0,0 +1,268 @@
+import asyncio
+import json
+import select
+import threading
+import time
+from flask import current_app, has_app_context  # type: ignore
+from sqlalchemy import event, inspect, text  # type: ignore
+from sqlalchemy.engine import make_url  # type: ignore
+from sqlalchemy.orm import Session  # type: ignore
+from models import db, Notification
+
+# PostgreSQL NOTIFY channel; payloads must stay under the server's 8000 byte limit
+CHANNEL = "notifications"
+MAX_PAYLOAD = 7900
+
+SSE_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+def format_event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+def notify(user_id, message, type='info'):
+    """Create a notification; it is pushed to the user's open streams when the transaction commits."""
+    notification = Notification(user_id=user_id, type=type, message=message, is_read=False)
+    db.session.add(notification)
+    return notification
+
+def notify_many(session, user_ids, message, type='info'):
+    """
+    Create the same notification for many users with one INSERT ... RETURNING instead of an ORM
+    object each, and publish their events as one batch. Like notify(), they are pushed when the
+    transaction commits. Returns the number of notifications created.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return 0
+    table = Notification.__table__
+    connection = session.connection()
+    created = connection.execute(
+        table.insert().returning(*table.c),
+        [{'user_id': user_id, 'type': type, 'message': message, 'is_read': False} for user_id in user_ids]
+    ).mappings().all()
+    broker = notification_broker()
+    if broker is not None:
+        # Serialized through a transient instance so the events match the ORM path exactly
+        broker.publish(session, notification_events(connection, [Notification(**row).to_dict() for row in created]))
+    return len(created)
+
+def notification_events(connection, created, changed_user_ids=()):
+    """
+    'notification' events for created notifications (as dicts) and 'unread' events for users whose
+    notifications changed, each carrying the user's unread count from one grouped query.
+    """
+    changed_user_ids = set(changed_user_ids)
+    user_ids = {notification['user_id'] for notification in created} | changed_user_ids
+    unread = dict(connection.execute(Notification.unread_counts_query(user_ids)).all())
+    events = [
+        {'user_id': notification['user_id'], 'event': 'notification',
+         'data': {'notification': notification, 'unread_count': unread.get(notification['user_id'], 0)}}
+        for notification in created
+    ]
+    events.extend(
+        {'user_id': user_id, 'event': 'unread', 'data': {'unread_count': unread.get(user_id, 0)}}
+        for user_id in changed_user_ids
+    )
+    return events
+
+class NotificationHub:
+    """In-process fan-out of notification events to the streams connected to this worker, keyed by user."""
+
+    def __init__(self):
+        self.subscribers = {}
+        self.lock = threading.Lock()
+
+    def subscribe(self, user_id, deliver):
+        """Register a non-blocking deliver(event) callback; returns a function that unsubscribes it."""
+        with self.lock:
+            self.subscribers.setdefault(user_id, set()).add(deliver)
+
+        def unsubscribe():
+            with self.lock:
+                callbacks = self.subscribers.get(user_id)
+                if callbacks is not None:
+                    callbacks.discard(deliver)
+                    if not callbacks:
+                        del self.subscribers[user_id]
+        return unsubscribe
+
+    def dispatch(self, event):
+        with self.lock:
+            callbacks = list(self.subscribers.get(event['user_id'], ()))
+        for deliver in callbacks:
+            deliver(event)
+
+class MemoryBroker:
+    """
+    Broker for SQLite and tests: events go straight to this process's hub once the transaction
+    commits. Streams served by other processes do not see them.
+    """
+
+    def __init__(self, hub):
+        self.hub = hub
+
+    def start(self):
+        pass
+
+    def publish(self, session, events):
+        session.info.setdefault('notification_events', []).extend(events)
+
+    def committed(self, events):
+        for event in events:
+            self.hub.dispatch(event)
+
+class PostgresBroker:
+    """
+    Broker over PostgreSQL LISTEN/NOTIFY. Events are sent with pg_notify inside the writing
+    transaction, so they are delivered exactly when it commits and never for a rollback. They are
+    packed into JSON arrays under the NOTIFY size limit and sent in one statement per publish,
+    so a batch of notifications costs one round trip. One listener thread per process, started by
+    the first stream, feeds the local hub and reconnects with backoff if its connection drops.
+    """
+
+    def __init__(self, hub, app):
+        self.hub = hub
+        self.app = app
+        self.listener = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        with self.lock:
+            if self.listener is None or not self.listener.is_alive():
+                self.listener = threading.Thread(target=self.listen, name="notification-listener", daemon=True)
+                self.listener.start()
+
+    def publish(self, session, events):
+        payloads = self.pack(events)
+        if payloads:
+            session.connection().execute(
+                text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+                {'channel': CHANNEL, 'payloads': payloads}
+            )
+
+    @staticmethod
+    def pack(events):
+        """Encode events as JSON arrays of at most MAX_PAYLOAD bytes each, in order."""
+        payloads = []
+        batch = []
+        size = 2
+        for event in events:
+            encoded = json.dumps(event)
+            if len(encoded.encode('utf-8')) > MAX_PAYLOAD - 2:
+                # Too large for NOTIFY: send the id only and let the listener load the row
+                data = dict(event['data'], notification={'id': event['data']['notification']['id']})
+                encoded = json.dumps(dict(event, data=data, truncated=True))
+            length = len(encoded.encode('utf-8')) + 1
+            if batch and size + length > MAX_PAYLOAD:
+                payloads.append('[' + ','.join(batch) + ']')
+                batch = []
+                size = 2
+            batch.append(encoded)
+            size += length
+        if batch:
+            payloads.append('[' + ','.join(batch) + ']')
+        return payloads
+
+    def committed(self, events):
+        pass
+
+    def connect(self):
+        with self.app.app_context():
+            engine = db.engine
+            url = make_url(self.app.config['DATABASE_LISTEN_URI']) if self.app.config.get('DATABASE_LISTEN_URI') else engine.url
+            cargs, cparams = engine.dialect.create_connect_args(url)
+            connection = engine.dialect.connect(*cargs, **cparams)
+        connection.autocommit = True
+        connection.cursor().execute(f"LISTEN {CHANNEL}")
+        return connection
+
+    def listen(self):
+        backoff = 1
+        while True:
+            try:
+                connection = self.connect()
+                backoff = 1
+                try:
+                    while True:
+                        if select.select([connection], [], [], 30) == ([], [], []):
+                            continue
+                        connection.poll()
+                        while connection.notifies:
+                            for event in json.loads(connection.notifies.pop(0).payload):
+                                self.hub.dispatch(self.load(event))
+                finally:
+                    connection.close()
+            except Exception as e:
+                self.app.logger.warning("Notification listener disconnected: %s; retrying in %ss", e, backoff)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+    def load(self, event):
+        if event.pop('truncated', False):
+            with self.app.app_context():
+                notification = db.session.get(Notification, event['data']['notification']['id'])
+                if notification is not None:
+                    event['data']['notification'] = notification.to_dict()
+        return event
+
+def init_notifications(app):
+    """Create the notification hub and broker for the configured database and register them on the app."""
+    hub = NotificationHub()
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql'):
+        broker = PostgresBroker(hub, app)
+    else:
+        broker = MemoryBroker(hub)
+    app.extensions['notifications'] = broker
+    return broker
+
+def notification_broker():
+    return current_app.extensions.get('notifications') if has_app_context() else None
+
+@event.listens_for(Session, "after_flush")
+def _publish_notification_events(session, flush_context):
+    """Turn created notifications and read-state changes into events carrying the user's unread count."""
+    created = [obj for obj in session.new if isinstance(obj, Notification)]
+    changed = [
+        obj for obj in session.dirty
+        if isinstance(obj, Notification) and inspect(obj).attrs.is_read.history.has_changes()
+    ]
+    deleted = [obj for obj in session.deleted if isinstance(obj, Notification)]
+    if not (created or changed or deleted):
+        return
+    broker = notification_broker()
+    if broker is None:
+        return
+
+    broker.publish(session, notification_events(
+        session.connection(), [obj.to_dict() for obj in created], {obj.user_id for obj in changed + deleted}
+    ))
+
+@event.listens_for(Session, "after_commit")
+def _deliver_committed_events(session):
+    events = session.info.pop('notification_events', None)
+    broker = notification_broker()
+    if events and broker is not None:
+        broker.committed(events)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_rolled_back_events(session, previous_transaction):
+    session.info.pop('notification_events', None)
+
+class AsyncSubscription:
+    """
+    A stream's bounded mailbox on the event loop; deliver() may be called from any thread. A stream
+    that falls this far behind is closed and the client reconnects.
+    """
+
+    def __init__(self, maxsize=100):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def deliver(self, event):
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
@@ -0,0 +1,77 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from sqlalchemy import func, select, tuple_  # type: ignore
+from werkzeug.exceptions import BadRequest  # type: ignore
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 100
+
+class InvalidCursor(BadRequest):
+    """Raised when a pagination cursor cannot be decoded."""
+
+def encode_cursor(created_at, id):
+    """Encode a (created_at, id) seek position as an opaque URL-safe string."""
+    payload = json.dumps([created_at.isoformat(), id]).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor back into (created_at, id)."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(created_at), int(id)
+    except (binascii.Error, ValueError, TypeError, UnicodeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+def wants_cursor(args):
+    """Cursor mode is opt-in: requested with ?cursor=... or ?limit=..."""
+    return 'cursor' in args or 'limit' in args
+
+def keyset_args(args):
+    """Read (limit, seek position or None, include_total) from the request args."""
+    limit = min(max(args.get('limit', DEFAULT_LIMIT, type=int), 1), MAX_LIMIT)
+    cursor = args.get('cursor')
+    include_total = args.get('include_total', 'false').lower() in ['true', '1', 't']
+    return limit, decode_cursor(cursor) if cursor else None, include_total
+
+def keyset_seek(query, model, limit, position=None):
+    """Order a Query or select() on (created_at, id) and seek past position, fetching one extra row."""
+    query = query.order_by(model.created_at, model.id)
+    if position:
+        created_at, id = position
+        query = query.filter(tuple_(model.created_at, model.id) > tuple_(created_at, id))
+    # The extra row tells whether another page exists without counting
+    return query.limit(limit + 1)
+
+def keyset_page(rows, limit, pagination):
+    """Trim the extra row fetched by keyset_seek and set the next cursor; returns (items, pagination)."""
+    items = rows[:limit]
+    last = items[-1] if len(rows) > limit else None
+    pagination["next_cursor"] = encode_cursor(last.created_at, last.id) if last else None
+    return items, pagination
+
+def keyset_paginate(query, model, args):
+    """
+    Seek-paginate a query on (created_at, id) instead of OFFSET.
+    Reads cursor, limit and include_total from the request args and returns
+    (items, pagination) where pagination holds limit, next_cursor and, if asked for, total.
+    """
+    limit, position, include_total = keyset_args(args)
+
+    pagination = {"limit": limit}
+    if include_total:
+        pagination["total"] = query.order_by(None).count()
+
+    return keyset_page(keyset_seek(query, model, limit, position).all(), limit, pagination)
+
+def keyset_paginate_select(session, statement, model, args):
+    """keyset_paginate for a select() statement executed on the given session."""
+    limit, position, include_total = keyset_args(args)
+
+    pagination = {"limit": limit}
+    if include_total:
+        pagination["total"] = session.scalar(select(func.count()).select_from(statement.order_by(None).subquery()))
+
+    return keyset_page(session.scalars(keyset_seek(statement, model, limit, position)).all(), limit, pagination)
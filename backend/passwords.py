@@ -0,0 +1,143 @@
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt  # type: ignore
+from werkzeug.exceptions import ServiceUnavailable  # type: ignore
+from werkzeug.security import check_password_hash, generate_password_hash  # type: ignore
+
+BCRYPT_PREFIXES = ('$2a$', '$2b$', '$2y$')
+
+# Stored for accounts created without a password (e.g. imported candidates); never verifies
+UNUSABLE_PASSWORD = '!'
+
+class PasswordHasherBusy(ServiceUnavailable):
+    """Raised when too many hash operations are already queued."""
+    description = "Too many login attempts in progress, please retry shortly."
+
+class PasswordHasher:
+    """
+    Single password hashing policy for the app.
+
+    New hashes use the configured scheme ('bcrypt' or 'pbkdf2') and cost. Verification understands
+    both bcrypt and Werkzeug pbkdf2/scrypt hashes, and needs_rehash() reports hashes made with
+    another scheme or cost so they can be upgraded transparently at login.
+
+    Hashing runs on a bounded thread pool (both bcrypt and hashlib release the GIL), so at most
+    `workers` hashes burn CPU at once while request threads simply wait. When more than
+    `max_pending` operations are queued, PasswordHasherBusy (HTTP 503) is raised instead.
+    Bulk hashing (hash_many) runs on a separate pool of `bulk_workers` threads, so an import
+    neither fills the interactive queue nor delays logins waiting on it.
+    """
+
+    def __init__(self, scheme='bcrypt', bcrypt_rounds=12, pbkdf2_iterations=600000, workers=None, max_pending=None,
+                 bulk_workers=None):
+        if scheme not in ('bcrypt', 'pbkdf2'):
+            raise ValueError(f"Unsupported password hash scheme: {scheme}")
+        self.scheme = scheme
+        self.bcrypt_rounds = bcrypt_rounds
+        self.pbkdf2_iterations = pbkdf2_iterations
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hasher")
+        self.pending = threading.BoundedSemaphore(max_pending or self.workers * 16)
+        self.bulk_workers = bulk_workers or max(1, self.workers // 2)
+        self.bulk_executor = ThreadPoolExecutor(max_workers=self.bulk_workers, thread_name_prefix="password-hasher-bulk")
+        # Verified against when the user does not exist, so response time does not reveal it
+        self.dummy_hash = self._hash('dummy-password')
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            scheme=config.get('PASSWORD_HASH_SCHEME', 'bcrypt'),
+            bcrypt_rounds=config.get('BCRYPT_LOG_ROUNDS', 12),
+            pbkdf2_iterations=config.get('PBKDF2_ITERATIONS', 600000),
+            workers=config.get('PASSWORD_HASH_WORKERS'),
+            max_pending=config.get('PASSWORD_HASH_MAX_PENDING'),
+            bulk_workers=config.get('PASSWORD_HASH_BULK_WORKERS')
+        )
+
+    @staticmethod
+    def _bcrypt_secret(password):
+        # bcrypt only uses the first 72 bytes; newer releases reject longer input instead of truncating
+        return password.encode('utf-8')[:72]
+
+    def _hash(self, password):
+        if self.scheme == 'bcrypt':
+            return bcrypt.hashpw(self._bcrypt_secret(password), bcrypt.gensalt(self.bcrypt_rounds)).decode('utf-8')
+        return generate_password_hash(password, method=f'pbkdf2:sha256:{self.pbkdf2_iterations}')
+
+    def _verify(self, password, stored_hash):
+        if stored_hash.startswith(BCRYPT_PREFIXES):
+            return bcrypt.checkpw(self._bcrypt_secret(password), stored_hash.encode('utf-8'))
+        try:
+            return check_password_hash(stored_hash, password)
+        except ValueError:
+            return False
+
+    def _offload(self, function, *args):
+        if not self.pending.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        try:
+            future = self.executor.submit(function, *args)
+        except Exception:
+            self.pending.release()
+            raise
+        future.add_done_callback(lambda _: self.pending.release())
+        return future.result()
+
+    def hash(self, password):
+        return self._offload(self._hash, password)
+
+    def hash_many(self, passwords):
+        """Hash a batch of passwords in parallel on the bulk pool, e.g. for an import."""
+        return list(self.bulk_executor.map(self._hash, passwords))
+
+    def verify(self, password, stored_hash):
+        """Check a password; pass stored_hash=None for unknown users to spend the same time."""
+        if stored_hash is None:
+            self._offload(self._verify, password, self.dummy_hash)
+            return False
+        return self._offload(self._verify, password, stored_hash)
+
+    def needs_rehash(self, stored_hash):
+        if self.scheme == 'bcrypt':
+            if not stored_hash.startswith(BCRYPT_PREFIXES):
+                return True
+            return int(stored_hash.split('$')[2]) != self.bcrypt_rounds
+        method = stored_hash.split('$', 1)[0].split(':')
+        return method[:2] != ['pbkdf2', 'sha256'] or len(method) < 3 or int(method[2]) != self.pbkdf2_iterations
+
+def benchmark(hasher, seconds=5.0, concurrency=None):
+    """Verify one hash from `concurrency` threads for `seconds`; returns (logins/sec, logins/sec per core)."""
+    concurrency = concurrency or hasher.workers * 4
+    stored_hash = hasher.hash('benchmark-password')
+    deadline = time.monotonic() + seconds
+    counts = [0] * concurrency
+
+    def login(index):
+        while time.monotonic() < deadline:
+            try:
+                hasher.verify('benchmark-password', stored_hash)
+                counts[index] += 1
+            except PasswordHasherBusy:
+                time.sleep(0.001)
+
+    threads = [threading.Thread(target=login, args=(index,)) for index in range(concurrency)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    rate = sum(counts) / (time.monotonic() - started)
+    return rate, rate / hasher.workers
+
+if __name__ == "__main__":
+    from config import Config
+
+    config = {key: getattr(Config, key) for key in dir(Config) if key.isupper()}
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    for scheme in ('bcrypt', 'pbkdf2'):
+        hasher = PasswordHasher.from_config({**config, 'PASSWORD_HASH_SCHEME': scheme})
+        rate, per_core = benchmark(hasher, seconds)
+        print(f"{scheme}: {rate:.1f} logins/sec with {hasher.workers} hashing threads ({per_core:.1f} logins/sec per core)")
@@ -0,0 +1,68 @@
+import sys
+from datetime import date
+from werkzeug.exceptions import BadRequest  # type: ignore
+from models import ASSESSMENT_KINDS, AssessmentDailyStats, db
+
+PERIODS = {'month': 'monthly', 'day': 'daily'}
+
+class InvalidStatisticsRange(BadRequest):
+    """Raised for malformed ?from=/?to=/?period= arguments to the performance statistics."""
+
+def statistics_args(args):
+    """Read (start date or None, end date or None, period) from the request args."""
+    period = args.get('period', 'month')
+    if period not in PERIODS:
+        raise InvalidStatisticsRange(f"Unsupported period '{period}'; use month or day.")
+    try:
+        start = date.fromisoformat(args['from']) if args.get('from') else None
+        end = date.fromisoformat(args['to']) if args.get('to') else None
+    except ValueError as e:
+        raise InvalidStatisticsRange(f"Dates must be YYYY-MM-DD: {e}") from e
+    return start, end, period
+
+def summarize(rows, period='month'):
+    """
+    Fold (day, kind, submission_count, scored_count, score_sum) rows, ordered by day, into one
+    entry per period with each kind's score total, counts and average score.
+    """
+    entries = {}
+    for day, kind, submission_count, scored_count, score_sum in rows:
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        label = day.isoformat() if period == 'day' else day.strftime('%Y-%m')
+        entry = entries.setdefault(label, {period: label, **{
+            key: 0 for kind_name in ASSESSMENT_KINDS for key in (kind_name, f'{kind_name}_count', f'{kind_name}_scored')
+        }})
+        entry[kind] += score_sum or 0
+        entry[f'{kind}_count'] += submission_count or 0
+        entry[f'{kind}_scored'] += scored_count or 0
+
+    summary = []
+    for entry in entries.values():
+        for kind in ASSESSMENT_KINDS:
+            scored = entry.pop(f'{kind}_scored')
+            entry[f'{kind}_average'] = round(entry[kind] / scored, 2) if scored else None
+        summary.append(entry)
+    return {PERIODS[period]: summary}
+
+if __name__ == "__main__":
+    from app import app
+
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    with app.app_context():
+        if command == "rebuild":
+            AssessmentDailyStats.rebuild()
+            db.session.commit()
+            print(f"Rebuilt {AssessmentDailyStats.query.count()} assessment daily stats rows")
+        elif command == "check":
+            mismatches = AssessmentDailyStats.check()
+            for mismatch in mismatches:
+                print(f"Assessment {mismatch['key'][0]} on {mismatch['key'][1]}: stored {mismatch['stored']} expected {mismatch['expected']}")
+            if mismatches:
+                print(f"Found {len(mismatches)} inconsistent rows, run 'python performance.py rebuild' to repair")
+            else:
+                print("Assessment daily stats are consistent with submissions")
+            sys.exit(1 if mismatches else 0)
+        else:
+            print("Usage: python performance.py [rebuild|check]")
+            sys.exit(2)
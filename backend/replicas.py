@@ -0,0 +1,187 @@
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from flask import current_app, request  # type: ignore
+from flask_sqlalchemy.session import Session  # type: ignore
+from sqlalchemy import event, text  # type: ignore
+from database import configure_engine, engine_options
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Time of the client's last write (Unix seconds), set on write responses and echoed back by the client
+LAST_WRITE_HEADER = 'X-Last-Write'
+LAST_WRITE_COOKIE = 'last_write'
+# Tolerated clock difference between the workers that set and read the write time
+CLOCK_SKEW = 1
+# Seconds behind the primary; 0 when the replica has replayed everything it received
+REPLICATION_LAG = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+def replica_binds(config):
+    """SQLALCHEMY_BINDS entries for the configured replicas, with the same engine options as the primary."""
+    return {
+        f'replica_{index}': {'url': uri, **engine_options(config, uri)}
+        for index, uri in enumerate(config.get('SQLALCHEMY_REPLICA_URIS') or [])
+    }
+
+class RoutingSession(Session):
+    """
+    Session that sends statements to the replica engine in `info['replica']`, set by @read_replica
+    for the duration of a read-only resource method. Flushes and DML always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = self.info.get('replica')
+        if replica is not None and bind is None and not self._flushing and not getattr(clause, 'is_dml', False):
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+@contextmanager
+def use_primary(session):
+    """Send the session's reads to the primary inside the block, even in a @read_replica method."""
+    replica = session.info.pop('replica', None)
+    try:
+        yield session
+    finally:
+        if replica is not None:
+            session.info['replica'] = replica
+
+def pinned_to_primary(headers, cookies, sticky_seconds):
+    """
+    Whether the client wrote within the last `sticky_seconds`, going by the write time it sends back
+    in the X-Last-Write header or the last_write cookie. The marker travels with the client, so it
+    holds whichever worker or server mode serves the read; times in the future are ignored.
+    """
+    try:
+        written_at = float(headers.get(LAST_WRITE_HEADER) or cookies.get(LAST_WRITE_COOKIE))
+    except (TypeError, ValueError):
+        return False
+    now = time.time()
+    return now - sticky_seconds < written_at <= now + CLOCK_SKEW
+
+class ReplicaRouter:
+    """
+    Picks a replica round-robin among the healthy ones. A background thread, started by the first
+    routed read, checks each replica every `health_interval` seconds and drops those that fail or
+    lag more than `max_lag` seconds; connection errors drop a replica straight away.
+
+    After a successful write, the client's reads stay on the primary for `sticky_seconds`, so it
+    sees its own changes (see pinned_to_primary).
+    """
+
+    def __init__(self, engines, sticky_seconds=5, health_interval=5, max_lag=10):
+        self.engines = engines
+        self.healthy = list(engines)
+        self.sticky_seconds = sticky_seconds
+        self.health_interval = health_interval
+        self.max_lag = max_lag
+        self.counter = itertools.count()
+        self.lock = threading.RLock()
+        self.stopping = threading.Event()
+        self.checker = None
+
+    def start(self):
+        with self.lock:
+            if self.checker is None:
+                # Check once before the first read rather than sending it to a replica that is down
+                self.check_all()
+            if self.checker is None or not self.checker.is_alive():
+                self.checker = threading.Thread(target=self.run, name="replica-health", daemon=True)
+                self.checker.start()
+
+    def stop(self, timeout=None):
+        self.stopping.set()
+        if self.checker is not None:
+            self.checker.join(timeout)
+
+    def run(self):
+        while not self.stopping.wait(self.health_interval):
+            self.check_all()
+
+    def check(self, key):
+        try:
+            with self.engines[key].connect() as connection:
+                if connection.dialect.name == 'postgresql':
+                    lag = connection.execute(REPLICATION_LAG).scalar() or 0
+                    if lag > self.max_lag:
+                        logger.warning("Replica %s is %.1fs behind; reading from the others", key, lag)
+                        return False
+                else:
+                    connection.execute(text("SELECT 1"))
+            return True
+        except Exception as e:
+            logger.warning("Replica %s failed its health check: %s", key, e)
+            return False
+
+    def check_all(self):
+        self.healthy = [key for key in self.engines if self.check(key)]
+
+    def mark_down(self, key):
+        with self.lock:
+            self.healthy = [healthy for healthy in self.healthy if healthy != key]
+
+    def watch(self, key, engine):
+        """Take replica `key` out of rotation when `engine`, one of its engines, cannot reach it."""
+        def replica_error(context):
+            # Failed connects (no connection yet) and dropped connections take the replica out of rotation
+            if context.connection is None or context.is_disconnect:
+                self.mark_down(key)
+        event.listen(engine, 'handle_error', replica_error)
+
+    def choose(self, pinned=False):
+        """A replica key for this read, or None to read from the primary, as for a client pinned to it."""
+        if self.checker is None:
+            self.start()
+        healthy = self.healthy
+        if pinned or not healthy:
+            return None
+        return healthy[next(self.counter) % len(healthy)]
+
+def init_replicas(app, db):
+    """Create the router for the replica binds (see replica_binds) and register it on the app; None without replicas."""
+    @app.after_request
+    def remember_write(response):
+        router = current_app.extensions.get('replicas')
+        if router is not None and request.method not in SAFE_METHODS and response.status_code < 400:
+            written_at = f"{time.time():.3f}"
+            response.headers[LAST_WRITE_HEADER] = written_at
+            response.set_cookie(LAST_WRITE_COOKIE, written_at, max_age=router.sticky_seconds, httponly=True, samesite='Lax')
+        return response
+
+    engines = {key: engine for key, engine in db.engines.items() if isinstance(key, str) and key.startswith('replica_')}
+    if not engines:
+        return None
+    config = app.config
+    router = ReplicaRouter(
+        engines, sticky_seconds=config.get('REPLICA_STICKY_SECONDS', 5),
+        health_interval=config.get('REPLICA_HEALTH_INTERVAL', 5), max_lag=config.get('REPLICA_MAX_LAG_SECONDS', 10)
+    )
+    for key, engine in engines.items():
+        configure_engine(engine, config)
+        router.watch(key, engine)
+    app.extensions['replicas'] = router
+    return router
+
+def read_replica(view):
+    """Run a read-only resource method on a replica, unless none is healthy or the client has just written."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        router = current_app.extensions.get('replicas')
+        if router is None:
+            return view(*args, **kwargs)
+        key = router.choose(pinned_to_primary(request.headers, request.cookies, router.sticky_seconds))
+        if key is None:
+            return view(*args, **kwargs)
+        session = current_app.extensions['sqlalchemy'].session
+        session.info['replica'] = router.engines[key]
+        try:
+            return view(*args, **kwargs)
+        finally:
+            session.info.pop('replica', None)
+    return wrapper
@@ -0,0 +1,141 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from models import db, RevokedToken
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings, sized for `capacity` items at `error_rate` false positives."""
+
+    def __init__(self, capacity=100000, error_rate=0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        # Double hashing: two 64-bit halves of one digest generate all k positions
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+class RevocationStore:
+    """
+    JWT revocation list shared by all workers through the revoked_tokens table.
+
+    Each worker mirrors the unexpired revoked jtis in a local Bloom filter, so the common
+    not-revoked check never touches the database; only Bloom hits are confirmed with a primary-key
+    lookup. Tokens already found clean are remembered until the filter gains new entries, which keeps
+    repeat checks to a set lookup. The filter pulls revocations made by other workers every
+    `sync_interval` seconds and is rebuilt (dropping expired tokens and purging their rows) every
+    `rebuild_interval` seconds.
+    """
+
+    # Overlap for incremental syncs, covering clock skew between app servers
+    SYNC_OVERLAP = timedelta(seconds=5)
+
+    def __init__(self, sync_interval=1.0, rebuild_interval=600, capacity=100000, error_rate=0.001):
+        self.sync_interval = sync_interval
+        self.rebuild_interval = rebuild_interval
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.confirmed = set()
+        self.clean = set()
+        self.lock = threading.Lock()
+        self.synced_at = None
+        self.next_sync = 0.0
+        self.next_rebuild = 0.0
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            sync_interval=config.get('REVOCATION_SYNC_INTERVAL', 1.0),
+            rebuild_interval=config.get('REVOCATION_REBUILD_INTERVAL', 600),
+            capacity=config.get('REVOCATION_BLOOM_CAPACITY', 100000)
+        )
+
+    def revoke(self, jti, expires_at):
+        """Record a revoked token until its expiry; the caller commits."""
+        if not db.session.get(RevokedToken, jti):
+            db.session.add(RevokedToken(jti=jti, expires_at=expires_at))
+        self.bloom.add(jti)
+        self.confirmed.add(jti)
+        self.clean = set()
+
+    def is_revoked(self, jti):
+        if time.monotonic() >= self.next_sync:
+            self.sync_if_due()
+        if jti in self.clean:
+            return False
+        if jti not in self.bloom:
+            if len(self.clean) >= self.capacity:
+                self.clean = set()
+            self.clean.add(jti)
+            return False
+        if jti in self.confirmed:
+            return True
+        revoked = db.session.query(RevokedToken.jti).filter(
+            RevokedToken.jti == jti, RevokedToken.expires_at > datetime.utcnow()
+        ).first() is not None
+        if revoked:
+            self.confirmed.add(jti)
+        return revoked
+
+    def is_revoked_locally(self, jti):
+        """is_revoked() without any I/O; returns None when a sync or database lookup is needed."""
+        if time.monotonic() >= self.next_sync:
+            return None
+        if jti in self.clean or jti not in self.bloom:
+            return False
+        return True if jti in self.confirmed else None
+
+    def sync_if_due(self):
+        now = time.monotonic()
+        if now < self.next_sync or not self.lock.acquire(blocking=False):
+            return
+        try:
+            if now >= self.next_rebuild:
+                self.rebuild()
+                self.next_rebuild = now + self.rebuild_interval
+            else:
+                self.pull()
+            self.next_sync = now + self.sync_interval
+        finally:
+            self.lock.release()
+
+    def pull(self):
+        """Add revocations recorded since the last sync, by any worker."""
+        started = datetime.utcnow()
+        pulled = False
+        for (jti,) in db.session.query(RevokedToken.jti).filter(
+            RevokedToken.revoked_at >= self.synced_at - self.SYNC_OVERLAP
+        ):
+            self.bloom.add(jti)
+            pulled = True
+        if pulled:
+            self.clean = set()
+        self.synced_at = started
+
+    def rebuild(self):
+        """Reload every unexpired revocation into a fresh filter and purge expired rows."""
+        started = datetime.utcnow()
+        # Purge on its own connection so the request's session transaction is left alone
+        with db.engine.begin() as connection:
+            connection.execute(RevokedToken.__table__.delete().where(RevokedToken.expires_at <= started))
+        bloom = BloomFilter(self.capacity, self.error_rate)
+        for (jti,) in db.session.query(RevokedToken.jti):
+            bloom.add(jti)
+        self.bloom = bloom
+        self.confirmed = set()
+        self.clean = set()
+        self.synced_at = started
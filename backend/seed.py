@@ -1,31 +1,27 @@
 from datetime import datetime, timedelta
 from flask import json
-from app import db, app
+from app import db, app, passwords
 from models import User, Assessment, Question, Invitation, Submission, Answer, Feedback, Notification
 from sqlalchemy.exc import IntegrityError
-from flask_bcrypt import Bcrypt
-
-# Initialize bcrypt
-bcrypt = Bcrypt()
 
 def seed_data():
     with app.app_context():
         # Dropping and creating all tables
-        db.drop_all()
+        db.drop_all(bind_key=None)
         print("Dropping the existing tables")
-        db.create_all()
+        db.create_all(bind_key=None)
         print("Creating all tables Afresh")
 
         # sample users with hashed passwords
         users = [
             User(username="recruiter1", first_name="Sarah", last_name="Mpengu", email="saram@gmail.com",
-                 role="recruiter", gender="female", password_hash=bcrypt.generate_password_hash("password").decode('utf-8'), company_name="Tech Corp"),
+                 role="recruiter", gender="female", password_hash=passwords.hash("password"), company_name="Tech Corp"),
             User(username="interviewee1", first_name="Rey", last_name="Jamal", email="ryj@gmail.com",
-                 role="interviewee", gender="male", password_hash=bcrypt.generate_password_hash("password").decode('utf-8'), consent=True),
+                 role="interviewee", gender="male", password_hash=passwords.hash("password"), consent=True),
             User(username="recruiter2", first_name="Babu", last_name="Msafi", email="babu@gmail.com",
-                 role="recruiter", gender="male", password_hash=bcrypt.generate_password_hash("password").decode('utf-8'), company_name="Biz Solutions"),
+                 role="recruiter", gender="male", password_hash=passwords.hash("password"), company_name="Biz Solutions"),
             User(username="interviewee2", first_name="Daisy", last_name="Nyaga", email="daisy@gmail.com",
-                 role="interviewee", gender="female", password_hash=bcrypt.generate_password_hash("password").decode('utf-8'), consent=False)
+                 role="interviewee", gender="female", password_hash=passwords.hash("password"), consent=False)
         ]
 
         db.session.add_all(users)
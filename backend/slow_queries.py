@@ -0,0 +1,250 @@
+import hashlib
+import json
+import logging
+import random
+import re
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from flask import current_app, has_request_context, request  # type: ignore
+from sqlalchemy import event  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r"(?<![\w.])\d+(?:\.\d+)?\b")
+PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<!:):\w+|\?")
+PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+VALUES_ROWS = re.compile(r"(\(\?(?:, \?)*\))(?:,\s*\(\?(?:, \?)*\))+")
+WHITESPACE = re.compile(r"\s+")
+READ_STATEMENT = re.compile(r"\s*(?:SELECT|WITH)\b", re.IGNORECASE)
+QUOTED_IDENTIFIER = re.compile(r'"(?:[^"]|"")*"')
+# Not re-run under EXPLAIN ANALYZE: row locks, side-effecting functions and writable CTEs
+UNSAFE_TO_EXPLAIN = re.compile(
+    r"\bFOR\s+(?:NO\s+KEY\s+|KEY\s+)?(?:UPDATE|SHARE)\b"
+    r"|\b(?:pg_notify|setval|nextval|pg_advisory_\w*|pg_try_advisory_\w*)\s*\("
+    r"|\b(?:INSERT|UPDATE|DELETE|MERGE)\b",
+    re.IGNORECASE
+)
+# Bind parameter dicts with more keys than this (expanded IN lists) are summarized
+MAX_SHAPE_KEYS = 20
+
+def normalize(statement):
+    """The statement with literals and bind parameters replaced by ?, and IN lists and VALUES rows collapsed."""
+    normalized = STRING_LITERAL.sub('?', statement)
+    normalized = PLACEHOLDER.sub('?', normalized)
+    normalized = NUMBER_LITERAL.sub('?', normalized)
+    normalized = WHITESPACE.sub(' ', normalized).strip()
+    normalized = VALUES_ROWS.sub(r'\1, ...', normalized)
+    return PLACEHOLDER_LIST.sub('(?...)', normalized)
+
+def fingerprint(normalized):
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+def parameter_shape(parameters, executemany=False):
+    """Names and types of the bind parameters, never their values."""
+    if executemany:
+        rows = list(parameters or ())
+        return {'rows': len(rows), 'row': parameter_shape(rows[0]) if rows else None}
+    if isinstance(parameters, dict):
+        if len(parameters) > MAX_SHAPE_KEYS:
+            return {'count': len(parameters), 'types': sorted({type(value).__name__ for value in parameters.values()})}
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if len(parameters) > MAX_SHAPE_KEYS:
+            return {'count': len(parameters), 'types': sorted({type(value).__name__ for value in parameters})}
+        return [type(value).__name__ for value in parameters]
+    return None
+
+def explainable(statement, executemany):
+    """Whether re-running the statement under EXPLAIN ANALYZE can only read."""
+    if executemany or not READ_STATEMENT.match(statement):
+        return False
+    return not UNSAFE_TO_EXPLAIN.search(QUOTED_IDENTIFIER.sub('""', STRING_LITERAL.sub("''", statement)))
+
+class SlowQueryLog:
+    """
+    Records statements slower than `threshold_ms` with their fingerprint, the endpoint that issued
+    them and the shape of their bind parameters. Recent entries are kept in a ring buffer and
+    appended to a JSONL file if `path` is set; totals per fingerprint feed /admin/slow-queries.
+
+    On PostgreSQL, `explain_rate` of slow SELECTs are run again under EXPLAIN (ANALYZE, BUFFERS), at
+    most once per fingerprint every `explain_interval` seconds, since this repeats the query's work.
+    Only plain reads are explained (see explainable()), and the run is always rolled back.
+    """
+
+    def __init__(self, threshold_ms=200, buffer_size=500, path=None, explain_rate=0.0, explain_interval=300,
+                 max_fingerprints=500):
+        self.threshold = threshold_ms / 1000
+        self.recent = deque(maxlen=buffer_size)
+        self.path = path
+        self.explain_rate = explain_rate
+        self.explain_interval = explain_interval
+        self.max_fingerprints = max_fingerprints
+        self.fingerprints = {}
+        self.explained_at = {}
+        self.lock = threading.Lock()
+        self.file = None
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            threshold_ms=config.get('SLOW_QUERY_THRESHOLD_MS', 200),
+            buffer_size=config.get('SLOW_QUERY_BUFFER_SIZE', 500),
+            path=config.get('SLOW_QUERY_LOG_PATH'),
+            explain_rate=config.get('SLOW_QUERY_EXPLAIN_RATE', 0.0),
+            explain_interval=config.get('SLOW_QUERY_EXPLAIN_INTERVAL', 300),
+        )
+
+    def instrument_engine(self, engine):
+        event.listen(engine, 'before_cursor_execute', self.before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self.after_cursor_execute)
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._slow_query_started = time.perf_counter()
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_slow_query_started', None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        if elapsed < self.threshold:
+            return
+        try:
+            self.record(conn, statement, parameters, executemany, elapsed)
+        except Exception:
+            # Never fail the query being measured
+            logger.exception("Could not record a slow query")
+
+    def record(self, conn, statement, parameters, executemany, elapsed):
+        normalized = normalize(statement)
+        key = fingerprint(normalized)
+        entry = {
+            'at': datetime.utcnow().isoformat(),
+            'duration_ms': round(elapsed * 1000, 2),
+            'fingerprint': key,
+            'statement': normalized,
+            'endpoint': request.endpoint if has_request_context() else None,
+            'method': request.method if has_request_context() else None,
+            'parameters': parameter_shape(parameters, executemany),
+            'plan': None,
+        }
+        if conn.dialect.name == 'postgresql' and explainable(statement, executemany) and self.should_explain(key):
+            entry['plan'] = self.explain(conn, statement, parameters)
+        self.add(entry)
+        if self.path:
+            self.append(entry)
+
+    def add(self, entry):
+        with self.lock:
+            self.recent.append(entry)
+            totals = self.fingerprints.get(entry['fingerprint'])
+            if totals is None:
+                if len(self.fingerprints) >= self.max_fingerprints:
+                    # Make room by dropping the fingerprint that has cost the least so far
+                    del self.fingerprints[min(self.fingerprints, key=lambda key: self.fingerprints[key]['total_ms'])]
+                totals = self.fingerprints[entry['fingerprint']] = {
+                    'fingerprint': entry['fingerprint'], 'statement': entry['statement'], 'count': 0,
+                    'total_ms': 0.0, 'max_ms': 0.0, 'endpoints': {}, 'last_seen': None, 'plan': None,
+                }
+            aggregate(totals, entry)
+
+    def should_explain(self, key):
+        if self.explain_rate <= 0 or random.random() >= self.explain_rate:
+            return False
+        now = time.monotonic()
+        with self.lock:
+            if now - self.explained_at.get(key, -self.explain_interval) < self.explain_interval:
+                return False
+            self.explained_at[key] = now
+        return True
+
+    def explain(self, conn, statement, parameters):
+        """
+        Plan of the statement, run again on the same connection inside a savepoint (or a transaction
+        of its own in autocommit mode) that is always rolled back: whatever the re-run did, including
+        any locks it took, is undone, and a failure leaves the caller's transaction intact.
+        """
+        dbapi_connection = conn.connection.dbapi_connection
+        cursor = dbapi_connection.cursor()
+        if getattr(dbapi_connection, 'autocommit', False):
+            begin, undo = ["BEGIN"], ["ROLLBACK"]
+        else:
+            begin = ["SAVEPOINT slow_query_explain"]
+            undo = ["ROLLBACK TO SAVEPOINT slow_query_explain", "RELEASE SAVEPOINT slow_query_explain"]
+        try:
+            for command in begin:
+                cursor.execute(command)
+            try:
+                cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement, parameters)
+                return cursor.fetchone()[0]
+            except Exception as e:
+                return {'error': str(e)}
+            finally:
+                for command in undo:
+                    cursor.execute(command)
+        finally:
+            cursor.close()
+
+    def append(self, entry):
+        line = json.dumps(entry, default=str) + "\n"
+        with self.lock:
+            if self.file is None:
+                self.file = open(self.path, 'a', encoding='utf-8')
+            self.file.write(line)
+            self.file.flush()
+
+    def summary(self, limit=50, recent=20):
+        """Fingerprints by total time spent, plus the most recent slow statements."""
+        with self.lock:
+            fingerprints = sorted(self.fingerprints.values(), key=lambda totals: totals['total_ms'], reverse=True)
+            fingerprints = [dict(totals, endpoints=dict(totals['endpoints'])) for totals in fingerprints[:limit]]
+            latest = list(self.recent)[-recent:][::-1] if recent else []
+        for totals in fingerprints:
+            totals['mean_ms'] = round(totals['total_ms'] / totals['count'], 2)
+            totals['total_ms'] = round(totals['total_ms'], 2)
+        return {'threshold_ms': self.threshold * 1000, 'fingerprints': fingerprints, 'recent': latest}
+
+def aggregate(totals, entry):
+    totals['count'] += 1
+    totals['total_ms'] += entry['duration_ms']
+    totals['max_ms'] = max(totals['max_ms'], entry['duration_ms'])
+    endpoint = entry['endpoint'] or 'background'
+    totals['endpoints'][endpoint] = totals['endpoints'].get(endpoint, 0) + 1
+    totals['last_seen'] = entry['at']
+    if entry['plan'] is not None:
+        totals['plan'] = entry['plan']
+
+def init_slow_query_log(app, engine, replicas=()):
+    """Create the slow query log from config, attach it to `engine` and any `replicas` and register it on the app."""
+    log = SlowQueryLog.from_config(app.config)
+    for instrumented in (engine, *replicas):
+        log.instrument_engine(instrumented)
+    app.extensions['slow_queries'] = log
+    return log
+
+def slow_query_log():
+    return current_app.extensions['slow_queries']
+
+if __name__ == "__main__":
+    # Totals per fingerprint from one or more JSONL logs, e.g. collected from every worker
+    if len(sys.argv) < 2:
+        print("Usage: python slow_queries.py <slow-queries.jsonl> [...]")
+        sys.exit(2)
+    fingerprints = {}
+    for path in sys.argv[1:]:
+        with open(path, encoding='utf-8') as lines:
+            for line in lines:
+                entry = json.loads(line)
+                totals = fingerprints.setdefault(entry['fingerprint'], {
+                    'statement': entry['statement'], 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                    'endpoints': {}, 'last_seen': None, 'plan': None,
+                })
+                aggregate(totals, entry)
+    for key, totals in sorted(fingerprints.items(), key=lambda item: item[1]['total_ms'], reverse=True):
+        endpoints = ', '.join(f"{endpoint} x{count}" for endpoint, count in totals['endpoints'].items())
+        print(f"{key}  {totals['count']:>6} calls  {totals['total_ms']:>10.1f} ms total  {totals['max_ms']:>8.1f} ms max  [{endpoints}]")
+        print(f"    {totals['statement'][:200]}")
@@ -0,0 +1,40 @@
+"""
+Shared fixtures. app.py reads its configuration from the environment on import, so the test
+database is chosen here first: a throwaway SQLite file by default, or TEST_DATABASE_URI (a scratch
+database, e.g. on PostgreSQL) to run the suite against another server. Every test gets empty tables.
+"""
+import os
+import tempfile
+
+os.environ['SQLALCHEMY_DATABASE_URI'] = os.getenv(
+    'TEST_DATABASE_URI', 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='smartrecruiter-tests-'), 'test.db')
+)
+os.environ['SQLALCHEMY_REPLICA_URIS'] = ''
+os.environ.setdefault('BCRYPT_LOG_ROUNDS', '4')
+# A periodic revocation sync would add a query to whichever request it lands on
+os.environ.setdefault('REVOCATION_SYNC_INTERVAL', '3600')
+
+import pytest  # type: ignore
+from app import app as flask_app
+from cache import LRUCache
+from models import db
+
+def reset_database():
+    """Recreate the tables and forget anything cached about the previous contents."""
+    db.session.remove()
+    db.drop_all(bind_key=None)
+    db.create_all(bind_key=None)
+    backend = flask_app.extensions['content_cache'].backend
+    if isinstance(backend, LRUCache):
+        backend.entries.clear()
+
+@pytest.fixture
+def app():
+    with flask_app.app_context():
+        reset_database()
+        yield flask_app
+        db.session.remove()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
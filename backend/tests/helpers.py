@@ -0,0 +1,87 @@
+import itertools
+from contextlib import contextmanager
+from flask_jwt_extended import create_access_token  # type: ignore
+from sqlalchemy import event  # type: ignore
+from models import db, Answer, Assessment, Invitation, Question, Submission, User
+
+_sequence = itertools.count(1)
+
+def create_user(role='interviewee', gender='female', **fields):
+    number = next(_sequence)
+    fields.setdefault('company_name', 'Tech Corp' if role == 'recruiter' else None)
+    user = User(
+        username=f'{role}{number}', first_name=role.title(), last_name=str(number), email=f'{role}{number}@example.com',
+        role=role, gender=gender, password_hash='x', consent=role == 'interviewee', **fields
+    )
+    db.session.add(user)
+    db.session.flush()
+    return user
+
+def create_assessment(recruiter, **fields):
+    fields.setdefault('title', f'Assessment {next(_sequence)}')
+    fields.setdefault('time_limit', 30)
+    fields.setdefault('is_published', True)
+    assessment = Assessment(recruiter_id=recruiter.id, **fields)
+    db.session.add(assessment)
+    db.session.flush()
+    return assessment
+
+def create_question(assessment, **fields):
+    fields.setdefault('type', 'multiple_choice')
+    fields.setdefault('text', 'What is 2 + 2?')
+    if fields['type'] == 'multiple_choice':
+        fields.setdefault('choices', {"A": "3", "B": "4"})
+        fields.setdefault('correct_answer', 'B')
+    question = Question(assessment_id=assessment.id, **fields)
+    db.session.add(question)
+    db.session.flush()
+    return question
+
+def invite(assessment, interviewee, status='accepted', **fields):
+    invitation = Invitation(assessment_id=assessment.id, interviewee_id=interviewee.id, status=status, **fields)
+    db.session.add(invitation)
+    db.session.flush()
+    return invitation
+
+def create_submission(assessment, interviewee, **fields):
+    submission = Submission(assessment_id=assessment.id, interviewee_id=interviewee.id, **fields)
+    db.session.add(submission)
+    db.session.flush()
+    return submission
+
+def answer(submission, question, answer_text, **fields):
+    row = Answer(submission_id=submission.id, question_id=question.id, answer_text=answer_text, **fields)
+    db.session.add(row)
+    db.session.flush()
+    return row
+
+def auth_headers(user):
+    return {'Authorization': f'Bearer {create_access_token(identity=user.id)}'}
+
+class QueryCounter:
+    """Records the SQL statements sent through the engine inside the block: `with QueryCounter() as queries:`."""
+
+    def __init__(self, engine=None):
+        self.engine = engine or db.engine
+        self.statements = []
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self.record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self.record)
+
+    def record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+@contextmanager
+def assert_max_queries(limit, engine=None):
+    """Fail if the block sends more than `limit` statements; the message lists them, to spot the N+1."""
+    with QueryCounter(engine) as queries:
+        yield queries
+    assert queries.count <= limit, f"{queries.count} statements, expected at most {limit}:\n" + "\n".join(queries.statements)
@@ -0,0 +1,109 @@
+"""SERVER_MODE=async: the natively served listings answer exactly like the Flask resources, and other routes fall through."""
+import asyncio
+import json
+import pytest  # type: ignore
+from models import db
+from notifications import notify
+from asgi import AsyncAPI
+from helpers import answer, auth_headers, create_assessment, create_question, create_submission, create_user, invite
+
+@pytest.fixture
+def application(app):
+    return AsyncAPI(app)
+
+def call(application, path, method='GET', headers=None, body=b''):
+    """Run one request through the ASGI application; returns (status, headers, body)."""
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'root_path': '', 'query_string': query.encode('ascii'),
+        'headers': [(key.lower().encode('latin-1'), value.encode('latin-1')) for key, value in (headers or {}).items()],
+        'http_version': '1.1', 'scheme': 'http', 'server': ('testserver', 80), 'client': ('127.0.0.1', 50000),
+    }
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    async def run():
+        try:
+            await application(scope, receive, send)
+        finally:
+            # Pooled aiosqlite connections belong to this event loop
+            await application.dispose()
+
+    asyncio.run(run())
+    start, *bodies = sent
+    response_headers = {key.decode('latin-1'): value.decode('latin-1') for key, value in start['headers']}
+    return start['status'], response_headers, b''.join(message.get('body', b'') for message in bodies)
+
+@pytest.fixture
+def seeded(app):
+    recruiter = create_user('recruiter')
+    assessments = [create_assessment(recruiter) for _ in range(3)]
+    for index in range(4):
+        candidate = create_user(gender=('male', 'female')[index % 2])
+        invite(assessments[0], candidate)
+        submission = create_submission(assessments[0], candidate, status='graded', score=40.0 + 10 * index)
+        answer(submission, create_question(assessments[index % 3]), 'B', is_correct=True, score=10.0)
+    db.session.commit()
+    return {'headers': auth_headers(recruiter), 'assessment_id': assessments[0].id}
+
+@pytest.mark.parametrize('path', [
+    '/assessments', '/assessments?limit=2', '/assessments?page=2&per_page=2',
+    '/questions/{assessment_id}', '/questions/{assessment_id}?limit=1',
+    '/invitations', '/invitations?limit=3&include_total=true',
+    '/interviewee/status',
+    '/interviewee/composition', '/interviewee/composition?by=gender&by=assessment,invitation_status',
+    '/interviewee/composition?by=company,invitation_status',
+    '/performance/statistics', '/performance/statistics?period=day',
+])
+def test_native_listings_match_flask(app, client, application, seeded, path):
+    path = path.format(**seeded)
+    expected = client.get(path, headers=seeded['headers'])
+    status, _, body = call(application, path, headers=seeded['headers'])
+    assert (status, json.loads(body)) == (expected.status_code, expected.get_json())
+    assert status == 200
+
+@pytest.mark.parametrize('path, status', [
+    ('/assessments?page=5', 404),
+    ('/invitations?per_page=0', 404),
+    ('/questions/{assessment_id}?page=9', 404),
+    ('/assessments?cursor=not-a-cursor', 400),
+    ('/interviewee/composition?by=shoe_size', 400),
+])
+def test_native_errors_match_flask(client, application, seeded, path, status):
+    path = path.format(**seeded)
+    assert client.get(path, headers=seeded['headers']).status_code == status
+    assert call(application, path, headers=seeded['headers'])[0] == status
+
+def test_other_routes_fall_through_to_flask(application, seeded):
+    body = json.dumps({'title': 'Through the fallback', 'recruiter_id': 1, 'time_limit': 20}).encode('utf-8')
+    status, _, created = call(application, '/assessments', method='POST', body=body, headers={
+        **seeded['headers'], 'Content-Type': 'application/json', 'Content-Length': str(len(body))
+    })
+    assert status == 201
+    assert json.loads(created)['title'] == 'Through the fallback'
+
+    # Streamed responses are relayed chunk by chunk
+    status, headers, export = call(application, f"/assessments/{seeded['assessment_id']}/export", headers=seeded['headers'])
+    assert status == 200
+    assert headers['content-type'].startswith('text/csv')
+    assert len(export.decode('utf-8').strip().splitlines()) == 5
+
+def test_notification_stream_is_only_served_natively(app, client, application, seeded, monkeypatch):
+    monkeypatch.setitem(app.config, 'NOTIFICATION_HEARTBEAT', 0.05)
+    user = create_user()
+    notify(user.id, "You have been invited.")
+    db.session.commit()
+
+    # A sync worker would be held for the life of the stream
+    assert client.get('/notifications/stream', headers=auth_headers(user)).status_code == 501
+
+    status, headers, body = call(application, '/notifications/stream', headers=auth_headers(user))
+    assert status == 200
+    assert headers['content-type'] == 'text/event-stream'
+    assert 'event: unread\ndata: {"unread_count": 1}' in body.decode('utf-8')
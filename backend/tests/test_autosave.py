@@ -0,0 +1,67 @@
+import threading
+from datetime import datetime, timedelta
+import pytest  # type: ignore
+from autosave import AnswerWindowClosed, finish_submission, save_answers
+from expiry import ExpiryScheduler
+from models import db, Notification, Submission
+from helpers import auth_headers, create_assessment, create_question, create_user
+
+@pytest.fixture
+def started(app, client):
+    recruiter = create_user('recruiter')
+    assessment = create_assessment(recruiter, time_limit=10)
+    question = create_question(assessment)
+    candidate = create_user()
+    db.session.commit()
+    headers = auth_headers(candidate)
+    response = client.post(f'/interviewee/assessments/{assessment.id}/start', headers=headers)
+    assert response.status_code == 201
+    return {
+        'headers': headers, 'candidate_id': candidate.id, 'question_id': question.id,
+        'submission_id': response.get_json()['data']['submission']['id']
+    }
+
+def graded_notifications(user_id):
+    return Notification.query.filter_by(user_id=user_id, message="Your assessment has been graded.").count()
+
+def expire_elsewhere(app, submission_id):
+    """The expiry scheduler auto-submitting the submission from its own thread and session, as if overdue."""
+    def run():
+        with app.app_context():
+            ExpiryScheduler(app).submit_overdue([submission_id], datetime.utcnow() + timedelta(hours=1))
+            db.session.remove()
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join(10)
+
+def test_second_submit_is_rejected_and_grades_once(client, started):
+    path = f"/interviewee/submissions/{started['submission_id']}/submit"
+    answers = {'answers': [{'question_id': started['question_id'], 'answer_text': 'B'}]}
+    first = client.post(path, headers=started['headers'], json=answers)
+    assert first.status_code == 200
+    assert first.get_json()['data']['score'] == 100.0
+    assert client.post(path, headers=started['headers'], json=answers).status_code == 409
+    assert graded_notifications(started['candidate_id']) == 1
+
+def test_submit_racing_the_expiry_scheduler_grades_once(app, started):
+    # The request loaded the submission while it was still in progress...
+    submission = db.session.get(Submission, started['submission_id'])
+    assert submission.status == 'in_progress'
+    # ...then the scheduler closed and graded it before the request got to finish it
+    expire_elsewhere(app, submission.id)
+    with pytest.raises(AnswerWindowClosed):
+        finish_submission(submission)
+    db.session.rollback()
+    assert graded_notifications(started['candidate_id']) == 1
+    assert db.session.get(Submission, submission.id).status == 'graded'
+
+def test_autosave_after_expiry_is_rejected(app, client, started):
+    submission = db.session.get(Submission, started['submission_id'])
+    expire_elsewhere(app, submission.id)
+    with pytest.raises(AnswerWindowClosed):
+        save_answers(submission, [{'question_id': started['question_id'], 'answer_text': 'A'}])
+    db.session.rollback()
+    response = client.patch(f"/interviewee/submissions/{submission.id}/answers", headers=started['headers'], json={
+        'answers': [{'question_id': started['question_id'], 'answer_text': 'A'}]
+    })
+    assert response.status_code == 409
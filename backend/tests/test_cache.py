@@ -0,0 +1,71 @@
+"""Assessment and question payloads are cached per content version and revalidated with ETags."""
+import pytest  # type: ignore
+from cache import content_cache
+from models import db
+from helpers import QueryCounter, auth_headers, create_assessment, create_question, create_user
+
+@pytest.fixture
+def recruiter(app):
+    recruiter = create_user('recruiter')
+    db.session.commit()
+    return recruiter
+
+@pytest.fixture
+def assessment(recruiter):
+    assessment = create_assessment(recruiter, title='Original')
+    create_question(assessment)
+    db.session.commit()
+    return assessment
+
+@pytest.mark.parametrize('path', ['/assessments/{id}', '/questions/{id}', '/questions/{id}?per_page=1'])
+def test_unchanged_content_is_not_modified(client, recruiter, assessment, path):
+    path = path.format(id=assessment.id)
+    headers = auth_headers(recruiter)
+    first = client.get(path, headers=headers)
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+    etag = first.headers['ETag']
+
+    revalidated = client.get(path, headers=dict(headers, **{'If-None-Match': etag}))
+    assert revalidated.status_code == 304
+    assert revalidated.headers['ETag'] == etag
+    assert revalidated.data == b''
+
+def test_update_changes_the_etag(client, recruiter, assessment):
+    headers = auth_headers(recruiter)
+    etag = client.get(f'/assessments/{assessment.id}', headers=headers).headers['ETag']
+    assert client.put(f'/assessments/{assessment.id}', headers=headers, json={'title': 'Renamed'}).status_code == 200
+
+    response = client.get(f'/assessments/{assessment.id}', headers=dict(headers, **{'If-None-Match': etag}))
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.get_json()['title'] == 'Renamed'
+
+def test_new_question_changes_the_questions_etag(client, recruiter, assessment):
+    headers = auth_headers(recruiter)
+    etag = client.get(f'/questions/{assessment.id}', headers=headers).headers['ETag']
+    response = client.post(f'/questions/{assessment.id}', headers=headers, json={
+        'type': 'multiple_choice', 'text': 'What is 3 + 3?', 'choices': {'A': '6'}, 'correct_answer': 'A'
+    })
+    assert response.status_code == 201
+
+    response = client.get(f'/questions/{assessment.id}', headers=dict(headers, **{'If-None-Match': etag}))
+    assert response.status_code == 200
+    assert len(response.get_json()) == 2
+
+def test_delete_bumps_the_version_in_its_transaction(client, recruiter):
+    assessment = create_assessment(recruiter)
+    db.session.commit()
+    headers = auth_headers(recruiter)
+    etag = client.get(f'/assessments/{assessment.id}', headers=headers).headers['ETag']
+    assert content_cache().backend.get(content_cache().version_key(assessment.id)) is not None
+
+    with QueryCounter() as queries:
+        assert client.delete(f'/assessments/{assessment.id}', headers=headers).status_code == 204
+    writes = [statement.split(' SET')[0].split(' WHERE')[0] for statement in queries.statements
+              if statement.startswith(('UPDATE', 'DELETE'))]
+    assert writes == ['UPDATE assessments', 'DELETE FROM assessments']
+    assert content_cache().backend.get(content_cache().version_key(assessment.id)) is None
+
+    response = client.get(f'/assessments/{assessment.id}', headers=dict(headers, **{'If-None-Match': etag}))
+    assert response.status_code == 404
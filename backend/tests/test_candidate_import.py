@@ -0,0 +1,84 @@
+import csv
+import io
+import json
+import pytest  # type: ignore
+import app as server
+from models import db, EmailOutbox, PasswordReset, User
+from helpers import auth_headers, create_user
+
+HEADER = ['First Name', 'Last Name', 'Username', 'Email', 'Gender', 'Consent', 'Password']
+ROWS = [
+    ['Alice', 'Smith', 'alice', 'alice@example.com', 'Female', 'yes', 'secret'],
+    ['Bob', 'Jones', 'bob', 'bob@example.com', 'male', 'true', ''],
+    ['Alicia', 'Smith', 'alice', 'alicia@example.com', 'female', 'true', ''],
+    ['Carol', '', 'carol', 'carol-at-example.com', 'robot', 'maybe', ''],
+    ['', '', '', '', '', '', ''],
+    ['Taken', 'Email', 'taken', 'existing@example.com', 'other', 'no', ''],
+    ['Robert', 'Jones', 'bob', 'robert@example.com', 'male', 'true', ''],
+]
+
+def as_csv(rows):
+    text = io.StringIO()
+    csv.writer(text).writerows(rows)
+    return io.BytesIO(text.getvalue().encode('utf-8')), 'candidates.csv'
+
+def as_xlsx(rows):
+    openpyxl = pytest.importorskip('openpyxl')
+    workbook = openpyxl.Workbook()
+    for row in rows:
+        workbook.active.append([value or None for value in row])
+    stream = io.BytesIO()
+    workbook.save(stream)
+    stream.seek(0)
+    return stream, 'candidates.xlsx'
+
+@pytest.fixture
+def recruiter(app):
+    recruiter = create_user('recruiter')
+    create_user().email = 'existing@example.com'
+    db.session.commit()
+    return recruiter
+
+def upload(client, user, file, batch_size=3):
+    return client.post(f'/recruiter/interviewees/import?batch_size={batch_size}', headers=auth_headers(user),
+                       data={'file': file}, content_type='multipart/form-data')
+
+@pytest.mark.parametrize('build', [as_csv, as_xlsx])
+def test_rejected_rows_are_reported_row_by_row(client, recruiter, build):
+    response = upload(client, recruiter, build([HEADER] + ROWS))
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    events = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    # Row numbers match the spreadsheet: the header is row 1 and the blank row 6 is skipped
+    assert events == [
+        {'event': 'error', 'row': 4, 'errors': ['username appears earlier in the file']},
+        {'event': 'progress', 'processed': 3, 'created': 2, 'invited': 1, 'failed': 1},
+        {'event': 'error', 'row': 5, 'errors': [
+            'last_name is required', 'email is not a valid address', 'gender must be one of male, female, other',
+            'consent must be true or false'
+        ]},
+        {'event': 'error', 'row': 7, 'errors': ['email already exists']},
+        {'event': 'error', 'row': 8, 'errors': ['username appears earlier in the file']},
+        {'event': 'progress', 'processed': 6, 'created': 2, 'invited': 1, 'failed': 4},
+        {'event': 'done', 'processed': 6, 'created': 2, 'invited': 1, 'failed': 4},
+    ]
+
+    alice = User.query.filter_by(username='alice').one()
+    bob = User.query.filter_by(username='bob').one()
+    assert (alice.email, alice.gender, alice.role, alice.consent) == ('alice@example.com', 'female', 'interviewee', True)
+    assert server.passwords.verify('secret', alice.password_hash)
+    # Only the candidate without a password is invited to set one
+    assert [reset.user_id for reset in PasswordReset.query] == [bob.id]
+    assert [email.recipient for email in EmailOutbox.query] == ['bob@example.com']
+
+def test_import_needs_the_required_columns(client, recruiter):
+    response = upload(client, recruiter, as_csv([['username', 'email'], ['dave', 'dave@example.com']]))
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'Missing required columns: first_name, last_name, gender, consent'
+    assert User.query.filter_by(username='dave').count() == 0
+
+def test_only_recruiters_can_import(client, recruiter):
+    candidate = create_user()
+    db.session.commit()
+    assert upload(client, candidate, as_csv([HEADER] + ROWS)).status_code == 403
+    assert User.query.filter_by(username='alice').count() == 0
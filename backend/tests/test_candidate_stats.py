@@ -0,0 +1,105 @@
+"""The candidate_stats rollup stays equal to a fresh aggregate of the submissions through every write path."""
+from datetime import datetime
+import pytest  # type: ignore
+from autosave import finish_submission, start_submission
+from grading import grade_submission, regrade_assessment
+from models import db, CandidateStats, Question, Submission
+from helpers import answer, auth_headers, create_assessment, create_question, create_submission, create_user, invite
+
+@pytest.fixture
+def recruiter(app):
+    recruiter = create_user('recruiter')
+    db.session.commit()
+    return recruiter
+
+def two_question_assessment(recruiter):
+    assessment = create_assessment(recruiter)
+    first, second = create_question(assessment, correct_answer='B'), create_question(assessment, correct_answer='A')
+    db.session.commit()
+    return assessment, [first.id, second.id]
+
+def stats(user_id):
+    db.session.expire_all()
+    row = db.session.get(CandidateStats, user_id)
+    return (row.submission_count, row.scored_count, row.average_score) if row else None
+
+def test_submit_grades_and_rolls_up(client, recruiter):
+    candidate = create_user()
+    for answers in (['B', 'B'], ['B', 'A']):
+        assessment, question_ids = two_question_assessment(recruiter)
+        invite(assessment, candidate)
+        db.session.commit()
+        response = client.post(f'/interviewee/assessments/{assessment.id}/submit', headers=auth_headers(candidate), json={
+            'answers': [{'question_id': id, 'answer_text': text} for id, text in zip(question_ids, answers)]
+        })
+        assert response.status_code == 201
+    assert CandidateStats.check() == []
+    assert stats(candidate.id) == (2, 2, 75.0)
+
+def test_started_then_finished_submission(app, recruiter):
+    candidate = create_user()
+    assessment, question_ids = two_question_assessment(recruiter)
+    invite(assessment, candidate)
+    submission, _ = start_submission(assessment.id, candidate.id)
+    db.session.commit()
+    # Started but not yet scored: counted, without a score
+    assert CandidateStats.check() == []
+    assert stats(candidate.id) == (1, 0, None)
+
+    answer(submission, db.session.get(Question, question_ids[0]), 'B')
+    answer(submission, db.session.get(Question, question_ids[1]), 'A')
+    finish_submission(submission)
+    db.session.commit()
+    assert CandidateStats.check() == []
+    assert stats(candidate.id) == (1, 1, 100.0)
+
+def test_grading_a_submitted_submission(app, recruiter):
+    candidate = create_user()
+    assessment, question_ids = two_question_assessment(recruiter)
+    submission = create_submission(assessment, candidate, status='submitted', submitted_at=datetime.utcnow())
+    answer(submission, db.session.get(Question, question_ids[0]), 'B')
+    db.session.commit()
+    assert grade_submission(submission) == 50.0
+    db.session.commit()
+    assert CandidateStats.check() == []
+    assert stats(candidate.id) == (1, 1, 50.0)
+
+def test_regrade_after_an_answer_key_change(app, recruiter):
+    assessment, question_ids = two_question_assessment(recruiter)
+    candidates = [create_user() for _ in range(3)]
+    for candidate in candidates:
+        submission = create_submission(assessment, candidate, status='graded', score=50.0, submitted_at=datetime.utcnow())
+        answer(submission, db.session.get(Question, question_ids[0]), 'B')
+        answer(submission, db.session.get(Question, question_ids[1]), 'B')
+    # Another assessment's score must survive the rebuild of these candidates' rows
+    create_submission(create_assessment(recruiter), candidates[0], status='graded', score=90.0)
+    db.session.get(Question, question_ids[1]).correct_answer = 'B'
+    db.session.commit()
+
+    assert regrade_assessment(assessment.id, batch_size=2) == 3
+    assert CandidateStats.check() == []
+    assert stats(candidates[0].id) == (2, 2, 95.0)
+    assert stats(candidates[1].id) == (1, 1, 100.0)
+
+def test_rescore_reassign_and_delete(app, recruiter):
+    first, second = create_user(), create_user()
+    assessment = create_assessment(recruiter)
+    kept = create_submission(assessment, first, status='graded', score=80.0, submitted_at=datetime(2024, 1, 1))
+    moved = create_submission(assessment, first, status='graded', score=40.0, submitted_at=datetime(2024, 2, 1))
+    db.session.commit()
+    assert CandidateStats.check() == []
+
+    kept.score = 60.0
+    db.session.commit()
+    assert CandidateStats.check() == []
+    assert stats(first.id) == (2, 2, 50.0)
+
+    moved.interviewee_id = second.id
+    db.session.commit()
+    assert CandidateStats.check() == []
+    assert (stats(first.id), stats(second.id)) == ((1, 1, 60.0), (1, 1, 40.0))
+
+    db.session.delete(db.session.get(Submission, moved.id))
+    db.session.commit()
+    assert CandidateStats.check() == []
+    assert stats(second.id) is None
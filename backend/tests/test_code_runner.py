@@ -0,0 +1,45 @@
+import pytest  # type: ignore
+from code_runner import CodeRunner
+
+TEST_CASES = {
+    'language': 'python', 'entrypoint': 'double',
+    'cases': [{'args': [2], 'expected': 4}, {'args': [5], 'expected': 10}, {'args': [-1], 'expected': -2}]
+}
+
+@pytest.fixture
+def runner():
+    runner = CodeRunner(workers=1, time_limit=10)
+    yield runner
+    runner.executor.shutdown()
+
+def test_correct_answer_passes(runner):
+    outcome = runner.run(TEST_CASES, 'def double(x):\n    return 2 * x\n')
+    assert (outcome['passed'], outcome['total']) == (3, 3)
+
+CHEATS = {
+    'module globals': '''
+import sys
+calls = iter(range(100))
+
+def double(x):
+    return sys.modules['__main__'].spec['cases'][next(calls)]['expected']
+''',
+    'call stack': '''
+import sys
+calls = iter(range(100))
+
+def double(x):
+    index, frame = next(calls), sys._getframe(1)
+    while frame is not None:
+        spec = frame.f_locals.get('spec')
+        if isinstance(spec, dict):
+            return spec['cases'][index]['expected']
+        frame = frame.f_back
+''',
+}
+
+@pytest.mark.parametrize('answer_text', CHEATS.values(), ids=CHEATS.keys())
+def test_answer_cannot_read_the_expected_outputs(runner, answer_text):
+    outcome = runner.run(TEST_CASES, answer_text)
+    assert outcome['passed'] == 0
+    assert all(result['error'] for result in outcome['results'])
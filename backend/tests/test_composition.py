@@ -0,0 +1,24 @@
+from models import db
+from helpers import auth_headers, create_assessment, create_user, invite
+
+def test_company_breakdown_counts_invitations_by_the_recruiters_company(client):
+    acme = create_user('recruiter', company_name='Acme')
+    globex = create_user('recruiter', company_name='Globex')
+    acme_assessment, globex_assessment = create_assessment(acme), create_assessment(globex)
+    for index in range(3):
+        interviewee = create_user(gender=('male', 'female')[index % 2])
+        invite(acme_assessment, interviewee)
+        if index:
+            invite(globex_assessment, interviewee)
+    db.session.commit()
+
+    response = client.get('/interviewee/composition?by=company&by=company,gender', headers=auth_headers(acme))
+    assert response.status_code == 200
+    breakdowns = response.get_json()
+    assert breakdowns['company'] == [{'company': 'Acme', 'count': 3}, {'company': 'Globex', 'count': 2}]
+    assert breakdowns['company,gender'] == [
+        {'company': 'Acme', 'gender': 'female', 'count': 1},
+        {'company': 'Acme', 'gender': 'male', 'count': 2},
+        {'company': 'Globex', 'gender': 'female', 'count': 1},
+        {'company': 'Globex', 'gender': 'male', 'count': 1},
+    ]
@@ -0,0 +1,65 @@
+import pytest  # type: ignore
+from sqlalchemy import create_engine  # type: ignore
+from sqlalchemy.pool import NullPool  # type: ignore
+from asgi import AsyncAPI
+from database import configure_engine, engine_options
+
+POSTGRES = 'postgresql+psycopg2://app@db/smartrecruiter'
+ASYNC_POSTGRES = 'postgresql+asyncpg://app@db/smartrecruiter'
+CONFIG = {
+    'SQLALCHEMY_DATABASE_URI': POSTGRES,
+    'SQLALCHEMY_POOL_CLASS': 'queue',
+    'SQLALCHEMY_POOL_SIZE': 20,
+    'SQLALCHEMY_MAX_OVERFLOW': 0,
+    'SQLALCHEMY_POOL_TIMEOUT': 3,
+    'SQLALCHEMY_POOL_RECYCLE': 300,
+    'SQLALCHEMY_POOL_PRE_PING': False,
+    'DATABASE_STATEMENT_TIMEOUT_MS': 5000,
+    'DATABASE_APPLICATION_NAME': 'smartrecruiter-web',
+    'DATABASE_PGBOUNCER': False,
+    'ASYNC_POOL_SIZE': 4,
+    'ASYNC_MAX_OVERFLOW': 2,
+}
+
+def test_pool_settings_reach_the_engine():
+    options = engine_options(CONFIG)
+    assert options == {
+        'pool_size': 20, 'max_overflow': 0, 'pool_timeout': 3, 'pool_recycle': 300, 'pool_pre_ping': False,
+        'connect_args': {'application_name': 'smartrecruiter-web', 'options': '-c statement_timeout=5000'},
+    }
+    engine = create_engine(POSTGRES, **options)
+    assert (engine.pool.size(), engine.pool._max_overflow, engine.pool._timeout) == (20, 0, 3)
+
+def test_null_pool_for_pgbouncer_sets_the_timeout_per_transaction():
+    config = dict(CONFIG, SQLALCHEMY_POOL_CLASS='null', DATABASE_PGBOUNCER=True)
+    options = engine_options(config)
+    assert options == {'poolclass': NullPool, 'connect_args': {'application_name': 'smartrecruiter-web'}}
+
+    engine = create_engine(POSTGRES, **options)
+    configure_engine(engine, config)
+    assert len(engine.dispatch.begin) == 1
+    # Without PgBouncer the timeout is a startup parameter and nothing is added
+    direct = create_engine(POSTGRES)
+    configure_engine(direct, CONFIG)
+    assert len(direct.dispatch.begin) == 0
+
+def test_asyncpg_behind_pgbouncer_does_not_prepare_statements():
+    options = engine_options(dict(CONFIG, DATABASE_PGBOUNCER=True), ASYNC_POSTGRES)
+    connect_args = options['connect_args']
+    assert connect_args['server_settings'] == {'application_name': 'smartrecruiter-web'}
+    assert (connect_args['statement_cache_size'], connect_args['prepared_statement_cache_size']) == (0, 0)
+    assert connect_args['prepared_statement_name_func']() != connect_args['prepared_statement_name_func']()
+    assert engine_options(CONFIG, ASYNC_POSTGRES)['connect_args'] == {
+        'server_settings': {'application_name': 'smartrecruiter-web', 'statement_timeout': '5000'}
+    }
+
+def test_async_engine_has_its_own_pool_size():
+    options = AsyncAPI.engine_options(dict(CONFIG, ASYNC_DATABASE_URI=ASYNC_POSTGRES))
+    assert (options['pool_size'], options['max_overflow'], options['pool_recycle']) == (4, 2, 300)
+
+def test_sqlite_keeps_flask_sqlalchemys_pools():
+    assert engine_options(CONFIG, 'sqlite:///test.db') == {}
+
+def test_unknown_pool_class_is_rejected():
+    with pytest.raises(ValueError, match='SQLALCHEMY_POOL_CLASS'):
+        engine_options(dict(CONFIG, SQLALCHEMY_POOL_CLASS='static'))
@@ -0,0 +1,98 @@
+import time
+from datetime import datetime, timedelta
+import pytest  # type: ignore
+from expiry import ExpiryScheduler
+from models import db, CandidateStats, Invitation, Notification, Submission
+from helpers import answer, create_assessment, create_question, create_submission, create_user, invite
+
+@pytest.fixture
+def recruiter(app):
+    recruiter = create_user('recruiter')
+    db.session.commit()
+    return recruiter
+
+def statuses(model):
+    db.session.expire_all()
+    return {row.id: row.status for row in model.query}
+
+def test_invitation_expires_at_its_deadline(app, recruiter):
+    assessment = create_assessment(recruiter)
+    soon = invite(assessment, create_user(), status='pending', expiry_date=datetime.utcnow() + timedelta(seconds=0.3))
+    later = invite(assessment, create_user(), status='pending', expiry_date=datetime.utcnow() + timedelta(hours=1))
+    accepted = invite(assessment, create_user(), status='accepted', expiry_date=datetime.utcnow() - timedelta(hours=1))
+    db.session.commit()
+
+    scheduler = ExpiryScheduler(app)
+    scheduler.refresh()
+    # Only the invitation inside the horizon is loaded; accepted ones never are
+    assert [(kind, id) for _, kind, id in scheduler.heap] == [('invitation', soon.id)]
+    assert scheduler.fire_due() == (0, 0)
+    assert 0 < scheduler.seconds_until_due(60) <= 0.3
+
+    time.sleep(0.35)
+    assert scheduler.fire_due() == (1, 0)
+    assert statuses(Invitation) == {soon.id: 'expired', later.id: 'pending', accepted.id: 'accepted'}
+
+def test_invitation_accepted_before_its_deadline_is_left_alone(app, recruiter):
+    invitation = invite(create_assessment(recruiter), create_user(), status='pending',
+                        expiry_date=datetime.utcnow() + timedelta(seconds=0.1))
+    db.session.commit()
+    scheduler = ExpiryScheduler(app)
+    scheduler.refresh()
+    invitation.status = 'accepted'
+    db.session.commit()
+
+    time.sleep(0.15)
+    assert scheduler.fire_due() == (0, 0)
+    assert statuses(Invitation) == {invitation.id: 'accepted'}
+
+def test_overdue_submission_is_submitted_and_graded(app, recruiter):
+    assessment = create_assessment(recruiter, time_limit=10)
+    question = create_question(assessment, correct_answer='B')
+    candidate = create_user()
+    started = datetime.utcnow() - timedelta(minutes=11)
+    overdue = create_submission(assessment, candidate, status='in_progress', created_at=started)
+    answer(overdue, question, 'B')
+    running = create_submission(create_assessment(recruiter, time_limit=60), create_user(), status='in_progress')
+    db.session.commit()
+
+    scheduler = ExpiryScheduler(app)
+    scheduler.refresh()
+    assert scheduler.fire_due() == (0, 1)
+    submission = db.session.get(Submission, overdue.id)
+    assert (submission.status, submission.score) == ('graded', 100.0)
+    assert submission.submitted_at is not None
+    assert statuses(Submission)[running.id] == 'in_progress'
+    assert Notification.query.filter_by(user_id=candidate.id).count() == 2
+    assert CandidateStats.check() == []
+
+def test_raised_time_limit_puts_the_submission_back_on_the_heap(app, recruiter):
+    assessment = create_assessment(recruiter, time_limit=10)
+    submission = create_submission(assessment, create_user(), status='in_progress',
+                                   created_at=datetime.utcnow() - timedelta(minutes=11))
+    db.session.commit()
+    scheduler = ExpiryScheduler(app)
+    scheduler.refresh()
+    assessment.time_limit = 30
+    db.session.commit()
+
+    assert scheduler.fire_due() == (0, 0)
+    assert statuses(Submission) == {submission.id: 'in_progress'}
+    (due, kind, id), = scheduler.heap
+    assert (kind, id) == ('submission', submission.id)
+    assert due > datetime.utcnow() + timedelta(minutes=18)
+
+def test_scheduler_thread_expires_invitations(app, recruiter, monkeypatch):
+    monkeypatch.setitem(app.config, 'EXPIRY_REFRESH_INTERVAL', 0.05)
+    invitation = invite(create_assessment(recruiter), create_user(), status='pending',
+                        expiry_date=datetime.utcnow() + timedelta(seconds=0.2))
+    db.session.commit()
+    scheduler = ExpiryScheduler(app)
+    scheduler.start()
+    try:
+        deadline = time.monotonic() + 5
+        while statuses(Invitation)[invitation.id] != 'expired' and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        scheduler.stop(timeout=5)
+    assert statuses(Invitation) == {invitation.id: 'expired'}
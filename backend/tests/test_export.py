@@ -0,0 +1,70 @@
+import csv
+import io
+import json
+import pytest  # type: ignore
+import export
+from models import db, Feedback
+from helpers import answer, auth_headers, create_assessment, create_question, create_submission, create_user
+
+@pytest.fixture
+def graded(app):
+    """Three submissions: answered with feedback, answered without, and empty with submission-wide feedback."""
+    recruiter = create_user('recruiter')
+    assessment = create_assessment(recruiter)
+    first, second = create_question(assessment), create_question(assessment)
+    submissions = [create_submission(assessment, create_user(), status='graded', score=50.0) for _ in range(3)]
+    answer(submissions[0], first, 'B', is_correct=True, score=10.0)
+    answer(submissions[0], second, '=HYPERLINK("http://example.com")', is_correct=False, score=0.0)
+    answer(submissions[1], first, 'A', is_correct=False, score=0.0)
+    db.session.add_all([
+        Feedback(submission_id=submissions[0].id, question_id=first.id, recruiter_id=recruiter.id, text='Good', score=10.0),
+        Feedback(submission_id=submissions[0].id, question_id=first.id, recruiter_id=recruiter.id, text='Fast', score=9.0),
+        Feedback(submission_id=submissions[2].id, question_id=None, recruiter_id=recruiter.id, text='Overall fine'),
+    ])
+    # Another assessment's submission must not leak into the export
+    create_submission(create_assessment(recruiter), create_user(), status='graded')
+    db.session.commit()
+    return {'recruiter': recruiter, 'assessment_id': assessment.id, 'submission_ids': [s.id for s in submissions],
+            'question_ids': [first.id, second.id]}
+
+def download(client, graded, format=None, user=None):
+    query = f'?format={format}' if format else ''
+    return client.get(f"/assessments/{graded['assessment_id']}/export{query}", headers=auth_headers(user or graded['recruiter']))
+
+def test_csv_has_a_row_per_answer_and_feedback(client, graded):
+    response = download(client, graded)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    assert f"assessment-{graded['assessment_id']}-submissions.csv" in response.headers['Content-Disposition']
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    first, second = graded['question_ids']
+    assert [(int(row['submission_id']), row['question_id'], row['answer'], row['feedback']) for row in rows] == [
+        (graded['submission_ids'][0], str(first), 'B', 'Good\nFast'),
+        # Formulas are neutralized for spreadsheet programs
+        (graded['submission_ids'][0], str(second), '\'=HYPERLINK("http://example.com")', ''),
+        (graded['submission_ids'][1], str(first), 'A', ''),
+        (graded['submission_ids'][2], '', '', 'Overall fine'),
+    ]
+    assert rows[0]['feedback_score'] == '9.0'
+
+def test_ndjson_has_a_record_per_submission(client, graded):
+    response = download(client, graded, 'ndjson')
+    assert response.status_code == 200
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [record['submission_id'] for record in records] == graded['submission_ids']
+    assert [len(record['answers']) for record in records] == [2, 1, 0]
+    assert [len(record['feedback']) for record in records] == [2, 0, 1]
+    assert records[0]['interviewee']['email'].endswith('@example.com')
+
+def test_large_exports_are_streamed_in_chunks(client, graded, monkeypatch):
+    monkeypatch.setattr(export, 'CHUNK_SIZE', 100)
+    response = download(client, graded, 'ndjson')
+    assert response.is_streamed
+    chunks = [chunk for chunk in response.response if chunk]
+    assert len(chunks) == 3
+
+@pytest.mark.parametrize('format, user_role, status', [('xlsx', None, 400), (None, 'recruiter', 403), (None, 'interviewee', 403)])
+def test_export_is_validated(client, graded, format, user_role, status):
+    user = create_user(user_role) if user_role else None
+    db.session.commit()
+    assert download(client, graded, format, user).status_code == status
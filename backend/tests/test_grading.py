@@ -0,0 +1,109 @@
+from datetime import datetime
+import pytest  # type: ignore
+from grading import grade_submission, regrade_assessment
+from models import db, Answer, AssessmentDailyStats, Submission
+from helpers import QueryCounter, answer, auth_headers, create_assessment, create_question, create_submission, create_user
+
+@pytest.fixture
+def graded(app):
+    """A recruiter's assessment with one graded submission whose answer the key now marks wrong."""
+    recruiter = create_user('recruiter')
+    assessment = create_assessment(recruiter)
+    question = create_question(assessment, correct_answer='A')
+    candidate = create_user()
+    submission = create_submission(assessment, candidate, status='graded', score=100.0)
+    answer(submission, question, 'B', is_correct=True, score=10.0)
+    db.session.commit()
+    return {'recruiter': recruiter, 'assessment_id': assessment.id, 'submission_id': submission.id}
+
+def regrade(client, user, assessment_id):
+    return client.post(f'/assessments/{assessment_id}/regrade', headers=auth_headers(user))
+
+def test_recruiter_regrades_own_assessment(client, graded):
+    response = regrade(client, graded['recruiter'], graded['assessment_id'])
+    assert response.status_code == 200
+    assert response.get_json()['data'] == {'assessment_id': graded['assessment_id'], 'regraded': 1}
+    assert db.session.get(Submission, graded['submission_id']).score == 0.0
+
+@pytest.mark.parametrize('role', ['recruiter', 'interviewee'])
+def test_only_the_owner_can_regrade(client, graded, role):
+    response = regrade(client, create_user(role), graded['assessment_id'])
+    assert response.status_code == 403
+    db.session.expire_all()
+    assert db.session.get(Submission, graded['submission_id']).score == 100.0
+
+VALID_TEST_CASES = {'language': 'python', 'entrypoint': 'double', 'cases': [{'args': [2], 'expected': 4}]}
+
+@pytest.mark.parametrize('test_cases', [
+    {'cases': [{'args': [2], 'expected': 4}]},
+    {**VALID_TEST_CASES, 'entrypoint': 'not a name'},
+    {**VALID_TEST_CASES, 'language': 'ruby'},
+    {**VALID_TEST_CASES, 'cases': []},
+    {**VALID_TEST_CASES, 'cases': {'args': [2], 'expected': 4}},
+    {**VALID_TEST_CASES, 'cases': [{'args': 2, 'expected': 4}]},
+    {**VALID_TEST_CASES, 'cases': [{'args': [2]}]},
+])
+def test_question_test_cases_are_validated(client, test_cases):
+    recruiter = create_user('recruiter')
+    assessment = create_assessment(recruiter)
+    db.session.commit()
+    response = client.post(f'/questions/{assessment.id}', headers=auth_headers(recruiter), json={
+        'type': 'coding', 'text': 'Double it', 'test_cases': test_cases
+    })
+    assert response.status_code == 400
+    assert 'test' in response.get_json()['message'].lower()
+    response = client.post(f'/questions/{assessment.id}', headers=auth_headers(recruiter), json={
+        'type': 'coding', 'text': 'Double it', 'test_cases': VALID_TEST_CASES
+    })
+    assert response.status_code == 201
+
+def test_answer_that_cannot_be_run_scores_zero(app):
+    recruiter = create_user('recruiter')
+    assessment = create_assessment(recruiter)
+    multiple_choice = create_question(assessment)
+    # Stored before test cases were validated: the runner cannot call an unnamed entrypoint
+    coding = create_question(assessment, type='coding', test_cases={'cases': [{'args': [2], 'expected': 4}]})
+    submission = create_submission(assessment, create_user(), status='submitted')
+    answer(submission, multiple_choice, 'B')
+    broken = answer(submission, coding, 'def double(x):\n    return 2 * x\n')
+    db.session.commit()
+
+    assert grade_submission(submission) == 50.0
+    db.session.commit()
+    db.session.expire_all()
+    broken = db.session.get(Answer, broken.id)
+    assert (broken.score, broken.is_correct) == (0.0, False)
+    assert 'entrypoint' in broken.grading_error
+    assert db.session.get(Submission, submission.id).status == 'graded'
+
+def test_regrade_rebuilds_daily_stats_once(app):
+    recruiter = create_user('recruiter')
+    assessment = create_assessment(recruiter)
+    question = create_question(assessment, correct_answer='A')
+    for index in range(5):
+        submission = create_submission(
+            assessment, create_user(), status='graded', score=100.0, submitted_at=datetime.utcnow()
+        )
+        answer(submission, question, 'A' if index < 2 else 'B', is_correct=True, score=10.0)
+    db.session.commit()
+
+    with QueryCounter() as queries:
+        assert regrade_assessment(assessment.id, batch_size=2) == 5
+    rebuilds = [statement for statement in queries.statements if statement.startswith('DELETE FROM assessment_daily_stats')]
+    assert len(rebuilds) == 1
+    (stats,) = AssessmentDailyStats.query.filter_by(assessment_id=assessment.id).all()
+    assert (stats.submission_count, stats.scored_count, stats.score_sum) == (5, 5, 200.0)
+
+def test_moving_a_submission_rebuilds_both_assessments_daily_stats(app):
+    recruiter = create_user('recruiter')
+    source, target = create_assessment(recruiter), create_assessment(recruiter)
+    submission = create_submission(source, create_user(), status='graded', score=70.0, submitted_at=datetime.utcnow())
+    db.session.commit()
+
+    # Expired by the commit, so the previous assessment is only known through active history
+    submission.assessment_id = target.id
+    db.session.commit()
+    assert AssessmentDailyStats.check() == []
+    assert AssessmentDailyStats.query.filter_by(assessment_id=source.id).count() == 0
+    (stats,) = AssessmentDailyStats.query.filter_by(assessment_id=target.id).all()
+    assert (stats.submission_count, stats.score_sum) == (1, 70.0)
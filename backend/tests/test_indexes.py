@@ -0,0 +1,117 @@
+"""
+The hot-path queries are planned onto their indexes (see migration c4e9a1f3b2d6 and the models'
+__table_args__). Each query runs as the application sends it; the plan is taken on the same
+connection with EXPLAIN QUERY PLAN on SQLite, or EXPLAIN (FORMAT JSON) on PostgreSQL with
+sequential scans discouraged, since a small test table may be cheaper to scan than to index.
+"""
+import json
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import pytest  # type: ignore
+from sqlalchemy import event, func, text  # type: ignore
+from app import app as flask_app
+from conftest import reset_database
+from dataset import DatasetGenerator, generate
+from models import db, Answer, Feedback, Invitation, Question, Submission, User
+
+@pytest.fixture(scope='module')
+def dataset():
+    with flask_app.app_context():
+        reset_database()
+        generate(DatasetGenerator(
+            recruiters=20, candidates=2000, assessments=80, questions=5, invitations=6000, submissions=4000
+        ), log=lambda message: None)
+        if db.engine.dialect.name == 'sqlite':
+            db.session.execute(text("ANALYZE"))
+            db.session.commit()
+        yield
+        db.session.remove()
+
+@pytest.fixture
+def plans(dataset):
+    with flask_app.app_context():
+        with captured_plans() as captured:
+            yield captured
+        db.session.rollback()
+
+@contextmanager
+def captured_plans():
+    """Collect the plan of every statement run inside the block, as plain text."""
+    engine = db.engine
+    captured = []
+    postgres = engine.dialect.name == 'postgresql'
+
+    def explain(conn, cursor, statement, parameters, context, executemany):
+        explain_cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            if postgres:
+                explain_cursor.execute("SET LOCAL enable_seqscan = off")
+                explain_cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+                captured.append(json.dumps(explain_cursor.fetchone()[0]))
+            else:
+                explain_cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+                captured.append("\n".join(row[-1] for row in explain_cursor.fetchall()))
+        finally:
+            explain_cursor.close()
+
+    event.listen(engine, 'before_cursor_execute', explain)
+    try:
+        yield captured
+    finally:
+        event.remove(engine, 'before_cursor_execute', explain)
+
+def sample(column):
+    return db.session.query(column).order_by(column).limit(1).scalar()
+
+def assert_uses_index(plans, index):
+    assert plans, "no statement was executed"
+    assert any(index in plan for plan in plans), f"{index} not used:\n" + "\n---\n".join(plans)
+
+def test_interviewee_accepted_invitations(plans):
+    interviewee_id = sample(Invitation.interviewee_id)
+    plans.clear()
+    Invitation.with_assessment().filter_by(interviewee_id=interviewee_id, status='accepted').limit(10).all()
+    assert_uses_index(plans, 'ix_invitations_interviewee_id_status_created_at_id')
+
+def test_assessment_accepted_invitations(plans):
+    assessment_id = sample(Invitation.assessment_id)
+    plans.clear()
+    Invitation.with_interviewee().filter_by(assessment_id=assessment_id, status='accepted').all()
+    assert_uses_index(plans, 'ix_invitations_assessment_id_status')
+
+def test_pending_invitation_expiry(plans):
+    db.session.query(Invitation.id, Invitation.expiry_date).filter(
+        Invitation.status == 'pending', Invitation.expiry_date <= datetime.utcnow() + timedelta(minutes=15)
+    ).all()
+    assert_uses_index(plans, 'ix_invitations_pending_expiry_date')
+
+def test_assessment_questions(plans):
+    assessment_id = sample(Question.assessment_id)
+    plans.clear()
+    Question.query.filter_by(assessment_id=assessment_id).order_by(Question.created_at, Question.id).limit(10).all()
+    assert_uses_index(plans, 'ix_questions_assessment_id_created_at_id')
+
+@pytest.mark.parametrize('column, index', [
+    (Submission.assessment_id, 'ix_submissions_assessment_id'),
+    (Submission.interviewee_id, 'ix_submissions_interviewee_id'),
+])
+def test_submission_foreign_keys(plans, column, index):
+    value = sample(column)
+    plans.clear()
+    Submission.query.filter(column == value).all()
+    assert_uses_index(plans, index)
+
+def test_submission_answers_and_feedback(plans):
+    submission_id, feedback_submission_id = sample(Answer.submission_id), sample(Feedback.submission_id)
+    plans.clear()
+    Answer.query.filter_by(submission_id=submission_id).all()
+    # Served by the (submission_id, question_id) unique constraint, whose index SQLite names itself
+    assert_uses_index(plans, 'uq_answers_submission_id_question_id' if db.engine.dialect.name == 'postgresql'
+                      else 'sqlite_autoindex_answers')
+    plans.clear()
+    Feedback.query.filter_by(submission_id=feedback_submission_id).all()
+    assert_uses_index(plans, 'ix_feedback_submission_id')
+
+def test_interviewees_by_gender(plans):
+    db.session.query(func.count(User.id)).filter(User.role == 'interviewee', User.gender == 'female').scalar()
+    assert_uses_index(plans, 'ix_users_role_gender')
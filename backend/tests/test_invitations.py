@@ -0,0 +1,84 @@
+import pytest  # type: ignore
+from models import db, EmailOutbox, Invitation, Notification
+from helpers import QueryCounter, auth_headers, create_assessment, create_user, invite
+
+@pytest.fixture
+def recruiter(app):
+    user = create_user('recruiter')
+    db.session.commit()
+    return user
+
+def bulk_invite(client, recruiter, assessment_id, interviewee_ids):
+    return client.post('/invitations', headers=auth_headers(recruiter), json={
+        'assessment_id': assessment_id, 'interviewee_ids': interviewee_ids
+    })
+
+def test_bulk_invite_skips_existing_and_unknown_ids(client, recruiter):
+    assessment = create_assessment(recruiter)
+    candidates = [create_user() for _ in range(5)]
+    invite(assessment, candidates[0], status='pending')
+    db.session.commit()
+    ids = [candidate.id for candidate in candidates]
+    response = bulk_invite(client, recruiter, assessment.id, ids + [ids[1], 999999, recruiter.id])
+    assert response.status_code == 201
+    assert response.get_json()['data'] == {
+        'requested': 7, 'created': 4, 'skipped_existing': 1, 'invalid_ids': [999999, recruiter.id]
+    }
+    assert Invitation.query.filter_by(assessment_id=assessment.id).count() == 5
+    assert EmailOutbox.query.count() == 4
+    assert Notification.query.count() == 4
+
+@pytest.mark.parametrize('interviewee_ids', [[1, None], [[1]], [{'id': 1}], ['one'], [1.5], [True]])
+def test_bulk_invite_rejects_ids_that_are_not_integers(client, recruiter, interviewee_ids):
+    assessment = create_assessment(recruiter)
+    db.session.commit()
+    response = bulk_invite(client, recruiter, assessment.id, interviewee_ids)
+    assert response.status_code == 400
+    assert response.get_json()['message'] == "Invalid invitation data."
+    assert Invitation.query.count() == 0
+
+def test_bulk_invite_notifies_in_one_statement_per_batch(app, client, recruiter, monkeypatch):
+    monkeypatch.setitem(app.config, 'INVITATION_BATCH_SIZE', 3)
+    assessment = create_assessment(recruiter)
+    candidates = [create_user() for _ in range(7)]
+    db.session.commit()
+    events = []
+    unsubscribes = [
+        app.extensions['notifications'].hub.subscribe(candidate.id, events.append) for candidate in candidates
+    ]
+    try:
+        with QueryCounter() as queries:
+            response = bulk_invite(client, recruiter, assessment.id, [candidate.id for candidate in candidates])
+    finally:
+        for unsubscribe in unsubscribes:
+            unsubscribe()
+    assert response.status_code == 201
+    inserts = [statement for statement in queries.statements if statement.startswith('INSERT INTO notifications')]
+    assert len(inserts) == 3
+    assert sorted(event['user_id'] for event in events) == sorted(candidate.id for candidate in candidates)
+    assert {(event['event'], event['data']['unread_count']) for event in events} == {('notification', 1)}
+    assert all(assessment.title in event['data']['notification']['message'] for event in events)
+
+def test_bulk_invite_looks_ids_up_in_batches(app, client, recruiter, monkeypatch):
+    monkeypatch.setitem(app.config, 'INVITATION_BATCH_SIZE', 3)
+    assessment = create_assessment(recruiter)
+    candidates = [create_user() for _ in range(7)]
+    for candidate in candidates[:2]:
+        invite(assessment, candidate, status='pending')
+    db.session.commit()
+    ids = [candidate.id for candidate in candidates] + [999998, 999999]
+    with QueryCounter() as queries:
+        response = bulk_invite(client, recruiter, assessment.id, ids)
+    assert response.get_json()['data'] == {
+        'requested': 9, 'created': 5, 'skipped_existing': 2, 'invalid_ids': [999998, 999999]
+    }
+    statements = [' '.join(statement.split()) for statement in queries.statements]
+    lookups = [
+        statement for statement in statements
+        if statement.startswith('SELECT') and ' IN (' in statement
+        and (' FROM users ' in statement or ' FROM invitations ' in statement)
+    ]
+    # Users: 9 ids in 3 queries; invitations: the 7 valid ids in 3
+    assert len(lookups) == 6
+    # At most 3 ids each, plus the role or assessment filter
+    assert all(statement.count('?') <= 4 for statement in lookups)
@@ -0,0 +1,167 @@
+"""The outbox worker delivering to a local SMTP sink (aiosmtpd), with retries and the per-provider rate limit."""
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+import pytest  # type: ignore
+from flask_mail import Mail  # type: ignore
+from models import db, EmailOutbox
+import mailer
+from mailer import OutboxWorker, RateLimiter, enqueue_email
+
+aiosmtpd_controller = pytest.importorskip('aiosmtpd.controller')
+
+class Sink:
+    """aiosmtpd handler keeping every delivered message; recipients in `refuse` are rejected with a 550."""
+
+    def __init__(self):
+        self.delivered = []
+        self.refuse = set()
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.refuse:
+            return '550 Mailbox unavailable'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        self.delivered.append((time.monotonic(), envelope.rcpt_tos[0], envelope.content.decode('utf-8', 'replace')))
+        return '250 Message accepted for delivery'
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+@pytest.fixture
+def sink():
+    handler = Sink()
+    controller = aiosmtpd_controller.Controller(handler, hostname='127.0.0.1', port=free_port())
+    controller.start()
+    handler.port = controller.port
+    yield handler
+    controller.stop()
+
+@pytest.fixture
+def worker(app, sink, monkeypatch):
+    """A worker sending through the sink; config overrides are applied before it is created."""
+    def make(port=None, **config):
+        mail = Mail()
+        mail.state = mail.init_mail({
+            'MAIL_SERVER': '127.0.0.1', 'MAIL_PORT': port or sink.port, 'MAIL_USE_TLS': False,
+            'MAIL_DEFAULT_SENDER': 'noreply@example.com',
+        })
+        monkeypatch.setitem(app.extensions, 'mail', mail.state)
+        settings = {
+            'MAIL_WORKERS': 1, 'MAIL_BATCH_SIZE': 50, 'MAIL_MAX_ATTEMPTS': 3, 'MAIL_RETRY_BACKOFF': 30,
+            'MAIL_RATE_LIMIT': 1000, 'MAIL_POLL_INTERVAL': 0.05,
+            # Rate limiters are shared per provider, so each worker gets a provider of its own
+            'MAIL_SERVER': f'sink-{uuid.uuid4()}',
+        }
+        settings.update(config)
+        for key, value in settings.items():
+            monkeypatch.setitem(app.config, key, value)
+        return OutboxWorker(app, mail)
+    return make
+
+def queue(*recipients):
+    emails = [enqueue_email(recipient, f"Hello {recipient}", "Body") for recipient in recipients]
+    db.session.commit()
+    return [email.id for email in emails]
+
+def rows():
+    db.session.expire_all()
+    return {email.recipient: email for email in EmailOutbox.query}
+
+def test_batch_is_delivered_and_marked_sent(worker, sink):
+    queue('a@example.com', 'b@example.com', 'c@example.com')
+    assert worker().drain_once() == 3
+    assert sorted(recipient for _, recipient, _ in sink.delivered) == ['a@example.com', 'b@example.com', 'c@example.com']
+    assert all('Subject: Hello' in content for _, _, content in sink.delivered)
+    assert {(email.status, email.attempts) for email in rows().values()} == {('sent', 1)}
+    assert worker().drain_once() == 0
+
+def test_refused_recipient_backs_off_then_fails(worker, sink):
+    sink.refuse.add('bounce@example.com')
+    queue('ok@example.com', 'bounce@example.com')
+    outbox = worker(MAIL_MAX_ATTEMPTS=3, MAIL_RETRY_BACKOFF=30)
+
+    before = datetime.utcnow()
+    assert outbox.drain_once() == 2
+    emails = rows()
+    assert emails['ok@example.com'].status == 'sent'
+    bounce = emails['bounce@example.com']
+    assert (bounce.status, bounce.attempts) == ('pending', 1)
+    assert 'bounce@example.com' in bounce.last_error
+    assert before + timedelta(seconds=29) <= bounce.next_attempt_at <= datetime.utcnow() + timedelta(seconds=31)
+    # Not due yet
+    assert outbox.drain_once() == 0
+
+    for attempt, backoff in ((2, 60), (3, None)):
+        bounce.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+        before = datetime.utcnow()
+        assert outbox.drain_once() == 1
+        bounce = rows()['bounce@example.com']
+        assert bounce.attempts == attempt
+        if backoff:
+            # Doubled per attempt
+            assert bounce.status == 'pending'
+            assert before + timedelta(seconds=backoff - 1) <= bounce.next_attempt_at
+        else:
+            assert bounce.status == 'failed'
+    assert outbox.drain_once() == 0
+    assert [recipient for _, recipient, _ in sink.delivered] == ['ok@example.com']
+
+def test_unreachable_server_retries_the_whole_batch(worker):
+    queue('a@example.com', 'b@example.com')
+    assert worker(port=free_port()).drain_once() == 2
+    assert {(email.status, email.attempts) for email in rows().values()} == {('pending', 1)}
+
+def test_rate_limit_spaces_out_deliveries(worker, sink):
+    queue(*[f'user{index}@example.com' for index in range(10)])
+    started = time.monotonic()
+    assert worker(MAIL_RATE_LIMIT=5).drain_once() == 10
+    # A full bucket covers the first 5; the other 5 wait 0.2s each
+    assert time.monotonic() - started >= 0.9
+    times = [at for at, _, _ in sink.delivered]
+    assert times[-1] - times[4] >= 0.75
+
+def test_worker_threads_drain_the_outbox(worker, sink):
+    queue(*[f'user{index}@example.com' for index in range(20)])
+    outbox = worker(MAIL_WORKERS=2, MAIL_BATCH_SIZE=5)
+    outbox.start()
+    try:
+        deadline = time.monotonic() + 10
+        while len(sink.delivered) < 20 and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        outbox.stop(timeout=5)
+    assert sorted(recipient for _, recipient, _ in sink.delivered) == sorted(f'user{index}@example.com' for index in range(20))
+
+class Clock:
+    """Stands in for the time module in mailer: sleeping just advances the clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+def test_rate_below_one_per_second_still_sends(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(mailer, 'time', clock)
+    limiter = RateLimiter(0.5)
+    sent_at = []
+    for _ in range(3):
+        limiter.acquire()
+        sent_at.append(clock.now)
+    assert sent_at == pytest.approx([0.0, 2.0, 4.0])
+
+@pytest.mark.parametrize('rate', [0, -1])
+def test_rate_must_be_positive(rate):
+    with pytest.raises(ValueError):
+        RateLimiter(rate)
@@ -0,0 +1,108 @@
+import os
+import pytest  # type: ignore
+from sqlalchemy import create_engine, text  # type: ignore
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError  # type: ignore
+from sqlalchemy.pool import QueuePool  # type: ignore
+from metrics import Histogram, Metrics, MetricsMiddleware
+from models import db
+from helpers import auth_headers, create_assessment, create_user
+
+def sample(exposition, name, **labels):
+    """Value of the series `name` whose labels include `labels` (and this worker), or 0 when absent."""
+    labels = dict(labels, worker=str(os.getpid()))
+    for line in exposition.splitlines():
+        if line.startswith('#') or not line.startswith(name):
+            continue
+        series, value = line.rsplit(' ', 1)
+        found = dict(pair.split('=', 1) for pair in series[len(name) + 1:-1].split(',')) if '{' in series else {}
+        if series.split('{')[0] == name and all(found.get(key) == f'"{value_}"' for key, value_ in labels.items()):
+            return float(value)
+    return 0
+
+def get(client, path, **kwargs):
+    """GET and close the response as a WSGI server would; requests are recorded when their body is closed."""
+    response = client.get(path, **kwargs)
+    response.close()
+    return response
+
+def test_scrape_counts_requests_and_their_statements(client):
+    recruiter = create_user('recruiter')
+    create_assessment(recruiter)
+    db.session.commit()
+    before = get(client, '/metrics').get_data(as_text=True)
+    assert get(client, '/assessments', headers=auth_headers(recruiter)).status_code == 200
+    response = get(client, '/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    after = response.get_data(as_text=True)
+
+    def delta(name, **labels):
+        return sample(after, name, **labels) - sample(before, name, **labels)
+
+    assert delta('http_requests_total', endpoint='assessmentlist', method='GET', status='200') == 1
+    assert delta('http_request_duration_seconds_count', endpoint='assessmentlist', method='GET') == 1
+    assert delta('db_statements_per_request_count', endpoint='assessmentlist') == 1
+    assert delta('db_statements_per_request_sum', endpoint='assessmentlist') >= 1
+    assert delta('http_response_size_bytes_sum', endpoint='assessmentlist') > 0
+
+def test_unknown_paths_are_not_labelled_by_url(client):
+    before = get(client, '/metrics').get_data(as_text=True)
+    get(client, '/no/such/path/42')
+    after = get(client, '/metrics').get_data(as_text=True)
+    assert '/no/such/path' not in after
+    assert sample(after, 'http_requests_total', endpoint='unmatched', method='GET', status='404') == \
+        sample(before, 'http_requests_total', endpoint='unmatched', method='GET', status='404') + 1
+
+def test_streamed_body_is_measured_when_it_is_closed():
+    metrics = Metrics()
+
+    def streaming_app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return iter([b'a' * 100, b'b' * 200, b'c' * 50])
+
+    body = MetricsMiddleware(streaming_app, metrics)({'REQUEST_METHOD': 'GET'}, lambda *args: None)
+    assert metrics.requests.series == {}
+    assert b''.join(body) == b'a' * 100 + b'b' * 200 + b'c' * 50
+    body.close()
+    body.close()
+    assert metrics.requests.series == {('unmatched', 'GET', '200'): 1}
+    assert metrics.response_size.series[('unmatched',)][-1] == 350
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram('latency', 'Latency.', (0.1, 1.0), ('endpoint',))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(('say "hi"',), value)
+    lines = list(histogram.render(((), ())))
+    assert lines[2:] == [
+        'latency_bucket{endpoint="say \\"hi\\"",le="0.1"} 2',
+        'latency_bucket{endpoint="say \\"hi\\"",le="1.0"} 3',
+        'latency_bucket{endpoint="say \\"hi\\"",le="+Inf"} 4',
+        'latency_sum{endpoint="say \\"hi\\""} 2.65',
+        'latency_count{endpoint="say \\"hi\\""} 4',
+    ]
+
+@pytest.fixture
+def pooled_engine():
+    engine = create_engine('sqlite://', poolclass=QueuePool, pool_size=1, max_overflow=1, pool_timeout=0.05)
+    yield engine
+    engine.dispose()
+
+def test_pool_gauges_and_checkout_timeouts(pooled_engine):
+    metrics = Metrics()
+    metrics.instrument_engine(pooled_engine)
+    first, second = pooled_engine.connect(), pooled_engine.connect()
+    try:
+        first.execute(text('SELECT 1'))
+        exposition = metrics.render()
+        assert sample(exposition, 'db_pool_checked_out') == 2
+        assert sample(exposition, 'db_pool_overflow') == 1
+        assert sample(exposition, 'db_pool_saturation') == 1.0
+        with pytest.raises(PoolTimeoutError):
+            pooled_engine.connect()
+    finally:
+        first.close()
+        second.close()
+    exposition = metrics.render()
+    assert sample(exposition, 'db_pool_checkout_timeouts_total') == 1
+    assert sample(exposition, 'db_pool_checkout_wait_seconds_count') == 3
+    assert sample(exposition, 'db_pool_checked_out') == 0
@@ -0,0 +1,21 @@
+import json
+from notifications import MAX_PAYLOAD, PostgresBroker
+
+def event(user_id, message='You have been invited.'):
+    return {'user_id': user_id, 'event': 'notification', 'data': {
+        'notification': {'id': user_id, 'user_id': user_id, 'message': message}, 'unread_count': 1
+    }}
+
+def test_events_are_packed_into_few_notify_payloads():
+    events = [event(user_id) for user_id in range(500)]
+    payloads = PostgresBroker.pack(events)
+    assert len(payloads) < 20
+    assert all(len(payload.encode('utf-8')) <= MAX_PAYLOAD for payload in payloads)
+    assert [unpacked for payload in payloads for unpacked in json.loads(payload)] == events
+
+def test_oversized_event_is_sent_truncated():
+    payloads = PostgresBroker.pack([event(1), event(2, message='x' * 10000), event(3)])
+    unpacked = [unpacked for payload in payloads for unpacked in json.loads(payload)]
+    assert [item['user_id'] for item in unpacked] == [1, 2, 3]
+    assert unpacked[1]['truncated'] and unpacked[1]['data']['notification'] == {'id': 2}
+    assert all(len(payload.encode('utf-8')) <= MAX_PAYLOAD for payload in payloads)
@@ -0,0 +1,50 @@
+import pytest  # type: ignore
+from sqlalchemy.exc import IntegrityError  # type: ignore
+from models import db, Assessment
+from helpers import auth_headers, create_assessment, create_question, create_user, invite
+
+@pytest.fixture
+def seeded(app):
+    recruiter = create_user('recruiter')
+    candidate = create_user()
+    assessments = [create_assessment(recruiter) for _ in range(7)]
+    for assessment in assessments:
+        invite(assessment, candidate)
+        create_question(assessment)
+    db.session.commit()
+    return {'recruiter': auth_headers(recruiter), 'candidate': auth_headers(candidate), 'assessment_id': assessments[0].id}
+
+def walk(client, path, headers):
+    ids, cursor = [], ''
+    while True:
+        body = client.get(f"{path}{'&' if '?' in path else '?'}limit=3&cursor={cursor}", headers=headers).get_json()
+        ids += [row['id'] for row in body['data']]
+        cursor = body['pagination']['next_cursor']
+        if not cursor:
+            return ids
+
+def test_cursor_pages_cover_every_row_once(client, seeded):
+    ids = walk(client, '/assessments', seeded['recruiter'])
+    assert len(ids) == 7 and len(set(ids)) == 7
+    assert len(walk(client, '/invitations', seeded['recruiter'])) == 7
+    assert len(walk(client, '/interviewee/assessments', seeded['candidate'])) == 7
+
+@pytest.mark.parametrize('user, path', [
+    ('recruiter', '/assessments'),
+    ('recruiter', '/invitations'),
+    ('recruiter', '/questions/{assessment_id}'),
+    ('recruiter', '/recruiter/interviewees'),
+    ('candidate', '/interviewee/assessments'),
+])
+def test_invalid_cursor_is_a_bad_request(client, seeded, user, path):
+    response = client.get(path.format(**seeded) + '?cursor=not-a-cursor', headers=seeded[user])
+    assert response.status_code == 400
+    assert 'Invalid cursor' in response.get_json()['message']
+
+def test_created_at_is_required(app):
+    recruiter = create_user('recruiter')
+    with pytest.raises(IntegrityError):
+        db.session.execute(Assessment.__table__.insert().values(
+            title='Untimed', recruiter_id=recruiter.id, time_limit=10, created_at=None
+        ))
+    db.session.rollback()
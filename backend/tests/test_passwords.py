@@ -0,0 +1,49 @@
+import threading
+import pytest  # type: ignore
+from passwords import PasswordHasher, PasswordHasherBusy
+
+@pytest.fixture
+def hasher():
+    return PasswordHasher(bcrypt_rounds=4, workers=1, max_pending=2, bulk_workers=1)
+
+def test_hash_many_hashes_on_the_bulk_pool(hasher):
+    hashes = hasher.hash_many(['one', 'two', 'three'])
+    assert [hasher.verify(password, stored) for password, stored in zip(['one', 'two', 'three'], hashes)] == [True] * 3
+
+def test_logins_are_not_queued_behind_a_bulk_import(hasher, monkeypatch):
+    stored = hasher.hash('secret')
+    release = threading.Event()
+    hash_password = hasher._hash
+
+    def slow_hash(password):
+        release.wait(10)
+        return hash_password(password)
+
+    monkeypatch.setattr(hasher, '_hash', slow_hash)
+    bulk = threading.Thread(target=hasher.hash_many, args=(['p'] * 20,))
+    bulk.start()
+    try:
+        results = []
+        login = threading.Thread(target=lambda: results.append(hasher.verify('secret', stored)))
+        login.start()
+        login.join(5)
+        assert results == [True], "verify waited for the bulk hashes"
+    finally:
+        release.set()
+        bulk.join()
+
+def test_interactive_queue_is_still_bounded(hasher, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(hasher, '_verify', lambda password, stored: release.wait(10))
+    waiting = [threading.Thread(target=hasher.verify, args=('x', hasher.dummy_hash)) for _ in range(2)]
+    for thread in waiting:
+        thread.start()
+    try:
+        while hasher.pending._value:
+            threading.Event().wait(0.01)
+        with pytest.raises(PasswordHasherBusy):
+            hasher.verify('x', hasher.dummy_hash)
+    finally:
+        release.set()
+        for thread in waiting:
+            thread.join()
@@ -0,0 +1,62 @@
+"""
+Listings must not issue a query per row (see Invitation.with_interviewee/with_assessment and
+User.average_scores): the statement count of each listing is the same for 2 rows as for 20.
+"""
+import pytest  # type: ignore
+from models import db
+from helpers import (
+    QueryCounter, assert_max_queries, auth_headers, create_assessment, create_submission, create_user, invite
+)
+
+def seed(size):
+    """A recruiter's assessment with `size` accepted, scored candidates, and a candidate invited to `size` assessments."""
+    recruiter = create_user('recruiter')
+    assessment = create_assessment(recruiter)
+    for index in range(size):
+        interviewee = create_user(gender=('male', 'female', 'other')[index % 3])
+        invite(assessment, interviewee)
+        create_submission(assessment, interviewee, status='graded', score=10.0 * index)
+    candidate = create_user()
+    for _ in range(size):
+        invite(create_assessment(recruiter), candidate)
+    db.session.commit()
+    return {
+        'recruiter': auth_headers(recruiter), 'candidate': auth_headers(candidate), 'assessment_id': assessment.id
+    }
+
+def statements(client, path, headers):
+    """Statements for one request, after a warm-up request has filled the process-level caches."""
+    assert client.get(path, headers=headers).status_code == 200
+    with QueryCounter() as queries:
+        response = client.get(path, headers=headers)
+    assert response.status_code == 200
+    return queries
+
+LISTINGS = [
+    ('recruiter', '/recruiter/assessments/{assessment_id}/interviewees'),
+    ('recruiter', '/recruiter/interviewees?per_page=50'),
+    ('recruiter', '/recruiter/interviewees?limit=50'),
+    ('recruiter', '/invitations?per_page=50'),
+    ('recruiter', '/invitations?limit=50'),
+    ('recruiter', '/interviewee/status'),
+    ('candidate', '/interviewee/assessments?per_page=50'),
+    ('candidate', '/interviewee/assessments?limit=50'),
+]
+
+@pytest.mark.parametrize('user, path', LISTINGS)
+def test_listing_queries_do_not_grow_with_rows(client, user, path):
+    small = seed(2)
+    small_count = statements(client, path.format(**small), small[user]).count
+    large = seed(20)
+    large_queries = statements(client, path.format(**large), large[user])
+    assert large_queries.count == small_count, "\n".join(large_queries.statements)
+
+def test_assessment_interviewees_in_two_queries(client):
+    # The accepted invitations with their interviewees, then the averages for all of them
+    seeded = seed(10)
+    path = f"/recruiter/assessments/{seeded['assessment_id']}/interviewees"
+    client.get(path, headers=seeded['recruiter'])
+    with assert_max_queries(2):
+        response = client.get(path, headers=seeded['recruiter'])
+    assert len(response.get_json()['data']) == 10
+    assert {row['average_score'] for row in response.get_json()['data']} == {10.0 * index for index in range(10)}
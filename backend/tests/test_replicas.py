@@ -0,0 +1,153 @@
+"""Read replicas, with a second SQLite file standing in for the replica: routing, client-side stickiness and failover."""
+import time
+import pytest  # type: ignore
+from sqlalchemy import create_engine  # type: ignore
+from sqlalchemy.exc import OperationalError  # type: ignore
+from sqlalchemy.orm import Session  # type: ignore
+from models import db, Assessment, User
+from asgi import AsyncAPI
+from replicas import LAST_WRITE_COOKIE, LAST_WRITE_HEADER, ReplicaRouter
+from cache import content_cache
+from helpers import auth_headers, create_assessment, create_question, create_user, invite
+from test_asgi import call
+
+def replica_engine(path):
+    engine = create_engine(f"sqlite:///{path}")
+    db.metadata.create_all(engine)
+    with Session(engine) as session:
+        recruiter = User(
+            username='replica', first_name='Replica', last_name='Recruiter', email='replica@example.com',
+            role='recruiter', gender='female', password_hash='x'
+        )
+        session.add(recruiter)
+        session.flush()
+        session.add(Assessment(title='On the replica', recruiter_id=recruiter.id, time_limit=30, is_published=True))
+        session.commit()
+    return engine
+
+@pytest.fixture
+def replicas(app, monkeypatch, tmp_path):
+    routers = []
+
+    def install(path):
+        engine = replica_engine(path) if path.parent.exists() else create_engine(f"sqlite:///{path}")
+        router = ReplicaRouter({'replica_0': engine}, sticky_seconds=5, health_interval=60)
+        router.watch('replica_0', engine)
+        monkeypatch.setitem(app.extensions, 'replicas', router)
+        routers.append((router, engine))
+        return router
+
+    yield install
+    for router, engine in routers:
+        router.stop()
+        engine.dispose()
+
+@pytest.fixture
+def recruiter(app):
+    recruiter = create_user('recruiter')
+    create_assessment(recruiter, title='On the primary')
+    db.session.commit()
+    return recruiter
+
+def titles(response):
+    return [assessment['title'] for assessment in response.get_json()]
+
+def test_reads_go_to_the_replica(client, recruiter, replicas, tmp_path):
+    replicas(tmp_path / 'replica.db')
+    assert titles(client.get('/assessments', headers=auth_headers(recruiter))) == ['On the replica']
+    # Routes without @read_replica stay on the primary
+    assert client.get(f'/assessments/{Assessment.query.one().id}', headers=auth_headers(recruiter)).status_code == 200
+
+def test_a_write_pins_the_client_to_the_primary(app, client, recruiter, replicas, tmp_path):
+    replicas(tmp_path / 'replica.db')
+    headers = auth_headers(recruiter)
+    response = client.post('/assessments', headers=headers, json={
+        'title': 'Just written', 'recruiter_id': recruiter.id, 'time_limit': 30
+    })
+    assert response.status_code == 201
+    written_at = float(response.headers[LAST_WRITE_HEADER])
+    assert abs(written_at - time.time()) < 5
+    assert client.get_cookie(LAST_WRITE_COOKIE).value == response.headers[LAST_WRITE_HEADER]
+
+    # The cookie follows the client to whichever worker serves the next read
+    assert titles(client.get('/assessments', headers=headers)) == ['On the primary', 'Just written']
+    # So does the header, for clients that do not keep cookies
+    other = app.test_client(use_cookies=False)
+    assert titles(other.get('/assessments', headers=headers)) == ['On the replica']
+    pinned = dict(headers, **{LAST_WRITE_HEADER: response.headers[LAST_WRITE_HEADER]})
+    assert titles(other.get('/assessments', headers=pinned)) == ['On the primary', 'Just written']
+
+def test_reads_do_not_pin_the_client(client, recruiter, replicas, tmp_path):
+    replicas(tmp_path / 'replica.db')
+    response = client.get('/assessments', headers=auth_headers(recruiter))
+    assert LAST_WRITE_HEADER not in response.headers
+    assert client.get_cookie(LAST_WRITE_COOKIE) is None
+
+@pytest.mark.parametrize('written_at', [-60, 60, None])
+def test_stale_future_or_invalid_write_times_are_ignored(app, recruiter, replicas, tmp_path, written_at):
+    replicas(tmp_path / 'replica.db')
+    client = app.test_client(use_cookies=False)
+    value = 'not a time' if written_at is None else f"{time.time() + written_at:.3f}"
+    response = client.get('/assessments', headers=dict(auth_headers(recruiter), **{LAST_WRITE_HEADER: value}))
+    assert titles(response) == ['On the replica']
+
+def test_reads_fall_back_to_the_primary_when_the_replica_is_down(client, recruiter, replicas, tmp_path):
+    router = replicas(tmp_path / 'missing' / 'replica.db')
+    assert titles(client.get('/assessments', headers=auth_headers(recruiter))) == ['On the primary']
+    assert router.healthy == []
+
+def test_connection_errors_take_the_replica_out_of_rotation(app, replicas, tmp_path):
+    router = replicas(tmp_path / 'replica.db')
+    router.start()
+    assert router.healthy == ['replica_0']
+    engine = create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    router.watch('replica_0', engine)
+    with pytest.raises(OperationalError):
+        engine.connect()
+    assert router.healthy == []
+    assert router.choose() is None
+    engine.dispose()
+
+def test_async_reads_use_the_replica_unless_pinned(app, recruiter, replicas, tmp_path):
+    replicas(tmp_path / 'replica.db')
+    invite(Assessment.query.one(), create_user())
+    db.session.commit()
+    application = AsyncAPI(app)
+    headers = auth_headers(recruiter)
+
+    def listed(path, **extra):
+        status, _, body = call(application, path, headers=dict(headers, **extra))
+        assert status == 200
+        return app.json.loads(body)
+
+    assert [assessment['title'] for assessment in listed('/assessments')] == ['On the replica']
+    written_at = f"{time.time():.3f}"
+    assert [assessment['title'] for assessment in listed('/assessments', **{LAST_WRITE_HEADER: written_at})] == ['On the primary']
+    pinned = listed('/assessments', Cookie=f"{LAST_WRITE_COOKIE}={written_at}")
+    assert [assessment['title'] for assessment in pinned] == ['On the primary']
+    # Invitations are not a replica route in either server mode
+    assert len(listed('/invitations')['data']) == 1
+
+@pytest.mark.parametrize('server', ['flask', 'asgi'])
+def test_cached_questions_are_not_built_on_a_lagging_replica(app, client, recruiter, replicas, tmp_path, server):
+    replicas(tmp_path / 'replica.db')
+    assessment = Assessment.query.one()
+    # The replica has the assessment under the same id, but not the question added since
+    assert assessment.id == 1
+    create_question(assessment)
+    content_cache().bump(assessment.id)
+    db.session.commit()
+    # Another client, pinned to the primary, has already cached the new version
+    version = content_cache().assessment_version(assessment.id)
+
+    path = f'/questions/{assessment.id}'
+    if server == 'flask':
+        response = client.get(path, headers=auth_headers(recruiter))
+        status, etag, questions = response.status_code, response.headers['ETag'], response.get_json()
+    else:
+        status, headers, body = call(AsyncAPI(app), path, headers=auth_headers(recruiter))
+        etag, questions = headers['etag'], app.json.loads(body)
+    assert status == 200
+    assert len(questions) == 1
+    assert etag == f'"{content_cache().etag("questions", assessment.id, version)}"'
+    assert len(content_cache().backend.get(content_cache().payload_key(etag.strip('"')))) == 1
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+import pytest  # type: ignore
+from flask_jwt_extended import create_access_token, decode_token  # type: ignore
+import app as server
+from models import db, RevokedToken
+from revocation import BloomFilter, RevocationStore
+from helpers import create_user
+
+@pytest.fixture
+def user(app):
+    user = create_user('recruiter')
+    db.session.commit()
+    return user
+
+def token_for(user):
+    token = create_access_token(identity=user.id)
+    return token, decode_token(token)
+
+def get_assessments(client, token):
+    return client.get('/assessments', headers={'Authorization': f'Bearer {token}'})
+
+def test_logged_out_token_is_rejected(client, user):
+    token, _ = token_for(user)
+    assert get_assessments(client, token).status_code == 200
+    assert client.post('/logout', headers={'Authorization': f'Bearer {token}'}).status_code == 200
+    response = get_assessments(client, token)
+    assert response.status_code == 401
+    assert response.get_json()['msg'] == 'Token has been revoked'
+
+def test_revocation_reaches_another_worker_at_its_next_sync(client, user, monkeypatch):
+    this_worker = RevocationStore(sync_interval=60)
+    monkeypatch.setattr(server, 'revocations', this_worker)
+    token, claims = token_for(user)
+    assert get_assessments(client, token).status_code == 200
+
+    # Logged out through another worker's store
+    RevocationStore().revoke(claims['jti'], datetime.utcfromtimestamp(claims['exp']))
+    db.session.commit()
+    # Accepted from the local filter until the sync interval has passed
+    assert get_assessments(client, token).status_code == 200
+    this_worker.next_sync = 0
+    assert get_assessments(client, token).status_code == 401
+    # Other tokens stay valid
+    assert get_assessments(client, token_for(user)[0]).status_code == 200
+
+def test_rebuild_purges_expired_revocations(app, user):
+    store = RevocationStore(sync_interval=0)
+    _, live = token_for(user)
+    store.revoke(live['jti'], datetime.utcnow() + timedelta(hours=1))
+    store.revoke('expired-jti', datetime.utcnow() - timedelta(seconds=1))
+    db.session.commit()
+
+    other = RevocationStore(sync_interval=0)
+    assert other.is_revoked(live['jti'])
+    assert not other.is_revoked('expired-jti')
+    assert [jti for (jti,) in db.session.query(RevokedToken.jti)] == [live['jti']]
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [f'jti-{index}' for index in range(1000)]
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+    false_positives = sum(f'other-{index}' in bloom for index in range(10000))
+    assert false_positives < 300
+
+@pytest.mark.parametrize('headers, status', [({}, 401), ({'Authorization': 'Bearer not-a-token'}, 422)])
+def test_invalid_tokens_get_jwt_errors(client, headers, status):
+    response = client.get('/assessments', headers=headers)
+    assert response.status_code == status
+    assert 'msg' in response.get_json()
@@ -0,0 +1,73 @@
+import pytest  # type: ignore
+from slow_queries import SlowQueryLog, explainable
+
+@pytest.mark.parametrize('statement', [
+    "SELECT users.id FROM users WHERE users.updated_at > %(since)s",
+    "WITH recent AS (SELECT id FROM submissions) SELECT count(*) FROM recent",
+    "SELECT id FROM users WHERE message = 'please update your profile'",
+    'SELECT "delete" FROM flags',
+])
+def test_reads_are_explained(statement):
+    assert explainable(statement, False)
+
+@pytest.mark.parametrize('statement', [
+    "SELECT email_outbox.id FROM email_outbox LIMIT 50 FOR UPDATE SKIP LOCKED",
+    "SELECT id FROM submissions WHERE id = %(id)s FOR SHARE",
+    "SELECT id FROM submissions FOR NO KEY UPDATE",
+    "SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload",
+    "SELECT setval('users_id_seq', 1000)",
+    "WITH moved AS (DELETE FROM email_outbox WHERE status = 'sent' RETURNING id) SELECT count(*) FROM moved",
+    "WITH claimed AS (UPDATE invitations SET status = 'expired' RETURNING id) SELECT id FROM claimed",
+    "UPDATE users SET first_name = %(name)s",
+])
+def test_locking_and_writing_statements_are_not_explained(statement):
+    assert not explainable(statement, False)
+
+def test_executemany_is_not_explained():
+    assert not explainable("SELECT 1", True)
+
+class Cursor:
+    def __init__(self, log, fail=False):
+        self.log = log
+        self.fail = fail
+
+    def execute(self, statement, parameters=None):
+        self.log.append(statement)
+        if self.fail and statement.startswith('EXPLAIN'):
+            raise RuntimeError("canceling statement due to statement timeout")
+
+    def fetchone(self):
+        return [[{'Plan': {'Node Type': 'Seq Scan'}}]]
+
+    def close(self):
+        self.log.append('close')
+
+class Connection:
+    """Just enough of a SQLAlchemy connection for SlowQueryLog.explain."""
+
+    def __init__(self, autocommit=False, fail=False):
+        self.executed = []
+        self.autocommit = autocommit
+        self.fail = fail
+        self.connection = self
+        self.dbapi_connection = self
+
+    def cursor(self):
+        return Cursor(self.executed, self.fail)
+
+@pytest.mark.parametrize('fail', [False, True])
+def test_explain_always_rolls_back_its_savepoint(fail):
+    conn = Connection(fail=fail)
+    plan = SlowQueryLog().explain(conn, "SELECT id FROM users", {})
+    assert ('error' in plan) if fail else plan == [{'Plan': {'Node Type': 'Seq Scan'}}]
+    assert conn.executed[0] == "SAVEPOINT slow_query_explain"
+    assert conn.executed[1].startswith("EXPLAIN (ANALYZE")
+    assert conn.executed[2:] == [
+        "ROLLBACK TO SAVEPOINT slow_query_explain", "RELEASE SAVEPOINT slow_query_explain", 'close'
+    ]
+
+def test_explain_in_autocommit_runs_in_a_rolled_back_transaction():
+    conn = Connection(autocommit=True)
+    SlowQueryLog().explain(conn, "SELECT id FROM users", {})
+    assert conn.executed[0] == "BEGIN"
+    assert conn.executed[2:] == ["ROLLBACK", 'close']
@@ -68,12 +68,12 @@ const PerformanceSection = () => {
 
   // Pie chart data for interviewee composition
   const pieChartData = {
-    labels: ['Male', 'Female'],
+    labels: ['Male', 'Female', 'Other'],
     datasets: [
       {
         label: 'Interviewee Composition',
-        data: [intervieweeComposition.male, intervieweeComposition.female],
-        backgroundColor: ['#36A2EB', '#FF6384'],
+        data: [intervieweeComposition.male, intervieweeComposition.female, intervieweeComposition.other],
+        backgroundColor: ['#36A2EB', '#FF6384', '#FFCE56'],
       },
     ],
   };
@@ -10,6 +10,7 @@ const notificationSlice = createSlice({
   name: 'notification',
   initialState: {
     notifications: [],
+    unreadCount: 0,
     status: 'idle',
     error: null,
   },
@@ -20,6 +21,13 @@ const notificationSlice = createSlice({
         notification.is_read = true;
       }
     },
+    // Pushed over the notification stream (see notificationService.subscribe)
+    notificationReceived: (state, action) => {
+      state.notifications.unshift(action.payload);
+    },
+    unreadCountUpdated: (state, action) => {
+      state.unreadCount = action.payload;
+    },
   },
   extraReducers: (builder) => {
     builder.addCase(fetchNotifications.fulfilled, (state, action) => {
@@ -28,5 +36,5 @@ const notificationSlice = createSlice({
   },
 });
 
-export const { markAsRead } = notificationSlice.actions;
+export const { markAsRead, notificationReceived, unreadCountUpdated } = notificationSlice.actions;
 export default notificationSlice.reducer;
@@ -4,5 +4,7 @@ const fetchAssessments = () => api.get('/assessments');
 const createAssessment = (data) => api.post('/assessments', data);
 const updateAssessment = (id, data) => api.put(`/assessments/${id}`, data);
 const deleteAssessment = (id) => api.delete(`/assessments/${id}`);
+const exportSubmissions = (id, format = 'csv') =>
+  api.get(`/assessments/${id}/export`, { params: { format }, responseType: 'blob' });
 
-export default { fetchAssessments, createAssessment, updateAssessment, deleteAssessment };
+export default { fetchAssessments, createAssessment, updateAssessment, deleteAssessment, exportSubmissions };
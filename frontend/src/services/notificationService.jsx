@@ -3,4 +3,23 @@ import api from './api';
 const fetchNotifications = () => api.get('/notifications');
 const markAsRead = (id) => api.patch(`/notifications/${id}`, { is_read: true });
 
-export default { fetchNotifications, markAsRead };
+// Opens the server-sent events stream instead of polling /notifications.
+// EventSource cannot send headers, so the JWT is passed as a query parameter;
+// the browser reconnects automatically after errors. The stream is only served with
+// SERVER_MODE=async; otherwise it answers 501 and closes, and fetchNotifications still works.
+// Returns a function that closes the stream.
+const subscribe = ({ onNotification, onUnreadCount }) => {
+  const token = localStorage.getItem('token');
+  const source = new EventSource(`/api/notifications/stream?jwt=${encodeURIComponent(token)}`);
+  source.addEventListener('notification', (event) => {
+    const { notification, unread_count } = JSON.parse(event.data);
+    onNotification?.(notification);
+    onUnreadCount?.(unread_count);
+  });
+  source.addEventListener('unread', (event) => {
+    onUnreadCount?.(JSON.parse(event.data).unread_count);
+  });
+  return () => source.close();
+};
+
+export default { fetchNotifications, markAsRead, subscribe };
@@ -4,3 +4,48 @@ export const submitAssessment = async (assessmentId, submissionData) => {
   const response = await api.post(`/interviewee/assessments/${assessmentId}/submit`, submissionData);
   return response.data;
 };
+
+// Live sessions: start (or resume) once, autosave changed answers as the candidate works,
+// then submit, which only flips the status because the answers are already stored.
+export const startAssessment = async (assessmentId) => {
+  const response = await api.post(`/interviewee/assessments/${assessmentId}/start`);
+  return response.data;
+};
+
+export const saveAnswers = async (submissionId, answers) => {
+  const response = await api.patch(`/interviewee/submissions/${submissionId}/answers`, { answers });
+  return response.data;
+};
+
+export const finishSubmission = async (submissionId, answers = []) => {
+  const response = await api.post(`/interviewee/submissions/${submissionId}/submit`, { answers });
+  return response.data;
+};
+
+// Collects answer changes and saves them in one small request after `delay` ms without edits.
+// Call flush() before finishSubmission so nothing typed in the last moments is lost.
+export const createAutosaver = (submissionId, delay = 2000) => {
+  let pending = {};
+  let timer = null;
+
+  const flush = async () => {
+    clearTimeout(timer);
+    timer = null;
+    const answers = Object.entries(pending).map(([questionId, answerText]) => ({
+      question_id: Number(questionId),
+      answer_text: answerText,
+    }));
+    pending = {};
+    if (answers.length) {
+      await saveAnswers(submissionId, answers);
+    }
+  };
+
+  const update = (questionId, answerText) => {
+    pending[questionId] = answerText;
+    clearTimeout(timer);
+    timer = setTimeout(flush, delay);
+  };
+
+  return { update, flush };
+};